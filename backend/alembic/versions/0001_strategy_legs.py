@@ -0,0 +1,136 @@
+"""Normalized strategy_legs table, backfilled from strategies.custom_legs
+
+Revision ID: 0001_strategy_legs
+Revises:
+Create Date: 2026-10-17
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001_strategy_legs"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Frozen copy of the custom_legs -> strategy_legs mapping this revision
+# backfills with; app.services.strategy_legs may evolve independently.
+COLUMN_KEYS = {
+    "instrumentType": "instrument_type",
+    "position": "side",
+    "quantity": "quantity",
+    "strike": "strike",
+    "premium": "premium",
+    "exitPremium": "exit_premium",
+    "entryPrice": "entry_price",
+    "exitPrice": "exit_price",
+    "impliedVol": "implied_vol",
+}
+NUMERIC = {"quantity", "strike", "premium", "exit_premium", "entry_price", "exit_price", "implied_vol"}
+KINDS = ("call", "put", "fut")
+
+
+def _number(value):
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def leg_row_values(strategy_id, user_id, expiry_date, parameters, custom_legs):
+    rows = []
+    for index, leg in enumerate(custom_legs or []):
+        row = {
+            "strategy_id": strategy_id,
+            "user_id": user_id,
+            "leg_index": index,
+            "underlying": str((parameters or {}).get("underlying") or "unspecified"),
+            "expiry_date": expiry_date,
+        }
+        for key, column in COLUMN_KEYS.items():
+            value = leg.get(key)
+            row[column] = _number(value) if column in NUMERIC else value
+
+        # Unknown kinds price as calls and anything but "sell" as a buy
+        kind = str(row["instrument_type"] or "call").lower()
+        row["instrument_type"] = kind if kind in KINDS else "call"
+        row["side"] = "sell" if str(row["side"] or "buy").lower() == "sell" else "buy"
+        row["quantity"] = row["quantity"] or 0
+        extra = {k: v for k, v in leg.items() if k not in COLUMN_KEYS}
+        row["extra"] = extra or None
+        rows.append(row)
+    return rows
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # The app's startup create_all may already have created the table
+    if not sa.inspect(bind).has_table("strategy_legs"):
+        op.create_table(
+            "strategy_legs",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column("strategy_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("strategies.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("leg_index", sa.Integer(), nullable=False),
+            sa.Column("instrument_type", sa.String(4), nullable=False),
+            sa.Column("side", sa.String(4), nullable=False),
+            sa.Column("quantity", sa.Numeric(), nullable=False),
+            sa.Column("strike", sa.Numeric()),
+            sa.Column("premium", sa.Numeric()),
+            sa.Column("exit_premium", sa.Numeric()),
+            sa.Column("entry_price", sa.Numeric()),
+            sa.Column("exit_price", sa.Numeric()),
+            sa.Column("implied_vol", sa.Float()),
+            sa.Column("underlying", sa.String()),
+            sa.Column("expiry_date", sa.Date(), nullable=False),
+            sa.Column("extra", sa.JSON()),
+        )
+        op.create_index("ix_strategy_legs_strategy_id_leg_index", "strategy_legs", ["strategy_id", "leg_index"], unique=True)
+        op.create_index("ix_strategy_legs_user_id_expiry_date", "strategy_legs", ["user_id", "expiry_date"])
+        op.create_index("ix_strategy_legs_user_id_underlying_expiry_date", "strategy_legs", ["user_id", "underlying", "expiry_date"])
+        op.create_index("ix_strategy_legs_user_id_instrument_type_strike", "strategy_legs", ["user_id", "instrument_type", "strike"])
+
+    strategies = sa.table(
+        "strategies",
+        sa.column("id", postgresql.UUID(as_uuid=True)),
+        sa.column("user_id", postgresql.UUID(as_uuid=True)),
+        sa.column("expiry_date", sa.Date()),
+        sa.column("parameters", sa.JSON()),
+        sa.column("custom_legs", sa.JSON()),
+    )
+    legs = sa.table(
+        "strategy_legs",
+        sa.column("id", postgresql.UUID(as_uuid=True)),
+        *(sa.column(name) for name in (
+            "strategy_id", "user_id", "leg_index", "instrument_type", "side", "quantity",
+            "strike", "premium", "exit_premium", "entry_price", "exit_price", "implied_vol",
+            "underlying", "expiry_date",
+        )),
+        sa.column("extra", sa.JSON()),
+    )
+
+    # Backfill only strategies that have no leg rows yet, so reruns are safe
+    already = sa.select(legs.c.strategy_id).distinct()
+    rows = bind.execute(
+        sa.select(strategies).where(strategies.c.id.not_in(already))
+    ).mappings()
+
+    batch = []
+    for row in rows:
+        for values in leg_row_values(row["id"], row["user_id"], row["expiry_date"], row["parameters"], row["custom_legs"]):
+            batch.append({"id": uuid.uuid4(), **values})
+        if len(batch) >= BATCH_SIZE:
+            op.bulk_insert(legs, batch)
+            batch = []
+    if batch:
+        op.bulk_insert(legs, batch)
+
+
+def downgrade() -> None:
+    op.drop_table("strategy_legs")
@@ -0,0 +1,31 @@
+"""Composite indexes backing keyset pagination and filters on strategies
+
+Revision ID: 0002_strategy_list_indexes
+Revises: 0001_strategy_legs
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0002_strategy_list_indexes"
+down_revision = "0001_strategy_legs"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_strategies_user_id_updated_at_id": ["user_id", "updated_at", "id"],
+    "ix_strategies_user_id_status_updated_at_id": ["user_id", "status", "updated_at", "id"],
+    "ix_strategies_user_id_strategy_type": ["user_id", "strategy_type"],
+    "ix_strategies_user_id_expiry_date": ["user_id", "expiry_date"],
+    "ix_strategies_user_id_entry_date": ["user_id", "entry_date"],
+    "ix_strategies_user_id_exit_date": ["user_id", "exit_date"],
+}
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES.items():
+        op.create_index(name, "strategies", columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.drop_index(name, table_name="strategies", if_exists=True)
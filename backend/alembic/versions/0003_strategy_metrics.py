@@ -0,0 +1,107 @@
+"""Materialized strategy metrics columns, indexes and backfill
+
+Revision ID: 0003_strategy_metrics
+Revises: 0002_strategy_list_indexes
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# Only the values come from the app: metrics are derived data that every
+# write recomputes, so the backfill uses the engine installed at upgrade time.
+# The columns this revision owns are frozen below.
+from app.services.metrics import compute_metrics_batch
+
+revision = "0003_strategy_metrics"
+down_revision = "0002_strategy_list_indexes"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+METRIC_COLUMNS = (
+    "max_profit",
+    "max_loss",
+    "breakevens",
+    "net_premium",
+    "margin_estimate",
+    "entry_delta",
+    "entry_gamma",
+    "entry_vega",
+    "entry_theta",
+)
+
+INDEXES = {
+    "ix_strategies_user_id_max_loss_id": ["user_id", "max_loss", "id"],
+    "ix_strategies_user_id_max_profit_id": ["user_id", "max_profit", "id"],
+    "ix_strategies_user_id_margin_estimate_id": ["user_id", "margin_estimate", "id"],
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = {column["name"] for column in sa.inspect(bind).get_columns("strategies")}
+    for name in METRIC_COLUMNS:
+        if name not in existing:
+            column_type = sa.JSON() if name == "breakevens" else sa.Float()
+            op.add_column("strategies", sa.Column(name, column_type))
+
+    for name, columns in INDEXES.items():
+        op.create_index(name, "strategies", columns, if_not_exists=True)
+
+    strategies = sa.table(
+        "strategies",
+        sa.column("id", postgresql.UUID(as_uuid=True)),
+        sa.column("entry_date", sa.Date()),
+        sa.column("expiry_date", sa.Date()),
+        sa.column("parameters", sa.JSON()),
+        sa.column("custom_legs", sa.JSON()),
+        *(sa.column(name, sa.JSON() if name == "breakevens" else sa.Float()) for name in METRIC_COLUMNS),
+    )
+
+    update = (
+        strategies.update()
+        .where(strategies.c.id == sa.bindparam("strategy_id"))
+        .values({name: sa.bindparam(name) for name in METRIC_COLUMNS})
+    )
+
+    # max_loss is always set by the app, so NULL marks rows still to backfill.
+    # Walk them in id order, one keyset page at a time.
+    last_id = None
+    while True:
+        query = (
+            sa.select(
+                strategies.c.id,
+                strategies.c.entry_date,
+                strategies.c.expiry_date,
+                strategies.c.parameters,
+                strategies.c.custom_legs,
+            )
+            .where(strategies.c.max_loss.is_(None))
+            .order_by(strategies.c.id)
+            .limit(BATCH_SIZE)
+        )
+        if last_id is not None:
+            query = query.where(strategies.c.id > last_id)
+        rows = bind.execute(query).mappings().all()
+        if not rows:
+            break
+
+        _, results = compute_metrics_batch(
+            [row["custom_legs"] for row in rows],
+            [row["parameters"] for row in rows],
+            [row["entry_date"] for row in rows],
+            [row["expiry_date"] for row in rows],
+        )
+        bind.execute(update, [
+            {"strategy_id": row["id"], **{name: columns[name] for name in METRIC_COLUMNS}}
+            for row, (columns, _) in zip(rows, results)
+        ])
+        last_id = rows[-1]["id"]
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.drop_index(name, table_name="strategies", if_exists=True)
+    for name in METRIC_COLUMNS:
+        op.drop_column("strategies", name)
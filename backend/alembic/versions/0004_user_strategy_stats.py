@@ -0,0 +1,57 @@
+"""Per-user dashboard aggregates, backfilled from strategies
+
+Revision ID: 0004_user_strategy_stats
+Revises: 0003_strategy_metrics
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# Frozen copy of the dashboard rules as of this revision; later changes to
+# app.services.dashboard must not change what this backfill writes.
+BACKFILL_STATS = sa.text("""
+    INSERT INTO user_strategy_stats (
+        user_id, total_count, open_count, completed_count,
+        winning_count, losing_count, realized_pnl, last_activity_at
+    )
+    SELECT
+        user_id,
+        count(*),
+        count(*) FILTER (WHERE status = 'current' OR (status = 'active' AND exit_date IS NULL)),
+        count(*) FILTER (WHERE status = 'completed'),
+        count(*) FILTER (WHERE status = 'completed' AND actual_profit > 0),
+        count(*) FILTER (WHERE status = 'completed' AND actual_profit < 0),
+        coalesce(sum(CASE WHEN status = 'completed' THEN actual_profit ELSE 0 END), 0),
+        max(greatest(updated_at, created_at))
+    FROM strategies
+    GROUP BY user_id
+    ON CONFLICT (user_id) DO NOTHING
+""")
+
+revision = "0004_user_strategy_stats"
+down_revision = "0003_strategy_metrics"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("user_strategy_stats"):
+        op.create_table(
+            "user_strategy_stats",
+            sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("total_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("open_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("completed_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("winning_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("losing_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("realized_pnl", sa.Numeric(), nullable=False, server_default="0"),
+            sa.Column("last_activity_at", sa.DateTime(timezone=True)),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        )
+
+    bind.execute(BACKFILL_STATS)
+
+def downgrade() -> None:
+    op.drop_table("user_strategy_stats")
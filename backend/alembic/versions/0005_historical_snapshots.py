@@ -0,0 +1,107 @@
+"""Content-addressed historical snapshots; hash existing client snapshots
+
+Revision ID: 0005_historical_snapshots
+Revises: 0004_user_strategy_stats
+Create Date: 2026-10-17
+"""
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0005_historical_snapshots"
+down_revision = "0004_user_strategy_stats"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Frozen copy of the snapshot encoding these hashes were computed with, so a
+# replayed upgrade produces the same digests as the original run.
+ENVELOPE_KEYS = ("snapshotDate", "contentHash")
+
+
+def canonical_encode(content) -> bytes:
+    return json.dumps(
+        content, sort_keys=True, separators=(",", ":"), ensure_ascii=False, allow_nan=False
+    ).encode("utf-8")
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def snapshot_content(snapshot):
+    return {key: value for key, value in snapshot.items() if key not in ENVELOPE_KEYS}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("historical_snapshots"):
+        op.create_table(
+            "historical_snapshots",
+            sa.Column("content_hash", sa.String(64), primary_key=True),
+            sa.Column("body", sa.LargeBinary(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        )
+    if "snapshot_hash" not in {column["name"] for column in inspector.get_columns("strategies")}:
+        op.add_column(
+            "strategies",
+            sa.Column("snapshot_hash", sa.String(64), sa.ForeignKey("historical_snapshots.content_hash")),
+        )
+
+    snapshots = sa.table(
+        "historical_snapshots",
+        sa.column("content_hash", sa.String()),
+        sa.column("body", sa.LargeBinary()),
+    )
+    strategies = sa.table(
+        "strategies",
+        sa.column("id", postgresql.UUID(as_uuid=True)),
+        sa.column("historical_snapshot", sa.JSON()),
+        sa.column("snapshot_hash", sa.String()),
+    )
+
+    # Existing (client-built) snapshots are hashed as stored, never rebuilt
+    rows = bind.execute(
+        sa.select(strategies.c.id, strategies.c.historical_snapshot).where(
+            strategies.c.historical_snapshot.is_not(None),
+            strategies.c.snapshot_hash.is_(None),
+        )
+    ).mappings().all()
+
+    update = (
+        strategies.update()
+        .where(strategies.c.id == sa.bindparam("strategy_id"))
+        .values(snapshot_hash=sa.bindparam("digest"), historical_snapshot=sa.bindparam("snapshot"))
+    )
+    bodies, updates = {}, []
+    for row in rows:
+        snapshot = row["historical_snapshot"]
+        if not isinstance(snapshot, dict):
+            continue
+        body = canonical_encode(snapshot_content(snapshot))
+        digest = content_hash(body)
+        bodies[digest] = body
+        updates.append({"strategy_id": row["id"], "digest": digest, "snapshot": {**snapshot, "contentHash": digest}})
+        if len(updates) >= BATCH_SIZE:
+            _flush(bind, snapshots, update, bodies, updates)
+            bodies, updates = {}, []
+    if updates:
+        _flush(bind, snapshots, update, bodies, updates)
+
+
+def _flush(bind, snapshots, update, bodies, updates) -> None:
+    stmt = postgresql.insert(snapshots).values(
+        [{"content_hash": digest, "body": body} for digest, body in bodies.items()]
+    )
+    bind.execute(stmt.on_conflict_do_nothing(index_elements=["content_hash"]))
+    bind.execute(update, updates)
+
+
+def downgrade() -> None:
+    op.drop_column("strategies", "snapshot_hash")
+    op.drop_table("historical_snapshots")
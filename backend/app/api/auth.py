@@ -9,12 +9,12 @@ from app.core.security import create_access_token
 
 from app.core.database import get_db, AsyncSessionLocal
 from app.core.security import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_and_update_password_async,
     create_access_token,
 )
 from app.models.user import User
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, invalidate_identity
 from app.schemas.user import Register, Login, UserResponse
 
 
@@ -57,7 +57,7 @@ async def register(
     new_user = User(
         name=payload.name,
         email=payload.email,
-        hashed_password=hash_password(payload.password),
+        hashed_password=await hash_password_async(payload.password),
     )
 
     db.add(new_user)
@@ -84,14 +84,26 @@ async def login(
     )
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(payload.password, user.hashed_password):
+    valid, new_hash = (
+        await verify_and_update_password_async(payload.password, user.hashed_password)
+        if user else (False, None)
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid email or password",
         )
 
+    # Hash scheme or rounds changed since this password was stored
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
+    # A new session starts from the stored row, not a cached identity
+    invalidate_identity(user.id)
+
     access_token = create_access_token(
-        data={"sub": str(user.id)}
+        data={"sub": str(user.id), "email": user.email, "name": user.name}
     )
 
     return {
@@ -133,7 +145,8 @@ async def google_callback(request: Request):
             await db.commit()
             await db.refresh(user)
 
-    jwt_token = create_access_token({"sub": str(user.id)})
+    invalidate_identity(user.id)
+    jwt_token = create_access_token({"sub": str(user.id), "email": user.email, "name": user.name})
 
     frontend_url = os.getenv("FRONTEND_URL")
     return RedirectResponse(
@@ -0,0 +1,131 @@
+from fastapi import APIRouter, Depends, HTTPException
+from functools import partial
+import asyncio
+
+from app.api.deps import get_token_user
+from app.models.user import User
+from app.schemas.backtest import BacktestRequest, BacktestResponse, SweepRequest, SweepResponse
+from app.services.backtest import (
+    OPEN,
+    BacktestConfig,
+    build_config,
+    run_backtest,
+    summarize_backtest,
+    trade_records,
+)
+from app.services.chain import ChainStore, open_store
+from app.services.snapshot import canonical_encode, content_hash
+from app.services.sweep import SWEEP_DIR, SWEEP_WORKERS, rank_results, run_sweep, sweep_slots
+
+router = APIRouter()
+
+# (user id, sweep id) pairs in flight in this process; a repeat is refused
+# until the first finishes, since both would append to the same results file
+_running_sweeps = set()
+
+
+def backtest_config(payload) -> BacktestConfig:
+    try:
+        return build_config(payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def chain_store_for(config: BacktestConfig) -> ChainStore:
+    store = open_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="No option chain data has been ingested")
+    unknown = [u for u in config.underlyings if store.code(u) is None]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Underlying not found: {', '.join(unknown)}")
+    return store
+
+
+def _evaluate_backtest(store: ChainStore, config: BacktestConfig, include_paths: bool, include_trades: bool):
+    """Run, summarize and serialize one backtest (CPU-bound; called in an executor)."""
+    results = run_backtest(store, config, include_paths=include_paths)
+    trades = trade_records(results, config.legs, config.quantity) if include_trades else []
+    return results, summarize_backtest(results), trades
+
+
+@router.post("/backtest", response_model=BacktestResponse)
+async def run_strategy_backtest(
+    payload: BacktestRequest,
+    current_user: User = Depends(get_token_user),
+):
+    """
+    Open the strategy on every scheduled entry day of every underlying, mark
+    it daily from the chain store and apply the exit rules.
+    """
+    config = backtest_config(payload)
+    store = chain_store_for(config)
+
+    include_paths = payload.include_trades and payload.include_paths
+    results, analytics, trades = await asyncio.get_running_loop().run_in_executor(None, partial(
+        _evaluate_backtest, store, config, include_paths, payload.include_trades,
+    ))
+    return BacktestResponse(
+        trades=analytics["trades"],
+        open_trades=sum(int((result.exit_reason == OPEN).sum()) for result in results),
+        equity_curve=analytics["equity_curve"],
+        summary=analytics["summary"],
+        by_underlying=analytics["by_underlying"],
+        results=trades,
+    )
+
+
+@router.post("/backtest/sweep", response_model=SweepResponse)
+async def run_backtest_sweep(
+    payload: SweepRequest,
+    current_user: User = Depends(get_token_user),
+):
+    """
+    Run every rule variant of the grid in a worker pool. Progress is kept
+    per user and sweep, so repeating a request that timed out resumes it.
+    """
+    config = backtest_config(payload)
+    store = chain_store_for(config)
+    spec = payload.model_dump(mode="json", exclude={"sort_by", "top", "max_workers"})
+    sweep_id = content_hash(canonical_encode({"spec": spec, "store": store.version}))[:32]
+
+    try:
+        rank_results([], payload.sort_by)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    running_key = (current_user.id, sweep_id)
+    if running_key in _running_sweeps:
+        raise HTTPException(status_code=409, detail="This sweep is already running")
+    if not sweep_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=429,
+            detail="Too many sweeps are running; retry shortly",
+            headers={"Retry-After": "30"},
+        )
+
+    _running_sweeps.add(running_key)
+    try:
+        outcome = await asyncio.get_running_loop().run_in_executor(None, partial(
+            run_sweep,
+            config,
+            payload.grid,
+            root=store.root,
+            results_path=SWEEP_DIR / str(current_user.id) / f"{sweep_id}.jsonl",
+            sample=payload.sample,
+            seed=payload.seed,
+            workers=min(payload.max_workers or SWEEP_WORKERS, SWEEP_WORKERS),
+        ))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    finally:
+        _running_sweeps.discard(running_key)
+        sweep_slots.release()
+
+    ranked = rank_results(outcome.rows, payload.sort_by)
+    return SweepResponse(
+        sweep_id=sweep_id,
+        variants=len(outcome.rows),
+        computed=outcome.computed,
+        resumed=outcome.resumed,
+        sort_by=payload.sort_by,
+        results=ranked[: payload.top] if payload.top else ranked,
+    )
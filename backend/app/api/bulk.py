@@ -0,0 +1,235 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import any_, bindparam, delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+import uuid
+
+from app.core.cache import invalidate_user
+from app.core.database import AsyncSessionLocal, get_db
+from app.api.deps import get_current_user, get_token_user
+from app.models.strategy import Strategy
+from app.models.strategy_leg import StrategyLeg
+from app.models.user import User
+from app.schemas.strategy import BulkImportResponse, StrategyBatchRequest, StrategyBatchResponse
+from app.services.bulk import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_COLUMNS,
+    EXPORT_FORMATS,
+    IMPORT_FORMATS,
+    export_rows,
+    import_strategies,
+    parquet_available,
+)
+from app.services.dashboard import apply_stats_delta, contribution, strategy_contribution, sum_contributions
+from app.services.exits import settle_leg_sets
+from app.services.metrics import METRIC_COLUMNS, compute_metrics_batch
+from app.services.payoff import _to_float
+from app.services.snapshot import build_snapshot, seal_snapshot, store_snapshot_body
+from app.services.strategy_legs import leg_row_values
+
+router = APIRouter()
+
+_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _import_format(request: Request, fmt: Optional[str]) -> str:
+    if fmt is None:
+        content_type = request.headers.get("content-type", "")
+        fmt = "csv" if "csv" in content_type else "ndjson"
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(IMPORT_FORMATS)}")
+    return fmt
+
+
+@router.post("/strategies/import", response_model=BulkImportResponse)
+async def import_strategies_endpoint(
+    request: Request,
+    fmt: Optional[str] = Query(default=None, alias="format", description="csv or ndjson; defaults from Content-Type"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream a CSV (with header) or NDJSON body of strategies. Each row uses the
+    create fields plus optional status, exit_date and actual_profit;
+    parameters and custom_legs are JSON text in CSV.
+    """
+    fmt = _import_format(request, fmt)
+    report = await import_strategies(db, current_user.id, request.stream(), fmt)
+    if report.imported:
+        invalidate_user(current_user.id)
+    return report.to_dict()
+
+
+@router.get("/strategies/export")
+async def export_strategies(
+    fmt: str = Query(default="ndjson", alias="format", description="csv, ndjson or parquet"),
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    current_user: User = Depends(get_token_user),
+):
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if fmt == "parquet" and not parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires the pyarrow package")
+
+    query = select(*(getattr(Strategy, name) for name in EXPORT_COLUMNS)).where(
+        Strategy.user_id == current_user.id
+    )
+    if status_filter is not None:
+        query = query.where(Strategy.status == status_filter)
+    query = query.order_by(Strategy.created_at, Strategy.id)
+
+    async def body():
+        # The session lives for the duration of the stream, not the request
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for chunk in export_rows(result.partitions(), fmt):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="strategies.{fmt}"'},
+    )
+
+
+def _owned(ids):
+    """``id = ANY(:ids) AND user_id = :user`` with the ids bound as one array."""
+    return Strategy.id == any_(bindparam("ids", list(ids), type_=ARRAY(PG_UUID(as_uuid=True))))
+
+
+def _exit_price(strategy, payload: StrategyBatchRequest) -> Optional[float]:
+    price = payload.underlying_prices.get(strategy.id, payload.underlying_price)
+    if price is None:
+        price = _to_float((strategy.parameters or {}).get("underlyingPrice"), None)
+    return price if price and price > 0 else None
+
+
+@router.post("/strategies/batch", response_model=StrategyBatchResponse)
+async def batch_strategies(
+    payload: StrategyBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Delete, exit or change the status of many strategies at once. Every id
+    must belong to the caller; the whole batch commits in one transaction.
+    """
+    ids = list(dict.fromkeys(payload.ids))
+    if payload.operation == "status" and payload.status is None:
+        raise HTTPException(status_code=400, detail="status is required")
+
+    result = await db.execute(
+        select(Strategy)
+        .where(_owned(ids), Strategy.user_id == current_user.id)
+        .with_for_update()
+    )
+    strategies = result.scalars().all()
+    if len(strategies) != len(ids):
+        raise HTTPException(status_code=404, detail="Strategy not found")
+
+    before = sum_contributions(strategy_contribution(s) for s in strategies)
+    response = {"operation": payload.operation, "affected": len(strategies), "skipped": [], "results": []}
+
+    if payload.operation == "delete":
+        await apply_stats_delta(db, current_user.id, before=before)
+        await db.execute(
+            delete(Strategy)
+            .where(_owned(ids), Strategy.user_id == current_user.id)
+            .execution_options(synchronize_session=False)
+        )
+
+    elif payload.operation == "status":
+        await db.execute(
+            update(Strategy)
+            .where(_owned(ids), Strategy.user_id == current_user.id)
+            .values(status=payload.status)
+            .execution_options(synchronize_session=False)
+        )
+        after = sum_contributions(
+            contribution(payload.status, s.exit_date, s.actual_profit) for s in strategies
+        )
+        await apply_stats_delta(db, current_user.id, before, after)
+
+    else:
+        exiting = [s for s in strategies if s.status != "completed"]
+        response["skipped"] = [s.id for s in strategies if s.status == "completed"]
+        prices = [_exit_price(s, payload) for s in exiting]
+        missing = [str(s.id) for s, price in zip(exiting, prices) if price is None]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Underlying price is required for: {', '.join(missing)}")
+
+        exit_date = payload.exit_date or date.today()
+        settled, pnl = settle_leg_sets([s.custom_legs for s in exiting], prices)
+        _, metrics = compute_metrics_batch(
+            settled,
+            [s.parameters for s in exiting],
+            [s.entry_date for s in exiting],
+            [s.expiry_date for s in exiting],
+        )
+
+        rows, leg_rows, bodies = [], [], {}
+        for strategy, legs, price, profit, (columns, profile) in zip(exiting, settled, prices, pnl.tolist(), metrics):
+            content = build_snapshot(legs, strategy.entry_date, exit_date, price, strategy.notes)
+            body, digest, snapshot = seal_snapshot(content)
+            bodies[digest] = body
+            rows.append({
+                "b_id": strategy.id,
+                "custom_legs": legs,
+                "parameters": {**(strategy.parameters or {}), **profile.to_parameters()},
+                "actual_profit": Decimal(str(profit)),
+                "historical_snapshot": snapshot,
+                "snapshot_hash": digest,
+                **columns,
+            })
+            leg_rows.extend(
+                {"id": uuid.uuid4(), **values}
+                for values in leg_row_values(strategy.id, current_user.id, strategy.expiry_date, strategy.parameters, legs)
+            )
+            response["results"].append({"id": strategy.id, "actual_profit": profit})
+
+        if rows:
+            for digest, body in bodies.items():
+                await store_snapshot_body(db, digest, body)
+            table = Strategy.__table__
+            await db.execute(
+                table.update()
+                .where(table.c.id == bindparam("b_id"), table.c.user_id == current_user.id)
+                .values(
+                    status="completed",
+                    exit_date=exit_date,
+                    custom_legs=bindparam("custom_legs"),
+                    parameters=bindparam("parameters"),
+                    actual_profit=bindparam("actual_profit"),
+                    historical_snapshot=bindparam("historical_snapshot"),
+                    snapshot_hash=bindparam("snapshot_hash"),
+                    **{name: bindparam(name) for name in METRIC_COLUMNS},
+                    updated_at=func.now(),
+                ),
+                rows,
+            )
+            exited_ids = [row["b_id"] for row in rows]
+            await db.execute(delete(StrategyLeg).where(StrategyLeg.strategy_id.in_(exited_ids)))
+            if leg_rows:
+                await db.execute(insert(StrategyLeg), leg_rows)
+
+        exited = {row["b_id"]: row for row in rows}
+        after = sum_contributions(
+            contribution("completed", exit_date, exited[s.id]["actual_profit"])
+            if s.id in exited else strategy_contribution(s)
+            for s in strategies
+        )
+        await apply_stats_delta(db, current_user.id, before, after)
+        response["affected"] = len(rows)
+
+    await db.commit()
+    invalidate_user(current_user.id)
+    return response
+
@@ -0,0 +1,236 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+from app.api.deps import get_token_user
+from app.models.user import User
+from app.schemas.chain import (
+    ChainExpiriesResponse,
+    OptimizeRequest,
+    OptimizeResponse,
+    OptionChainResponse,
+    ScreenRequest,
+    ScreenResponse,
+)
+from app.services.chain import ChainStore, day_number, from_day_number, open_store
+from app.services.montecarlo import analytic_lognormal
+from app.services.optimizer import TEMPLATES, Objective, optimize, optimized_legs
+from app.services.payoff import CALL, FUT, PUT, LegArrays, solve_expiry_profile
+from app.services.pricing import DAYS_PER_YEAR, DEFAULT_RISK_FREE_RATE
+from app.services.screener import ScreenConstraints, build_book, candidate_records, screen
+
+router = APIRouter()
+
+
+def _store() -> ChainStore:
+    store = open_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="No option chain data has been ingested")
+    return store
+
+
+def _trading_day(store: ChainStore, underlying: str, on: Optional[date]) -> int:
+    dates = store.trade_dates(underlying)
+    if dates.size == 0:
+        raise HTTPException(status_code=404, detail="Underlying not found")
+    if on is None:
+        return int(dates[-1])
+    day = day_number(on)
+    if not np.any(dates == day):
+        raise HTTPException(status_code=404, detail="No chain data for that date")
+    return day
+
+
+def _quotes(chain, mask):
+    def clean(values):
+        return [None if not np.isfinite(v) else v for v in values.tolist()]
+
+    return [
+        {"open": o, "high": h, "low": lo, "close": c, "settle": s, "open_interest": oi, "volume": v}
+        for o, h, lo, c, s, oi, v in zip(
+            clean(chain.open[mask]), clean(chain.high[mask]), clean(chain.low[mask]),
+            clean(chain.close[mask]), clean(chain.settle[mask]),
+            chain.open_interest[mask].tolist(), chain.volume[mask].tolist(),
+        )
+    ]
+
+
+@router.get("/chain/{underlying}/expiries", response_model=ChainExpiriesResponse)
+async def get_chain_expiries(
+    underlying: str,
+    on: Optional[date] = Query(default=None, alias="date", description="Trading day; defaults to the latest"),
+    current_user: User = Depends(get_token_user),
+):
+    store = _store()
+    day = _trading_day(store, underlying, on)
+    return ChainExpiriesResponse(
+        underlying=underlying.upper(),
+        date=from_day_number(day),
+        expiries=[from_day_number(e) for e in store.expiries(underlying, day).tolist()],
+    )
+
+
+@router.get("/chain/{underlying}", response_model=OptionChainResponse)
+async def get_option_chain(
+    underlying: str,
+    expiry: date,
+    on: Optional[date] = Query(default=None, alias="date", description="Trading day; defaults to the latest"),
+    current_user: User = Depends(get_token_user),
+):
+    """Calls and puts aligned by strike, plus the future, for one expiry."""
+    store = _store()
+    day = _trading_day(store, underlying, on)
+    chain = store.chain(underlying, day, day_number(expiry))
+    if len(chain) == 0:
+        raise HTTPException(status_code=404, detail="No chain data for that expiry")
+
+    is_call, is_put = chain.kind == CALL, chain.kind == PUT
+    strikes = np.unique(chain.strike[is_call | is_put])
+    rows = [{"strike": strike, "call": None, "put": None} for strike in strikes.tolist()]
+    for side, mask in (("call", is_call), ("put", is_put)):
+        positions = np.searchsorted(strikes, chain.strike[mask])
+        for position, quote in zip(positions.tolist(), _quotes(chain, mask)):
+            rows[position][side] = quote
+
+    futures = _quotes(chain, chain.kind == FUT)
+    lots = chain.lot_size[chain.lot_size > 0]
+    return OptionChainResponse(
+        underlying=underlying.upper(),
+        date=from_day_number(day),
+        expiry=expiry,
+        underlying_price=store.underlying_price(underlying, day),
+        lot_size=int(lots[0]) if lots.size else None,
+        future=futures[0] if futures else None,
+        strikes=rows,
+    )
+
+
+@router.post("/chain/{underlying}/screen", response_model=ScreenResponse)
+async def screen_option_chain(
+    underlying: str,
+    payload: ScreenRequest,
+    current_user: User = Depends(get_token_user),
+):
+    """Top candidates of one structure on one expiry, from the stored chain."""
+    store = _store()
+    day = _trading_day(store, underlying, payload.on)
+    expiry = day_number(payload.expiry)
+    chain = store.chain(underlying, day, expiry, kinds=(CALL, PUT))
+    spot = store.underlying_price(underlying, day)
+    if len(chain) == 0 or spot is None:
+        raise HTTPException(status_code=404, detail="No chain data for that expiry")
+    if expiry <= day:
+        raise HTTPException(status_code=400, detail="expiry must be after the trading day")
+
+    r = DEFAULT_RISK_FREE_RATE if payload.risk_free_rate is None else payload.risk_free_rate
+    book = await run_in_threadpool(build_book, chain, spot, (expiry - day) / DAYS_PER_YEAR, r)
+    if not np.isfinite(book.atm_vol):
+        raise HTTPException(status_code=422, detail="Could not solve implied volatilities for this chain")
+
+    lots = chain.lot_size[chain.lot_size > 0]
+    quantity = payload.quantity or (float(lots[0]) if lots.size else 1.0)
+    best, scored = await run_in_threadpool(
+        screen,
+        book,
+        payload.structure,
+        payload.rank_by,
+        payload.top,
+        ScreenConstraints(
+            min_credit=payload.min_credit,
+            min_width=payload.min_width,
+            max_width=payload.max_width,
+            min_short_delta=payload.min_short_delta,
+            max_short_delta=payload.max_short_delta,
+        ),
+    )
+    return ScreenResponse(
+        underlying=underlying.upper(),
+        date=from_day_number(day),
+        expiry=payload.expiry,
+        structure=payload.structure,
+        rank_by=payload.rank_by,
+        underlying_price=spot,
+        atm_volatility=book.atm_vol,
+        days_to_expiry=expiry - day,
+        quantity=quantity,
+        candidates_scored=scored,
+        results=candidate_records(book, payload.structure, best, quantity),
+    )
+
+
+@router.post("/chain/{underlying}/optimize", response_model=OptimizeResponse)
+async def optimize_template(
+    underlying: str,
+    payload: OptimizeRequest,
+    current_user: User = Depends(get_token_user),
+):
+    """Strikes and lot count for a quick template that best meet the objective."""
+    store = _store()
+    day = _trading_day(store, underlying, payload.on)
+    expiry = day_number(payload.expiry)
+    chain = store.chain(underlying, day, expiry)
+    spot = store.underlying_price(underlying, day)
+    if len(chain) == 0 or spot is None:
+        raise HTTPException(status_code=404, detail="No chain data for that expiry")
+    if expiry <= day:
+        raise HTTPException(status_code=400, detail="expiry must be after the trading day")
+
+    r = DEFAULT_RISK_FREE_RATE if payload.risk_free_rate is None else payload.risk_free_rate
+    t = (expiry - day) / DAYS_PER_YEAR
+    book = await run_in_threadpool(build_book, chain, spot, t, r)
+    if not np.isfinite(book.atm_vol):
+        raise HTTPException(status_code=422, detail="Could not solve implied volatilities for this chain")
+
+    futures = chain.price[(chain.kind == FUT) & np.isfinite(chain.price)]
+    lots = chain.lot_size[chain.lot_size > 0]
+    lot_size = payload.lot_size or (float(lots[0]) if lots.size else 1.0)
+    vol = book.atm_vol if payload.volatility is None else payload.volatility
+    drift = r if payload.drift is None else payload.drift
+    template = TEMPLATES[payload.template]
+    try:
+        result = await run_in_threadpool(
+            optimize,
+            book,
+            template,
+            Objective(payload.objective, payload.max_loss, payload.max_lots, payload.delta_tolerance),
+            lot_size,
+            future_price=float(futures[0]) if futures.size else None,
+            vol=vol,
+            drift=drift,
+            restarts=payload.restarts,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if result is None:
+        raise HTTPException(status_code=422, detail="No strikes on this chain meet the objective's constraints")
+
+    legs = optimized_legs(template, result, lot_size)
+    arrays = LegArrays.from_legs(legs)
+    profile = solve_expiry_profile(arrays)
+    metrics = result.metrics
+    return OptimizeResponse(
+        underlying=underlying.upper(),
+        date=from_day_number(day),
+        expiry=payload.expiry,
+        template=payload.template,
+        objective=payload.objective,
+        underlying_price=spot,
+        volatility=vol,
+        drift=drift,
+        days_to_expiry=expiry - day,
+        lot_size=lot_size,
+        lots=result.lots,
+        legs=legs,
+        expected_value=metrics["expected_value"],
+        probability_of_profit=analytic_lognormal(arrays, spot, vol, t, drift).probability_of_profit,
+        net_premium=metrics["net_premium"],
+        max_profit=profile.max_profit,
+        max_loss=None if profile.max_loss is None else -profile.max_loss,
+        breakevens=profile.breakevens,
+        delta=metrics["delta"],
+        theta=metrics["theta"],
+        evaluations=result.evaluations,
+    )
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.database import get_db
+from app.api.deps import get_token_user
+from app.models.dashboard import UserStrategyStats
+from app.models.user import User
+from app.schemas.dashboard import DashboardSummary
+from app.services.dashboard import summarize
+
+router = APIRouter()
+
+
+@router.get("/dashboard/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_token_user),
+):
+    result = await db.execute(
+        select(UserStrategyStats).where(UserStrategyStats.user_id == current_user.id)
+    )
+    return summarize(result.scalar_one_or_none())
@@ -1,30 +1,104 @@
-from fastapi import Depends, HTTPException, status
+from dataclasses import dataclass
+from typing import Optional
+import os
+import uuid
+
+from fastapi import Depends, HTTPException, Query, WebSocketException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.core.database import get_db
+from app.core.cache import TTLCache
+from app.core.database import AsyncSessionLocal, get_db
 from app.core.security import decode_access_token
 from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db),
-):
+# Read-only endpoints may trust the signed token instead of looking the user up
+TRUST_TOKEN_CLAIMS = os.getenv("TRUST_TOKEN_CLAIMS", "true").lower() in ("1", "true", "yes")
+
+identity_cache = TTLCache(
+    maxsize=int(os.getenv("IDENTITY_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("IDENTITY_CACHE_TTL", "300")),
+)
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Detached identity of the caller; safe to share across requests."""
+    id: uuid.UUID
+    email: Optional[str] = None
+    name: Optional[str] = None
+
+
+def invalidate_identity(user_id) -> None:
+    """Drop a cached identity, e.g. after the user row changes or is removed."""
+    identity_cache.invalidate(uuid.UUID(str(user_id)))
+
+
+def _token_subject(token: str):
     payload = decode_access_token(token)
     if not payload or "sub" not in payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
+    try:
+        return payload, uuid.UUID(str(payload["sub"]))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+        )
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+):
+    _, user_id = _token_subject(token)
+
+    cached = identity_cache.get(user_id)
+    if cached is not None:
+        return cached
 
-    user_id = payload["sub"]
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return user
+    identity = AuthenticatedUser(id=user.id, email=user.email, name=user.name)
+    identity_cache.set(user_id, identity)
+    return identity
+
+
+async def get_token_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Identity for read-only endpoints: taken straight from the verified JWT
+    when TRUST_TOKEN_CLAIMS is enabled, otherwise same as get_current_user.
+    """
+    if not TRUST_TOKEN_CLAIMS:
+        return await get_current_user(token, db)
+
+    payload, user_id = _token_subject(token)
+    return AuthenticatedUser(id=user_id, email=payload.get("email"), name=payload.get("name"))
+
+
+async def get_websocket_user(token: Optional[str] = Query(default=None)):
+    """
+    Identity for WebSocket routes. Browsers cannot set headers on the
+    handshake, so the JWT comes as ``?token=``; a bad one closes the socket.
+    """
+    try:
+        if TRUST_TOKEN_CLAIMS:
+            payload, user_id = _token_subject(token or "")
+            return AuthenticatedUser(id=user_id, email=payload.get("email"), name=payload.get("name"))
+        async with AsyncSessionLocal() as db:
+            return await get_current_user(token or "", db)
+    except HTTPException as exc:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail)
@@ -1,7 +1,19 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_current_user, identity_cache
+from app.core.security import password_pool
 
 router = APIRouter()
 
 @router.get("/health")
 def health():
     return {"status": "ok"}
+
+# Internal statistics are for signed-in users only
+@router.get("/health/cache", dependencies=[Depends(get_current_user)])
+def cache_stats():
+    return {"identity": identity_cache.stats()}
+
+@router.get("/health/password-pool", dependencies=[Depends(get_current_user)])
+def password_pool_stats():
+    return password_pool.stats()
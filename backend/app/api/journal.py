@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.cache import TTLCache
+from app.core.database import get_db
+from app.api.deps import get_token_user
+from app.models.strategy import Strategy
+from app.models.user import User
+from app.schemas.journal import JournalAnalyticsResponse
+from app.services.journal import journal_analytics
+
+router = APIRouter()
+
+# Cleared by invalidate_user() on every strategy write, including exits
+analytics_cache = TTLCache(maxsize=1024, ttl=60 * 60, per_user=True)
+
+
+@router.get("/journal/analytics", response_model=JournalAnalyticsResponse)
+async def get_journal_analytics(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_token_user),
+):
+    cached = analytics_cache.get(current_user.id)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(
+        select(
+            Strategy.strategy_type,
+            Strategy.exit_date,
+            Strategy.updated_at,
+            Strategy.actual_profit,
+            Strategy.historical_snapshot,
+        ).where(
+            Strategy.user_id == current_user.id,
+            Strategy.status == "completed",
+        )
+    )
+    analytics = journal_analytics(result.all())
+
+    analytics_cache.set(current_user.id, analytics)
+    return analytics
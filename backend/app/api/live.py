@@ -0,0 +1,92 @@
+import asyncio
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from sqlalchemy import select
+
+from app.api.deps import AuthenticatedUser, get_websocket_user
+from app.core.database import AsyncSessionLocal
+from app.models.strategy import Strategy
+from app.schemas.live import LiveRequest
+from app.services.chain import open_store
+from app.services.dashboard import open_strategy_filter
+from app.services.live import LiveHub, ReplayFeed, Subscriber
+
+router = APIRouter()
+
+BAD_MESSAGE = 'Expected {"action": "subscribe" | "unsubscribe", "strategy_ids": [...]}'
+
+
+def _replay_feed() -> ReplayFeed:
+    # Stand-in for a broker quote stream until one is wired up
+    store = open_store()
+    return ReplayFeed.from_store(store) if store is not None else ReplayFeed([])
+
+
+live_hub = LiveHub(_replay_feed)
+
+
+async def _open_strategies(user_id, strategy_ids: Optional[List[UUID]]):
+    query = select(
+        Strategy.id,
+        Strategy.custom_legs,
+        Strategy.parameters,
+        Strategy.entry_date,
+        Strategy.expiry_date,
+    ).where(
+        Strategy.user_id == user_id,
+        open_strategy_filter(),
+    )
+    if strategy_ids is not None:
+        query = query.where(Strategy.id.in_(strategy_ids))
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(query)
+        return result.all()
+
+
+@router.websocket("/live/mtm")
+async def live_mtm(
+    websocket: WebSocket,
+    current_user: AuthenticatedUser = Depends(get_websocket_user),
+):
+    """
+    Stream mark-to-market P&L and Greeks of the caller's open strategies.
+
+    The client sends ``{"action": "subscribe" | "unsubscribe",
+    "strategy_ids": [...]}``; omitting the ids means every open strategy.
+    The server answers each with ``{"type": "subscribed", "strategy_ids",
+    "missing"}`` and then pushes ``{"type": "mtm", "as_of", "strategies":
+    {id: {field: value}}}`` holding only the fields that changed.
+    """
+    await websocket.accept()
+    if open_store() is None:
+        await websocket.send_json({"type": "error", "detail": "No option chain data has been ingested"})
+        await websocket.close(code=1011)
+        return
+
+    subscriber = Subscriber(websocket.send_json)
+    sender = asyncio.create_task(subscriber.run())
+    try:
+        while True:
+            try:
+                request = LiveRequest.model_validate(await websocket.receive_json())
+            except ValueError:
+                subscriber.notify({"type": "error", "detail": BAD_MESSAGE})
+                continue
+
+            missing = []
+            if request.action == "subscribe":
+                rows = await _open_strategies(current_user.id, request.strategy_ids)
+                found = {row.id for row in rows}
+                missing = [str(sid) for sid in request.strategy_ids or [] if sid not in found]
+                live_hub.subscribe(subscriber, rows)
+            else:
+                dropped = subscriber.strategy_ids if request.strategy_ids is None else [str(sid) for sid in request.strategy_ids]
+                live_hub.unsubscribe(subscriber, dropped)
+            subscriber.notify({"type": "subscribed", "strategy_ids": subscriber.strategy_ids, "missing": missing})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        live_hub.remove(subscriber)
+        sender.cancel()
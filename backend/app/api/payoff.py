@@ -0,0 +1,120 @@
+from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.database import get_db
+from app.api.deps import get_token_user
+from app.models.strategy import Strategy
+from app.models.user import User
+from app.schemas.strategy import (
+    PayoffRequest,
+    PayoffResponse,
+    PayoffDataPoint,
+    PayoffBatchRequest,
+    PayoffBatchResponse,
+    PayoffBatchItem,
+    PayoffSurfaceRequest,
+    PayoffSurfaceResponse,
+)
+from app.services.payoff import (
+    PAYOFF_BATCH_MAX_CELLS,
+    LegArrays,
+    batch_payoff,
+    price_grid,
+    payoff_curve,
+    solve_expiry_profile,
+)
+from app.services.pricing import DEFAULT_RISK_FREE_RATE
+from app.services.surface import build_surface
+
+router = APIRouter()
+
+
+@router.post("/payoff", response_model=PayoffResponse)
+async def calculate_payoff(
+    payload: PayoffRequest,
+    current_user: User = Depends(get_token_user),
+):
+    legs = LegArrays.from_legs(payload.custom_legs)
+    prices = price_grid(payload.underlying_price, payload.price_range_percent, payload.points)
+    pnl = payoff_curve(legs, prices)
+    profile = solve_expiry_profile(legs)
+
+    return PayoffResponse(
+        curve=[
+            PayoffDataPoint(price=price, pnl=value)
+            for price, value in zip(prices.tolist(), pnl.tolist())
+        ],
+        max_profit=profile.max_profit,
+        max_loss=profile.max_loss,
+        unlimited_profit=profile.unlimited_profit,
+        unlimited_loss=profile.unlimited_loss,
+        breakevens=profile.breakevens,
+    )
+
+
+@router.post("/payoff/surface", response_model=PayoffSurfaceResponse)
+async def calculate_payoff_surface(
+    payload: PayoffSurfaceRequest,
+    current_user: User = Depends(get_token_user),
+):
+    entry_date = datetime.fromisoformat(payload.entry_date).date()
+    expiry_date = datetime.fromisoformat(payload.expiry_date).date()
+    if expiry_date < entry_date:
+        raise HTTPException(status_code=400, detail="expiry_date must not be before entry_date")
+
+    legs = LegArrays.from_legs(payload.custom_legs)
+    prices = price_grid(payload.underlying_price, payload.price_range_percent, payload.points)
+
+    return build_surface(
+        legs,
+        prices,
+        entry_date,
+        expiry_date,
+        payload.underlying_price,
+        payload.date_points,
+        payload.default_volatility,
+        DEFAULT_RISK_FREE_RATE if payload.risk_free_rate is None else payload.risk_free_rate,
+    )
+
+
+@router.post("/payoff/batch", response_model=PayoffBatchResponse)
+async def calculate_payoff_batch(
+    payload: PayoffBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_token_user),
+):
+    strategy_ids = list(dict.fromkeys(payload.strategy_ids))
+    saved_legs = {}
+    if strategy_ids:
+        result = await db.execute(
+            select(Strategy.id, Strategy.custom_legs).where(
+                Strategy.id.in_(strategy_ids),
+                Strategy.user_id == current_user.id,
+            )
+        )
+        saved_legs = {row.id: row.custom_legs for row in result}
+
+        if len(saved_legs) != len(strategy_ids):
+            raise HTTPException(status_code=404, detail="Strategy not found")
+
+    owners = [*strategy_ids, *([None] * len(payload.leg_sets))]
+    leg_sets = [*(saved_legs[sid] for sid in strategy_ids), *payload.leg_sets]
+
+    cells = len(leg_sets) * len(payload.underlying_prices)
+    if cells > PAYOFF_BATCH_MAX_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch needs {cells} strategy x price values; the limit is {PAYOFF_BATCH_MAX_CELLS}",
+        )
+    pnl = await run_in_threadpool(batch_payoff, leg_sets, payload.underlying_prices)
+
+    return PayoffBatchResponse(
+        underlying_prices=payload.underlying_prices,
+        results=[
+            PayoffBatchItem(strategy_id=owner, pnl=row)
+            for owner, row in zip(owners, pnl.tolist())
+        ],
+    )
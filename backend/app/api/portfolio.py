@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from datetime import date
+
+from app.core.cache import TTLCache
+from app.core.database import get_db
+from app.api.deps import get_token_user
+from app.models.strategy import Strategy
+from app.models.user import User
+from app.schemas.portfolio import PortfolioGreeksResponse
+from app.services.dashboard import open_strategy_filter
+from app.services.portfolio import compute_portfolio_greeks
+
+router = APIRouter()
+
+# Cleared by invalidate_user() on every strategy write
+greeks_cache = TTLCache(maxsize=1024, ttl=15 * 60, per_user=True)
+
+
+@router.get("/portfolio/greeks", response_model=PortfolioGreeksResponse)
+async def get_portfolio_greeks(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_token_user),
+):
+    as_of = date.today()
+    cache_key = (current_user.id, as_of)
+    cached = greeks_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(
+        select(
+            Strategy.custom_legs,
+            Strategy.parameters,
+            Strategy.entry_date,
+            Strategy.expiry_date,
+        ).where(
+            Strategy.user_id == current_user.id,
+            open_strategy_filter(),
+        )
+    )
+    greeks = compute_portfolio_greeks(result.all(), as_of)
+
+    greeks_cache.set(cache_key, greeks)
+    return greeks
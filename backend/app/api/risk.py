@@ -0,0 +1,141 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from datetime import date
+from uuid import UUID
+
+import json
+
+import numpy as np
+
+from app.core.database import get_db
+from app.api.deps import get_token_user
+from app.models.strategy import Strategy
+from app.models.user import User
+from app.schemas.risk import SimulationRequest, SimulationResponse, StressRequest
+from app.services.dashboard import open_strategy_filter
+from app.services.montecarlo import analytic_lognormal, simulate
+from app.services.payoff import FUT, LegArrays
+from app.services.portfolio import stack_book
+from app.services.pricing import DAYS_PER_YEAR, DEFAULT_RISK_FREE_RATE, reference_price
+from app.services.stress import STRESS_MAX_CELLS, base_value, stress_cells, stress_row
+from app.services.surface import DEFAULT_VOLATILITY
+
+router = APIRouter()
+
+
+async def _get_owned_strategy(db: AsyncSession, strategy_id: UUID, user: User) -> Strategy:
+    result = await db.execute(
+        select(Strategy).where(
+            Strategy.id == strategy_id,
+            Strategy.user_id == user.id
+        )
+    )
+    strategy = result.scalar_one_or_none()
+
+    if not strategy:
+        raise HTTPException(status_code=404, detail="Strategy not found")
+
+    return strategy
+
+
+def _strategy_volatility(legs: LegArrays) -> float:
+    """Size-weighted mean of the open option legs' stored IVs."""
+    usable = legs.is_open & (legs.kind != FUT) & np.isfinite(legs.implied_vol)
+    if not usable.any():
+        return DEFAULT_VOLATILITY
+    return float(np.average(legs.implied_vol[usable], weights=np.abs(legs.weight[usable]) + 1e-12))
+
+
+@router.post("/strategies/{strategy_id}/simulation", response_model=SimulationResponse)
+async def simulate_strategy(
+    strategy_id: UUID,
+    payload: SimulationRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_token_user),
+):
+    strategy = await _get_owned_strategy(db, strategy_id, current_user)
+
+    legs = LegArrays.from_legs(strategy.custom_legs)
+    spot = payload.underlying_price or reference_price(legs, strategy.parameters)
+    if not spot:
+        raise HTTPException(status_code=400, detail="Underlying price is required")
+
+    vol = payload.volatility or _strategy_volatility(legs)
+    days = max((strategy.expiry_date - max(date.today(), strategy.entry_date)).days, 0)
+    t = days / DAYS_PER_YEAR
+
+    if payload.method == "analytic":
+        result = analytic_lognormal(legs, spot, vol, t, payload.drift)
+    else:
+        result = await run_in_threadpool(
+            simulate, legs, spot, vol, t, payload.drift,
+            paths=payload.paths, seed=payload.seed, antithetic=payload.antithetic,
+        )
+
+    return SimulationResponse(
+        underlying_price=spot,
+        volatility=vol,
+        days_to_expiry=days,
+        **result.to_dict(),
+    )
+
+
+@router.post("/stress")
+async def stress_test(
+    payload: StressRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_token_user),
+):
+    """
+    Stream scenario P&L as NDJSON: a header line, then one line per spot
+    shock holding a ``[vol_shift][days_forward]`` matrix of P&L changes
+    relative to the unshocked book today.
+    """
+    if payload.strategy_id is not None:
+        strategies = [await _get_owned_strategy(db, payload.strategy_id, current_user)]
+    else:
+        result = await db.execute(
+            select(
+                Strategy.custom_legs,
+                Strategy.parameters,
+                Strategy.entry_date,
+                Strategy.expiry_date,
+            ).where(
+                Strategy.user_id == current_user.id,
+                open_strategy_filter(),
+            )
+        )
+        strategies = result.all()
+
+    as_of = date.today()
+    rate = DEFAULT_RISK_FREE_RATE if payload.risk_free_rate is None else payload.risk_free_rate
+    book = await run_in_threadpool(stack_book, strategies, as_of, rate)
+    cells = stress_cells(book, payload.spot_shocks, payload.vol_shifts, payload.days_forward)
+    if cells > STRESS_MAX_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Stress grid needs {cells} leg evaluations; the limit is {STRESS_MAX_CELLS}",
+        )
+    base_pnl = await run_in_threadpool(base_value, book, rate)
+
+    # One spot shock per line, each computed off the event loop as it is sent
+    async def rows():
+        yield json.dumps({
+            "as_of": as_of.isoformat(),
+            "strategies": len(strategies),
+            "unpriced_legs": int(np.count_nonzero(book.legs.is_open & ~book.priced)),
+            "base_pnl": base_pnl,
+            "spot_shocks": payload.spot_shocks,
+            "vol_shifts": payload.vol_shifts,
+            "days_forward": payload.days_forward,
+        }) + "\n"
+        for shock in payload.spot_shocks:
+            grid = await run_in_threadpool(
+                stress_row, book, base_pnl, shock, payload.vol_shifts, payload.days_forward, rate
+            )
+            yield json.dumps({"spot_shock": shock, "pnl": np.round(grid, 2).tolist()}) + "\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
@@ -1,15 +1,32 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import load_only
 from datetime import datetime, date
+from typing import Optional
 from uuid import UUID
 from decimal import Decimal
+import base64
+import json
 
+from app.core.cache import invalidate_user
 from app.core.database import get_db
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_token_user
 from app.models.strategy import Strategy
 from app.models.user import User
-from app.schemas.strategy import StrategyCreate, StrategyResponse
+from app.schemas.strategy import StrategyCreate, StrategyResponse, StrategyListItem, ImpliedVolRequest, SnapshotResponse
+from app.services.dashboard import apply_stats_delta, strategy_contribution
+from app.services.metrics import apply_strategy_metrics, new_strategy_values
+from app.services.payoff import LegArrays, _to_float
+from app.services.pricing import (
+    DEFAULT_RISK_FREE_RATE,
+    reference_price,
+    solve_leg_vols,
+    with_implied_vols,
+    year_fraction,
+)
+from app.services.snapshot import build_snapshot, seal_snapshot, store_snapshot_body, verify_snapshot
+from app.services.strategy_legs import replace_strategy_legs
 
 router = APIRouter()
 
@@ -19,38 +36,150 @@ async def create_strategy(
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user),
 ):
-    
+    entry_date = datetime.fromisoformat(strategy.entry_date).date()
+    expiry_date = datetime.fromisoformat(strategy.expiry_date).date()
+
     new_strategy = Strategy(
-        user_id=current_user.id,
-        name=strategy.name,
-        strategy_type=strategy.strategy_type,
-        entry_date=datetime.fromisoformat(strategy.entry_date).date(),
-        expiry_date=datetime.fromisoformat(strategy.expiry_date).date(),
-        parameters=strategy.parameters or {},
-        custom_legs=strategy.custom_legs or [],
-        notes=strategy.notes,
-        status="current",
-        config={
-            "parameters": strategy.parameters or {},
-            "custom_legs": strategy.custom_legs or [],
-        },
+        **new_strategy_values(
+            current_user.id,
+            strategy.name,
+            strategy.strategy_type,
+            entry_date,
+            expiry_date,
+            strategy.parameters,
+            strategy.custom_legs,
+            strategy.notes,
+        )
     )
 
     db.add(new_strategy)
+    await db.flush()
+    await replace_strategy_legs(db, new_strategy)
+    await apply_stats_delta(db, current_user.id, after=strategy_contribution(new_strategy))
     await db.commit()
+    invalidate_user(current_user.id)
     await db.refresh(new_strategy)
 
     return new_strategy
 
-@router.get("/strategies", response_model=list[StrategyResponse])
+# Fields returned when no projection is requested; config and
+# historical_snapshot stay unloaded unless asked for via ?fields=
+DEFAULT_LIST_FIELDS = (
+    "id", "name", "strategy_type", "status", "entry_date", "expiry_date", "exit_date",
+    "parameters", "custom_legs", "notes", "actual_profit", "created_at", "updated_at",
+)
+LIST_FIELDS = set(StrategyListItem.model_fields)
+
+# Sortable columns; each has a (user_id, column, id) index so sorting by risk
+# is a plain index scan over the materialized metrics
+SORT_COLUMNS = ("updated_at", "max_loss", "max_profit", "margin_estimate")
+
+
+def _encode_cursor(sort: str, value, strategy_id: UUID) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, str(strategy_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, strategy_id = json.loads(raw)
+        if cursor_sort != sort:
+            raise ValueError(cursor_sort)
+        if sort == "updated_at":
+            value = datetime.fromisoformat(value)
+        else:
+            value = float(value)
+        return value, UUID(strategy_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get(
+    "/strategies",
+    response_model=list[StrategyListItem],
+    response_model_exclude_unset=True,
+)
 async def list_strategies(
+    response: Response,
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    strategy_type: Optional[str] = None,
+    entry_from: Optional[date] = None,
+    entry_to: Optional[date] = None,
+    expiry_from: Optional[date] = None,
+    expiry_to: Optional[date] = None,
+    exit_from: Optional[date] = None,
+    exit_to: Optional[date] = None,
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return"),
+    limit: Optional[int] = Query(default=None, ge=1, le=500, description="Page size; omit to return every row"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    sort: str = Query(default="updated_at", description=f"One of: {', '.join(SORT_COLUMNS)}"),
+    order: str = Query(default="desc", pattern="^(asc|desc)$"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_token_user),
 ):
-    result = await db.execute(
-        select(Strategy).where(Strategy.user_id == current_user.id)
+    """
+    Strategies ordered by ``sort`` (most recently updated by default),
+    keyset-paginated on ``(sort, id)``. The next page's cursor is returned in
+    the ``X-Next-Cursor`` header. Unlimited max profit/loss sort as +/-inf.
+    """
+    if sort not in SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+    sort_column = getattr(Strategy, sort)
+
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(DEFAULT_LIST_FIELDS)
+    unknown = set(selected) - LIST_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    columns = {*selected, "id", sort}
+    query = (
+        select(Strategy)
+        .options(load_only(*(getattr(Strategy, name) for name in columns)))
+        .where(Strategy.user_id == current_user.id)
+    )
+
+    if status_filter is not None:
+        query = query.where(Strategy.status == status_filter)
+    if strategy_type is not None:
+        query = query.where(Strategy.strategy_type == strategy_type)
+
+    ranges = (
+        (Strategy.entry_date, entry_from, entry_to),
+        (Strategy.expiry_date, expiry_from, expiry_to),
+        (Strategy.exit_date, exit_from, exit_to),
     )
-    return result.scalars().all()
+    for column, low, high in ranges:
+        if low is not None:
+            query = query.where(column >= low)
+        if high is not None:
+            query = query.where(column <= high)
+
+    if cursor:
+        value, strategy_id = _decode_cursor(cursor, sort)
+        key, after = tuple_(sort_column, Strategy.id), tuple_(value, strategy_id)
+        query = query.where(key < after if order == "desc" else key > after)
+
+    if order == "desc":
+        query = query.order_by(sort_column.desc(), Strategy.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Strategy.id.asc())
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    result = await db.execute(query)
+    rows = result.scalars().all()
+
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(sort, getattr(rows[-1], sort), rows[-1].id)
+
+    return [
+        StrategyListItem(**{name: getattr(row, name) for name in selected})
+        for row in rows
+    ]
 
 @router.delete("/strategies/{strategy_id}", status_code=204)
 async def delete_strategy(
@@ -59,18 +188,22 @@ async def delete_strategy(
     current_user: User = Depends(get_current_user),
 ):
     result = await db.execute(
-        select(Strategy).where(
+        select(Strategy)
+        .where(
             Strategy.id == strategy_id,
             Strategy.user_id == current_user.id
         )
+        .with_for_update()
     )
     strategy = result.scalar_one_or_none()
 
     if not strategy:
         raise HTTPException(status_code=404, detail="Strategy not found")
 
+    await apply_stats_delta(db, current_user.id, before=strategy_contribution(strategy))
     await db.delete(strategy)
     await db.commit()
+    invalidate_user(current_user.id)
 
     return None
 
@@ -82,16 +215,20 @@ async def exit_strategy(
     current_user: User = Depends(get_current_user),
 ):
     result = await db.execute(
-        select(Strategy).where(
+        select(Strategy)
+        .where(
             Strategy.id == strategy_id,
             Strategy.user_id == current_user.id
         )
+        .with_for_update()
     )
     strategy = result.scalar_one_or_none()
 
     if not strategy:
         raise HTTPException(status_code=404, detail="Strategy not found")
 
+    before = strategy_contribution(strategy)
+
     # ---- UPDATE FIELDS ----
     strategy.status = payload.get("status", strategy.status)
 
@@ -103,11 +240,101 @@ async def exit_strategy(
 
     if "custom_legs" in payload:
         strategy.custom_legs = payload["custom_legs"]
+        apply_strategy_metrics(strategy)
+        await replace_strategy_legs(db, strategy)
 
     if "historical_snapshot" in payload:
-        strategy.historical_snapshot = payload["historical_snapshot"]
+        # The snapshot is rebuilt from the stored legs; only the exit
+        # underlying price is taken from the client's copy
+        client_snapshot = payload["historical_snapshot"] or {}
+        content = build_snapshot(
+            strategy.custom_legs,
+            strategy.entry_date,
+            strategy.exit_date,
+            _to_float(client_snapshot.get("underlyingPriceAtExit"), None),
+            strategy.notes,
+        )
+        body, digest, snapshot = seal_snapshot(content)
+        if strategy.snapshot_hash and strategy.snapshot_hash != digest:
+            raise HTTPException(status_code=409, detail="Historical snapshot is immutable")
+        if strategy.snapshot_hash != digest:
+            await store_snapshot_body(db, digest, body)
+            strategy.historical_snapshot = snapshot
+            strategy.snapshot_hash = digest
+            strategy.actual_profit = Decimal(str(content["realizedPnL"]))
 
+    await apply_stats_delta(db, current_user.id, before, strategy_contribution(strategy))
     await db.commit()
+    invalidate_user(current_user.id)
     await db.refresh(strategy)
 
     return strategy
+
+@router.post("/strategies/{strategy_id}/implied-vols", response_model=StrategyResponse)
+async def solve_implied_vols(
+    strategy_id: UUID,
+    payload: ImpliedVolRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    result = await db.execute(
+        select(Strategy)
+        .where(
+            Strategy.id == strategy_id,
+            Strategy.user_id == current_user.id
+        )
+        .with_for_update()
+    )
+    strategy = result.scalar_one_or_none()
+
+    if not strategy:
+        raise HTTPException(status_code=404, detail="Strategy not found")
+
+    custom_legs = strategy.custom_legs or []
+    legs = LegArrays.from_legs(custom_legs)
+    underlying_price = payload.underlying_price or reference_price(legs, strategy.parameters)
+    if not underlying_price:
+        raise HTTPException(status_code=400, detail="Underlying price is required")
+
+    rate = DEFAULT_RISK_FREE_RATE if payload.risk_free_rate is None else payload.risk_free_rate
+    vols = solve_leg_vols(
+        legs,
+        underlying_price,
+        year_fraction(strategy.entry_date, strategy.expiry_date),
+        rate,
+    )
+    strategy.custom_legs = with_implied_vols(custom_legs, vols)
+    apply_strategy_metrics(strategy)
+    await replace_strategy_legs(db, strategy)
+
+    await db.commit()
+    invalidate_user(current_user.id)
+    await db.refresh(strategy)
+
+    return strategy
+
+
+@router.get("/strategies/{strategy_id}/snapshot", response_model=SnapshotResponse)
+async def get_strategy_snapshot(
+    strategy_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_token_user),
+):
+    result = await db.execute(
+        select(Strategy.historical_snapshot, Strategy.snapshot_hash).where(
+            Strategy.id == strategy_id,
+            Strategy.user_id == current_user.id
+        )
+    )
+    row = result.one_or_none()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Strategy not found")
+    if not row.snapshot_hash:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+
+    return SnapshotResponse(
+        content_hash=row.snapshot_hash,
+        verified=verify_snapshot(row.historical_snapshot, row.snapshot_hash),
+        snapshot=row.historical_snapshot,
+    )
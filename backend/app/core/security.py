@@ -1,9 +1,28 @@
 from passlib.context import CryptContext
 from jose import jwt, JWTError
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
 import os
+import time
 from datetime import datetime, timedelta
 
-pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
+# Hashing configuration: changing the scheme or rounds makes existing hashes
+# "need update", and they are transparently rehashed on the next login.
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "sha256_crypt")
+PASSWORD_HASH_ROUNDS = os.getenv("PASSWORD_HASH_ROUNDS")
+
+
+def _build_context() -> CryptContext:
+    schemes = list(dict.fromkeys([PASSWORD_HASH_SCHEME, "sha256_crypt"]))
+    options = {}
+    if PASSWORD_HASH_ROUNDS:
+        rounds = int(PASSWORD_HASH_ROUNDS)
+        for key in ("default_rounds", "min_rounds", "max_rounds"):
+            options[f"{PASSWORD_HASH_SCHEME}__{key}"] = rounds
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+
+pwd_context = _build_context()
 
 SECRET_KEY = "supersecretkey"  # move to env later
 ALGORITHM = "HS256"
@@ -14,7 +33,98 @@ def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    except ValueError:
+        # Empty or unrecognised hash (e.g. OAuth-only accounts)
+        return False
+
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Return ``(valid, new_hash)``; ``new_hash`` is set when a rehash is due."""
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except ValueError:
+        return False, None
+
+
+# --------------------
+# Off-loop hashing pool
+# --------------------
+# Hashing is CPU-bound and would stall the event loop, so the async handlers
+# run it on a bounded worker pool. A semaphore caps concurrent hashes; callers
+# beyond the cap wait (and are counted as queued) instead of piling work up.
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "process")  # "process" or "thread"
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_CONCURRENCY = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", str(PASSWORD_HASH_WORKERS * 2)))
+
+
+class PasswordHashPool:
+    """Bounded executor for password hashing with queue-depth metrics."""
+
+    def __init__(self, workers: int, max_concurrency: int, kind: str = "process"):
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.kind = kind
+        self._executor = None
+        self._semaphore = None
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.max_queue_depth = 0
+        self.total_wait_seconds = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            executor_cls = ProcessPoolExecutor if self.kind == "process" else ThreadPoolExecutor
+            self._executor = executor_cls(max_workers=self.workers)
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        enqueued = time.perf_counter()
+        async with self._semaphore:
+            self.queued -= 1
+            self.total_wait_seconds += time.perf_counter() - enqueued
+            self.in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+            finally:
+                self.in_flight -= 1
+                self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_wait_ms": 1000 * self.total_wait_seconds / self.completed if self.completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordHashPool(
+    PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_CONCURRENCY, PASSWORD_HASH_EXECUTOR
+)
+
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run(hash_password, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str):
+    return await password_pool.run(verify_and_update_password, plain_password, hashed_password)
+
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
@@ -27,4 +137,4 @@ def decode_access_token(token: str):
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
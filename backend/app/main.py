@@ -4,8 +4,9 @@ from dotenv import load_dotenv
 from pathlib import Path
 import os
 
-from app.api import auth, strategy, health
+from app.api import auth, strategy, health, payoff, portfolio, risk, dashboard, journal, bulk, chain, backtest, live
 from app.core.database import engine, Base
+from app.core.security import password_pool
 from starlette.middleware.sessions import SessionMiddleware
 
 
@@ -43,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -50,7 +52,16 @@ app.add_middleware(
 # Routers
 # --------------------
 app.include_router(auth.router)
+app.include_router(bulk.router, prefix="/api")
 app.include_router(strategy.router, prefix="/api")
+app.include_router(payoff.router, prefix="/api")
+app.include_router(portfolio.router, prefix="/api")
+app.include_router(risk.router, prefix="/api")
+app.include_router(dashboard.router, prefix="/api")
+app.include_router(journal.router, prefix="/api")
+app.include_router(chain.router, prefix="/api")
+app.include_router(backtest.router, prefix="/api")
+app.include_router(live.router, prefix="/api")
 app.include_router(health.router)
 
 
@@ -61,3 +72,9 @@ app.include_router(health.router)
 async def on_startup() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    password_pool.shutdown()
+    live.live_hub.stop()
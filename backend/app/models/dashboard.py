@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, Numeric
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class UserStrategyStats(Base):
+    """
+    Per-user dashboard aggregates, maintained incrementally by every strategy
+    write (see app.services.dashboard) so the summary is a single-row read.
+    """
+    __tablename__ = "user_strategy_stats"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    total_count = Column(Integer, nullable=False, default=0)
+    open_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    winning_count = Column(Integer, nullable=False, default=0)
+    losing_count = Column(Integer, nullable=False, default=0)
+    realized_pnl = Column(Numeric, nullable=False, default=0)
+
+    last_activity_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
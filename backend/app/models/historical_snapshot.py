@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, LargeBinary, String
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class HistoricalSnapshot(Base):
+    """Content-addressed, canonically encoded exit snapshot (see app.services.snapshot)."""
+    __tablename__ = "historical_snapshots"
+
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 hex of body
+    body = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
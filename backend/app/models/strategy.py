@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Text, Numeric, Date
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Text, Numeric, Date, Index, Float
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -29,3 +29,30 @@ class Strategy(Base):
 
     config = Column(JSON, nullable=False, default=dict)  # legs, strikes, expiry, etc
     historical_snapshot = Column(JSON)
+    # SHA-256 of the canonical snapshot content, set once at exit
+    snapshot_hash = Column(String(64), ForeignKey("historical_snapshots.content_hash"))
+
+    # Canonical metrics, recomputed server-side whenever the legs change
+    # (see app.services.metrics). Unlimited profit/loss are stored as +/-inf.
+    max_profit = Column(Float)
+    max_loss = Column(Float)
+    breakevens = Column(JSON)
+    net_premium = Column(Float)
+    margin_estimate = Column(Float)
+    entry_delta = Column(Float)
+    entry_gamma = Column(Float)
+    entry_vega = Column(Float)
+    entry_theta = Column(Float)
+
+    __table_args__ = (
+        # Keyset pagination of GET /api/strategies on (updated_at, id)
+        Index("ix_strategies_user_id_updated_at_id", "user_id", "updated_at", "id"),
+        Index("ix_strategies_user_id_status_updated_at_id", "user_id", "status", "updated_at", "id"),
+        Index("ix_strategies_user_id_strategy_type", "user_id", "strategy_type"),
+        Index("ix_strategies_user_id_expiry_date", "user_id", "expiry_date"),
+        Index("ix_strategies_user_id_entry_date", "user_id", "entry_date"),
+        Index("ix_strategies_user_id_exit_date", "user_id", "exit_date"),
+        Index("ix_strategies_user_id_max_loss_id", "user_id", "max_loss", "id"),
+        Index("ix_strategies_user_id_max_profit_id", "user_id", "max_profit", "id"),
+        Index("ix_strategies_user_id_margin_estimate_id", "user_id", "margin_estimate", "id"),
+    )
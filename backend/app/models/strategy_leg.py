@@ -0,0 +1,37 @@
+import uuid
+from sqlalchemy import Column, String, ForeignKey, JSON, Numeric, Float, Integer, Date, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+class StrategyLeg(Base):
+    """One leg of a strategy, normalized out of ``Strategy.custom_legs``."""
+    __tablename__ = "strategy_legs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    strategy_id = Column(UUID(as_uuid=True), ForeignKey("strategies.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    leg_index = Column(Integer, nullable=False)  # position within custom_legs
+
+    instrument_type = Column(String(4), nullable=False)  # "call", "put", "fut"
+    side = Column(String(4), nullable=False)  # "buy", "sell"
+    quantity = Column(Numeric, nullable=False, default=0)
+
+    strike = Column(Numeric)  # options only
+    premium = Column(Numeric)
+    exit_premium = Column(Numeric)
+    entry_price = Column(Numeric)  # futures only
+    exit_price = Column(Numeric)
+    implied_vol = Column(Float)
+
+    # Denormalized from the parent strategy so leg queries need no join
+    underlying = Column(String)
+    expiry_date = Column(Date, nullable=False)
+
+    extra = Column(JSON)  # any leg keys without a dedicated column
+
+    __table_args__ = (
+        Index("ix_strategy_legs_strategy_id_leg_index", "strategy_id", "leg_index", unique=True),
+        Index("ix_strategy_legs_user_id_expiry_date", "user_id", "expiry_date"),
+        Index("ix_strategy_legs_user_id_underlying_expiry_date", "user_id", "underlying", "expiry_date"),
+        Index("ix_strategy_legs_user_id_instrument_type_strike", "user_id", "instrument_type", "strike"),
+    )
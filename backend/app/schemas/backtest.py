@@ -0,0 +1,113 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional, Union
+from datetime import date
+
+from app.schemas.journal import EquityPoint, JournalSummary
+from app.services.sweep import SWEEP_MAX_VARIANTS
+
+
+class BacktestLegRule(BaseModel):
+    """How one leg picks its contract on each entry day."""
+    instrument_type: Literal["call", "put", "fut"]
+    position: Literal["buy", "sell"]
+    rule: Literal["atm_offset", "pct_otm", "delta"] = Field(
+        default="atm_offset",
+        description="Strikes from ATM (positive = OTM), percent OTM, or absolute delta",
+    )
+    value: float = Field(default=0.0, description="Offset in strikes, percent OTM, or delta (0 < delta < 1)")
+    ratio: float = Field(default=1.0, gt=0, description="Size relative to `quantity`")
+
+
+class BacktestSpec(BaseModel):
+    """A rule-based strategy and the window to replay it over."""
+    underlyings: List[str] = Field(..., min_length=1, max_length=50)
+    strategy_type: Optional[str] = Field(default=None, description="Template used when `legs` is empty")
+    legs: List[BacktestLegRule] = Field(default_factory=list, max_length=8)
+    start_date: date
+    end_date: date
+    entry_weekday: Optional[int] = Field(default=0, ge=0, le=6, description="0 = Monday; null enters every trading day")
+    min_days_to_expiry: int = Field(default=0, ge=0, le=400, description="Trade the nearest expiry at least this far out")
+    quantity: float = Field(default=1.0, gt=0, description="Units per leg (times the leg ratio)")
+    profit_target: Optional[float] = Field(default=None, gt=0, description="Exit at this fraction of the entry net premium in profit")
+    stop_loss: Optional[float] = Field(default=None, gt=0, description="Exit at this fraction of the entry net premium in loss")
+    exit_days_before_expiry: int = Field(default=0, ge=0, le=400)
+    risk_free_rate: Optional[float] = Field(default=None, description="Annualised rate for delta strike selection")
+
+
+class BacktestRequest(BacktestSpec):
+    """Replay a rule-based strategy over the local EOD chain store."""
+    include_trades: bool = Field(default=True, description="Return per-trade rows")
+    include_paths: bool = Field(default=False, description="Return each trade's daily mark-to-market P&L")
+
+
+class BacktestLeg(BaseModel):
+    instrument_type: str
+    position: str
+    quantity: float
+    strike: Optional[float] = None
+    entry_price: float
+    exit_price: float
+
+
+class BacktestTrade(BaseModel):
+    underlying: str
+    entry_date: date
+    expiry: date
+    exit_date: date
+    exit_reason: Literal["profit_target", "stop_loss", "time_exit", "expiry", "open"]
+    entry_spot: float
+    exit_spot: float
+    net_premium: float = Field(..., description="Option premium received at entry (negative for a debit)")
+    pnl: float
+    max_adverse: float = Field(..., description="Worst daily mark-to-market P&L while held")
+    max_favorable: float = Field(..., description="Best daily mark-to-market P&L while held")
+    legs: List[BacktestLeg]
+    daily_pnl: Optional[List[float]] = None
+
+
+class UnderlyingBreakdown(BaseModel):
+    underlying: str
+    trades: int
+    total_pnl: float
+    win_rate: float
+    expectancy: float
+    profit_factor: Optional[float] = None
+
+
+class BacktestResponse(BaseModel):
+    """Closed-trade analytics (open trades are listed but not counted)."""
+    trades: int
+    open_trades: int
+    equity_curve: List[EquityPoint]
+    summary: Optional[JournalSummary] = None
+    by_underlying: List[UnderlyingBreakdown]
+    results: List[BacktestTrade] = Field(default_factory=list)
+
+
+class SweepRequest(BacktestSpec):
+    """Backtest every combination of rule overrides on top of a base spec."""
+    grid: Dict[str, List[Any]] = Field(
+        ...,
+        description="Values per config field, or per leg rule as `legs.<index>.<rule|value|ratio>`",
+    )
+    sample: Optional[int] = Field(default=None, ge=1, le=SWEEP_MAX_VARIANTS, description="Evaluate a seeded random subset of the grid")
+    seed: int = Field(default=0, description="Seeds the sample and the bootstrap metrics")
+    sort_by: List[str] = Field(default=["sharpe"], min_length=1, description="Metrics, best first; prefix `-` for ascending")
+    top: Optional[int] = Field(default=50, ge=1, description="Rows to return after sorting; null for all")
+    max_workers: Optional[int] = Field(default=None, ge=1, le=64, description="Capped by the server's SWEEP_WORKERS")
+
+
+class SweepResult(BaseModel):
+    id: str
+    index: int = Field(..., description="Position in the full grid product")
+    params: Dict[str, Any]
+    metrics: Dict[str, Union[int, float, None]]
+
+
+class SweepResponse(BaseModel):
+    sweep_id: str
+    variants: int
+    computed: int
+    resumed: int = Field(..., description="Variants reused from an earlier run of the same sweep")
+    sort_by: List[str]
+    results: List[SweepResult]
@@ -0,0 +1,125 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+from datetime import date
+
+
+class ChainQuote(BaseModel):
+    """End-of-day quote for one contract."""
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    close: Optional[float] = None
+    settle: Optional[float] = None
+    open_interest: int
+    volume: int
+
+
+class ChainStrike(BaseModel):
+    strike: float
+    call: Optional[ChainQuote] = None
+    put: Optional[ChainQuote] = None
+
+
+class OptionChainResponse(BaseModel):
+    """One expiry's option chain on one trading day, from the local store."""
+    underlying: str
+    date: date
+    expiry: date
+    underlying_price: Optional[float] = None
+    lot_size: Optional[int] = Field(default=None, description="Market lot, when the bhavcopy carries it")
+    future: Optional[ChainQuote] = None
+    strikes: List[ChainStrike]
+
+
+class ChainExpiriesResponse(BaseModel):
+    underlying: str
+    date: date
+    expiries: List[date]
+
+
+class ScreenRequest(BaseModel):
+    """Rank every candidate of one structure on one expiry."""
+    expiry: date
+    on: Optional[date] = Field(default=None, alias="date", description="Trading day; defaults to the latest")
+    structure: Literal[
+        "iron-condor", "butterfly",
+        "bull-call-spread", "bear-call-spread", "bull-put-spread", "bear-put-spread",
+    ]
+    rank_by: Literal["reward_risk", "pop", "theta_per_margin"] = "reward_risk"
+    top: int = Field(default=20, ge=1, le=200)
+    min_credit: Optional[float] = Field(default=None, description="Net premium received per unit; negative caps a debit")
+    min_width: Optional[float] = Field(default=None, ge=0, description="Strike distance between long and short (per side)")
+    max_width: Optional[float] = Field(default=None, gt=0)
+    min_short_delta: Optional[float] = Field(default=None, ge=0, le=1, description="Absolute delta of the short legs")
+    max_short_delta: Optional[float] = Field(default=0.5, ge=0, le=1)
+    quantity: Optional[float] = Field(default=None, gt=0, description="Units per leg; defaults to the market lot")
+    risk_free_rate: Optional[float] = None
+
+
+class ScreenCandidate(BaseModel):
+    legs: List[Dict[str, Any]] = Field(..., description="Legs in the frontend's custom_legs shape")
+    net_premium: float = Field(..., description="Received at entry (negative for a debit)")
+    max_profit: float
+    max_loss: float
+    breakevens: List[float]
+    reward_risk: float
+    pop: float = Field(..., description="Probability of profit at expiry, lognormal at the ATM IV")
+    delta: float
+    theta: float = Field(..., description="Per day")
+    theta_per_margin: float = Field(..., description="Daily theta per unit of max loss")
+
+
+class ScreenResponse(BaseModel):
+    underlying: str
+    date: date
+    expiry: date
+    structure: str
+    rank_by: str
+    underlying_price: float
+    atm_volatility: float
+    days_to_expiry: int
+    quantity: float
+    candidates_scored: int
+    results: List[ScreenCandidate]
+
+
+class OptimizeRequest(BaseModel):
+    """Pick strikes and a lot count for a quick template on one expiry."""
+    expiry: date
+    on: Optional[date] = Field(default=None, alias="date", description="Trading day; defaults to the latest")
+    template: Literal["covered-call", "protective-put", "long-straddle", "iron-condor", "butterfly"]
+    objective: Literal["max_ev", "target_max_loss", "delta_neutral"] = "max_ev"
+    max_loss: Optional[float] = Field(
+        default=None, gt=0, description="Budget per position; the target for target_max_loss"
+    )
+    max_lots: int = Field(default=10, ge=1, le=500)
+    delta_tolerance: float = Field(default=1.0, gt=0, description="Net delta counted as neutral, in underlying units")
+    volatility: Optional[float] = Field(default=None, gt=0, description="Lognormal vol; defaults to the ATM IV")
+    drift: Optional[float] = Field(default=None, description="Annual drift; defaults to the risk-free rate")
+    lot_size: Optional[float] = Field(default=None, gt=0, description="Units per lot; defaults to the market lot")
+    restarts: int = Field(default=0, ge=0, le=5, description="Extra descents from a coarse grid (slower, more thorough)")
+    risk_free_rate: Optional[float] = None
+
+
+class OptimizeResponse(BaseModel):
+    underlying: str
+    date: date
+    expiry: date
+    template: str
+    objective: str
+    underlying_price: float
+    volatility: float
+    drift: float
+    days_to_expiry: int
+    lot_size: float
+    lots: int
+    legs: List[Dict[str, Any]] = Field(..., description="Legs in the frontend's custom_legs shape")
+    expected_value: float = Field(..., description="Expected expiry P&L under the lognormal")
+    probability_of_profit: float
+    net_premium: float = Field(..., description="Option premium received at entry (negative for a debit)")
+    max_profit: Optional[float] = Field(default=None, description="None when unlimited")
+    max_loss: Optional[float] = Field(default=None, description="None when unlimited")
+    breakevens: List[float]
+    delta: float
+    theta: float = Field(..., description="Per day")
+    evaluations: int = Field(..., description="Candidates scored by the search")
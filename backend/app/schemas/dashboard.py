@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class DashboardSummary(BaseModel):
+    """Totals shown on the dashboard, served from the per-user aggregate row."""
+    total_strategies: int
+    open_strategies: int = Field(..., description="Current, or active without an exit date")
+    completed_strategies: int
+    winning_trades: int
+    losing_trades: int
+    win_rate: int = Field(..., description="Winning / completed trades, as a rounded percentage")
+    realized_pnl: float = Field(..., description="Sum of actual_profit over completed strategies")
+    last_activity_at: Optional[datetime] = None
@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date
+
+
+class EquityPoint(BaseModel):
+    """Realized equity at the end of an exit day."""
+    date: date
+    equity: float
+    drawdown: float = Field(..., description="Equity minus running peak (<= 0)")
+
+
+class JournalSummary(BaseModel):
+    total_pnl: float
+    win_rate: float = Field(..., description="Fraction of trades with positive P&L")
+    average_win: float
+    average_loss: float
+    expectancy: float = Field(..., description="Mean P&L per trade")
+    profit_factor: Optional[float] = Field(None, description="Gross profit / gross loss; null without losses")
+    max_drawdown: float
+    max_drawdown_peak: Optional[date] = None
+    max_drawdown_trough: date
+    sharpe: Optional[float] = Field(None, description="Annualized mean / std of daily P&L")
+    sortino: Optional[float] = Field(None, description="Annualized mean / downside deviation of daily P&L")
+    longest_win_streak: int
+    longest_loss_streak: int
+    current_streak: int = Field(..., description="Positive for a win streak, negative for a loss streak")
+
+
+class StrategyTypeBreakdown(BaseModel):
+    strategy_type: str
+    trades: int
+    total_pnl: float
+    win_rate: float
+    expectancy: float
+    profit_factor: Optional[float] = None
+
+
+class JournalAnalyticsResponse(BaseModel):
+    """Performance analytics over the user's completed strategies."""
+    trades: int
+    equity_curve: List[EquityPoint]
+    summary: Optional[JournalSummary] = None
+    by_strategy_type: List[StrategyTypeBreakdown]
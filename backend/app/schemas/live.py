@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
+from uuid import UUID
+
+
+class LiveRequest(BaseModel):
+    """Client message on the live MTM WebSocket."""
+    action: Literal["subscribe", "unsubscribe"]
+    strategy_ids: Optional[List[UUID]] = Field(
+        default=None,
+        max_length=1000,
+        description="Omit to subscribe to every open strategy (or to drop them all)",
+    )
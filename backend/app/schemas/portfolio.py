@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+from typing import List
+from datetime import date
+
+
+class GreeksTotals(BaseModel):
+    """Net position Greeks for a set of open legs."""
+    underlying: str
+    legs: int = Field(..., description="Number of open legs")
+    delta: float = Field(..., description="Net delta (underlying units)")
+    gamma: float = Field(..., description="Net gamma")
+    vega: float = Field(..., description="P&L per 1 volatility point")
+    theta: float = Field(..., description="P&L per calendar day")
+
+
+class GreeksGroup(GreeksTotals):
+    """Greeks for one (underlying, expiry) bucket."""
+    expiry_date: date
+
+
+class PortfolioGreeksResponse(BaseModel):
+    """Response schema for portfolio Greeks."""
+    as_of: date
+    underlyings: List[GreeksTotals]
+    groups: List[GreeksGroup]
+    unpriced_legs: int = Field(default=0, description="Open legs skipped for lack of an underlying price or vol")
@@ -0,0 +1,43 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
+from uuid import UUID
+
+
+class SimulationRequest(BaseModel):
+    """Request schema for probability-of-profit / expected-value simulation."""
+    underlying_price: Optional[float] = Field(default=None, gt=0, description="Current underlying price (defaults to the stored one)")
+    volatility: Optional[float] = Field(default=None, gt=0, le=5, description="Annualised vol (defaults to the legs' stored IVs)")
+    drift: float = Field(default=0.0, description="Annualised drift of the underlying")
+    method: Literal["monte_carlo", "analytic"] = Field(default="monte_carlo")
+    paths: int = Field(default=100_000, ge=1, le=10_000_000, description="Number of simulated paths")
+    seed: Optional[int] = Field(default=None, description="RNG seed for reproducible runs")
+    antithetic: bool = Field(default=True, description="Use antithetic variates")
+
+
+class SimulationResponse(BaseModel):
+    """Distribution summary of expiry P&L."""
+    method: str
+    paths: int
+    underlying_price: float
+    volatility: float
+    days_to_expiry: int
+    probability_of_profit: float
+    expected_pnl: float
+    std_pnl: float
+    percentiles: Dict[str, float]
+
+
+class StressRequest(BaseModel):
+    """Request schema for a spot x vol x time stress grid."""
+    strategy_id: Optional[UUID] = Field(default=None, description="Stress one strategy instead of the whole open book")
+    spot_shocks: List[float] = Field(
+        default=[-0.2, -0.1, -0.05, -0.02, -0.01, 0.0, 0.01, 0.02, 0.05, 0.1, 0.2],
+        min_length=1, max_length=401,
+        description="Relative underlying moves (0.05 == +5%)",
+    )
+    vol_shifts: List[float] = Field(
+        default=[-0.05, 0.0, 0.05], min_length=1, max_length=101,
+        description="Absolute IV shifts (0.05 == +5 vol points)",
+    )
+    days_forward: List[int] = Field(default=[0, 1, 7], min_length=1, max_length=366, description="Days to roll forward")
+    risk_free_rate: Optional[float] = Field(default=None, description="Annualised risk-free rate")
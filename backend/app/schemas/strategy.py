@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Literal
 from datetime import datetime, date
 from uuid import UUID
+import math
 
 class PayoffRequest(BaseModel):
     """Request schema for payoff calculation."""
@@ -12,6 +13,7 @@ class PayoffRequest(BaseModel):
     underlying_price: Optional[float] = Field(default=18000, description="Current underlying price")
     price_range_percent: Optional[float] = Field(default=30, ge=10, le=100, description="Price range percentage (10-100)")
     custom_legs: Optional[List[Dict[str, Any]]] = Field(default=None, description="Custom strategy legs")
+    points: int = Field(default=101, ge=2, le=20000, description="Number of price grid points")
     
     @validator("price_range_percent")
     def validate_price_range(cls, v):
@@ -24,6 +26,65 @@ class PayoffDataPoint(BaseModel):
     price: float = Field(..., description="Underlying price")
     pnl: float = Field(..., description="Profit/Loss at this price")
 
+class PayoffResponse(BaseModel):
+    """Response schema for payoff calculation."""
+    curve: List[PayoffDataPoint] = Field(..., description="Payoff at expiry across the price grid")
+    max_profit: Optional[float] = Field(..., description="Maximum profit (null when unlimited)")
+    max_loss: Optional[float] = Field(..., description="Maximum loss (null when unlimited)")
+    unlimited_profit: bool = Field(default=False, description="Profit grows without bound as price rises")
+    unlimited_loss: bool = Field(default=False, description="Loss grows without bound as price rises")
+    breakevens: List[float] = Field(default=[], description="Breakeven prices")
+
+class PayoffSurfaceRequest(PayoffRequest):
+    """Request schema for the T+n payoff surface (price x evaluation date)."""
+    points: int = Field(default=200, ge=2, le=2000, description="Number of price grid points")
+    date_points: int = Field(default=60, ge=1, le=366, description="Number of evaluation dates between entry and expiry")
+    default_volatility: Optional[float] = Field(default=None, gt=0, le=5, description="Vol for legs with no stored or solvable IV")
+    risk_free_rate: Optional[float] = Field(default=None, description="Annualised risk-free rate")
+
+class PriceAxis(BaseModel):
+    """Evenly spaced price axis: ``count`` points from ``start`` to ``stop``."""
+    start: float
+    stop: float
+    count: int
+
+class EncodedSurface(BaseModel):
+    """Quantized, row-wise second-order delta-encoded, zlib-compressed P&L matrix."""
+    shape: List[int] = Field(..., description="[dates, prices]")
+    dtype: str = Field(..., description="Little-endian integer type of the encoded deltas")
+    scale: float
+    offset: float
+    encoding: str
+    data: str = Field(..., description="base64 payload; pnl = cumsum(cumsum(deltas, axis=1), axis=1) * scale + offset")
+
+class PayoffSurfaceResponse(BaseModel):
+    """Response schema for the T+n payoff surface."""
+    prices: PriceAxis
+    dates: List[date]
+    model: str
+    surface: EncodedSurface
+
+class PayoffBatchRequest(BaseModel):
+    """Request schema for valuing many strategies in one call."""
+    strategy_ids: List[UUID] = Field(default=[], max_length=1000, description="Saved strategies to value")
+    leg_sets: List[List[Dict[str, Any]]] = Field(default=[], max_length=1000, description="Ad-hoc leg sets to value")
+    underlying_prices: List[float] = Field(..., min_length=1, max_length=20000, description="Underlying prices to value at")
+
+class PayoffBatchItem(BaseModel):
+    """Expiry P&L of one strategy at each requested price."""
+    strategy_id: Optional[UUID] = Field(default=None, description="Saved strategy id, null for ad-hoc leg sets")
+    pnl: List[float] = Field(..., description="P&L at each of the requested underlying prices")
+
+class PayoffBatchResponse(BaseModel):
+    """Response schema for batch payoff evaluation."""
+    underlying_prices: List[float]
+    results: List[PayoffBatchItem]
+
+class ImpliedVolRequest(BaseModel):
+    """Request schema for solving and storing per-leg implied volatilities."""
+    underlying_price: Optional[float] = Field(default=None, gt=0, description="Underlying price at entry (defaults to the stored one)")
+    risk_free_rate: Optional[float] = Field(default=None, description="Annualised risk-free rate")
+
 class StrategyCreate(BaseModel):
     name: str
     strategy_type: str
@@ -33,6 +94,24 @@ class StrategyCreate(BaseModel):
     custom_legs: Optional[List[Dict[str, Any]]] = None
     notes: Optional[str] = None
 
+
+class StrategyImportRow(StrategyCreate):
+    """One row of a bulk import; journals may carry already-closed trades."""
+    parameters: Optional[Dict[str, Any]] = None
+    status: Literal["current", "active", "completed"] = "current"
+    exit_date: Optional[str] = None
+    actual_profit: Optional[float] = None
+
+    @validator("entry_date", "expiry_date", "exit_date")
+    def validate_date(cls, v):
+        if v is not None:
+            date.fromisoformat(v[:10])
+        return v
+
+    @validator("status", pre=True)
+    def default_status(cls, v):
+        return v or "current"
+
     
 class StrategyUpdate(BaseModel):
     """Schema for updating an existing strategy."""
@@ -55,11 +134,101 @@ class StrategyResponse(BaseModel):
     notes: Optional[str]
     created_at: datetime
     updated_at: datetime
-    
+    max_profit: Optional[float] = None
+    max_loss: Optional[float] = None
+    breakevens: Optional[List[float]] = None
+    net_premium: Optional[float] = None
+    margin_estimate: Optional[float] = None
+    entry_delta: Optional[float] = None
+    entry_gamma: Optional[float] = None
+    entry_vega: Optional[float] = None
+    entry_theta: Optional[float] = None
+
+    @validator("max_profit", "max_loss", pre=True)
+    def unlimited_as_null(cls, v):
+        # Stored as +/-inf so the columns sort; None means unlimited on the wire
+        return None if v is not None and math.isinf(v) else v
+
     class Config:
         from_attributes = True  # For SQLAlchemy model conversion
 
 
+class StrategyListItem(BaseModel):
+    """Projected strategy row returned by the list endpoint (only requested fields are set)."""
+    id: Optional[UUID] = None
+    name: Optional[str] = None
+    strategy_type: Optional[str] = None
+    status: Optional[str] = None
+    entry_date: Optional[date] = None
+    expiry_date: Optional[date] = None
+    exit_date: Optional[date] = None
+    parameters: Optional[Dict[str, Any]] = None
+    custom_legs: Optional[List[Dict[str, Any]]] = None
+    notes: Optional[str] = None
+    actual_profit: Optional[float] = None
+    config: Optional[Dict[str, Any]] = None
+    historical_snapshot: Optional[Dict[str, Any]] = None
+    snapshot_hash: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    max_profit: Optional[float] = None
+    max_loss: Optional[float] = None
+    breakevens: Optional[List[float]] = None
+    net_premium: Optional[float] = None
+    margin_estimate: Optional[float] = None
+    entry_delta: Optional[float] = None
+    entry_gamma: Optional[float] = None
+    entry_vega: Optional[float] = None
+    entry_theta: Optional[float] = None
+
+    @validator("max_profit", "max_loss", pre=True)
+    def unlimited_as_null(cls, v):
+        return None if v is not None and math.isinf(v) else v
+
+
+class SnapshotResponse(BaseModel):
+    """Stored exit snapshot with its integrity check."""
+    content_hash: str
+    verified: bool = Field(..., description="Whether the stored snapshot still matches its content hash")
+    snapshot: Dict[str, Any]
+
+
+class ImportRowError(BaseModel):
+    row: int = Field(..., description="1-based line number in the uploaded file")
+    error: str
+
+
+class BulkImportResponse(BaseModel):
+    """Outcome of a bulk import; valid rows are kept even if others fail."""
+    received: int
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False
+
+
+class StrategyBatchRequest(BaseModel):
+    """One operation applied to many owned strategies in a single transaction."""
+    operation: Literal["delete", "exit", "status"]
+    ids: List[UUID] = Field(..., min_length=1, max_length=1000)
+    status: Optional[Literal["current", "active", "completed"]] = Field(default=None, description="Target status (status operation)")
+    exit_date: Optional[date] = Field(default=None, description="Exit date (exit operation); defaults to today")
+    underlying_price: Optional[float] = Field(default=None, gt=0, description="Exit price for every strategy")
+    underlying_prices: Dict[UUID, float] = Field(default={}, description="Per-strategy exit price overrides")
+
+
+class StrategyBatchItem(BaseModel):
+    id: UUID
+    actual_profit: Optional[float] = None
+
+
+class StrategyBatchResponse(BaseModel):
+    operation: str
+    affected: int
+    skipped: List[UUID] = Field(default=[], description="Already-completed strategies left untouched by exit")
+    results: List[StrategyBatchItem] = []
+
+
 class StandardResponse(BaseModel):
     """Standard API response format."""
     success: bool = Field(..., description="Whether the operation was successful")
@@ -0,0 +1,444 @@
+"""
+Rule-based option strategy backtests over the local EOD chain store.
+
+A run opens one position per scheduled entry day and underlying, picks each
+leg's strike by rule (ATM offset in listed strikes, % out of the money, or
+target delta from the ATM implied volatility), marks every position daily at
+settlement prices and records the exit: profit target, stop loss, a fixed
+number of days before expiry, or expiry itself (options at intrinsic value
+against the spot).
+
+Nothing loops per day or per trade. All entries of an underlying are
+resolved with vectorized store lookups, the daily marks of every trade are
+laid out as one flat ragged array (trade x trading day), and the exit rules
+are evaluated with segment reductions over it.
+"""
+import os
+from collections import namedtuple
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.chain import ChainStore, day_number, from_day_number
+from app.services.journal import journal_analytics
+from app.services.payoff import CALL, FUT, PUT
+from app.services.pricing import BLACK_SCHOLES, DAYS_PER_YEAR, DEFAULT_RISK_FREE_RATE, implied_volatility
+from app.services.pricing._normal import norm_ppf
+
+ATM_OFFSET = "atm_offset"
+PCT_OTM = "pct_otm"
+DELTA = "delta"
+STRIKE_RULES = (ATM_OFFSET, PCT_OTM, DELTA)
+
+PROFIT_TARGET = "profit_target"
+STOP_LOSS = "stop_loss"
+TIME_EXIT = "time_exit"
+EXPIRY = "expiry"
+OPEN = "open"
+
+# Longest start_date..end_date window one request may cover
+BACKTEST_MAX_DAYS = int(os.getenv("BACKTEST_MAX_DAYS", "3660"))
+
+_KIND_CODES = {"call": CALL, "put": PUT, "fut": FUT}
+# 1970-01-01 was a Thursday
+_EPOCH_WEEKDAY = 3
+
+
+@dataclass(frozen=True)
+class LegRule:
+    """
+    One leg of a backtested strategy. ``value`` is the number of listed
+    strikes away from ATM (positive is out of the money), the percentage
+    out of the money, or the absolute delta (0.16) depending on ``rule``.
+    Futures ignore the rule.
+    """
+
+    instrument_type: str  # call / put / fut
+    position: str         # buy / sell
+    rule: str = ATM_OFFSET
+    value: float = 0.0
+    ratio: float = 1.0
+
+
+# Rule-based counterparts of the frontend quick templates
+TEMPLATES: Dict[str, Tuple[LegRule, ...]] = {
+    "covered-call": (
+        LegRule("fut", "buy"),
+        LegRule("call", "sell", PCT_OTM, 5.0),
+    ),
+    "protective-put": (
+        LegRule("fut", "buy"),
+        LegRule("put", "buy", PCT_OTM, 5.0),
+    ),
+    "long-straddle": (
+        LegRule("call", "buy"),
+        LegRule("put", "buy"),
+    ),
+    "short-strangle": (
+        LegRule("call", "sell", DELTA, 0.16),
+        LegRule("put", "sell", DELTA, 0.16),
+    ),
+    "iron-condor": (
+        LegRule("put", "buy", DELTA, 0.05),
+        LegRule("put", "sell", DELTA, 0.16),
+        LegRule("call", "sell", DELTA, 0.16),
+        LegRule("call", "buy", DELTA, 0.05),
+    ),
+    "butterfly": (
+        LegRule("call", "buy", PCT_OTM, -3.0),
+        LegRule("call", "sell", ratio=2.0),
+        LegRule("call", "buy", PCT_OTM, 3.0),
+    ),
+    "bull-call-spread": (
+        LegRule("call", "buy"),
+        LegRule("call", "sell", PCT_OTM, 3.0),
+    ),
+    "bear-put-spread": (
+        LegRule("put", "buy"),
+        LegRule("put", "sell", PCT_OTM, 3.0),
+    ),
+}
+
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    """
+    ``profit_target`` and ``stop_loss`` are fractions of the absolute net
+    option premium at entry (0.5 closes a credit spread at half its credit).
+    ``entry_weekday`` is 0 for Monday; None enters on every trading day.
+    """
+
+    underlyings: Tuple[str, ...]
+    legs: Tuple[LegRule, ...]
+    start: date
+    end: date
+    entry_weekday: Optional[int] = 0
+    min_days_to_expiry: int = 0
+    quantity: float = 1.0
+    profit_target: Optional[float] = None
+    stop_loss: Optional[float] = None
+    exit_days_before_expiry: int = 0
+    risk_free_rate: float = DEFAULT_RISK_FREE_RATE
+
+
+@dataclass
+class BacktestTrades:
+    """Flat per-trade (and per trade x leg) results of one underlying."""
+
+    underlying: str
+    entry_day: np.ndarray
+    expiry: np.ndarray
+    exit_day: np.ndarray
+    exit_reason: np.ndarray   # object array of reason names
+    entry_spot: np.ndarray
+    exit_spot: np.ndarray
+    net_premium: np.ndarray   # credit positive, options only
+    pnl: np.ndarray
+    max_adverse: np.ndarray   # worst daily mark-to-market P&L while open
+    max_favorable: np.ndarray
+    strikes: np.ndarray       # (n_trades, n_legs)
+    entry_prices: np.ndarray  # (n_trades, n_legs)
+    exit_prices: np.ndarray   # (n_trades, n_legs)
+    paths: List[np.ndarray] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return self.entry_day.shape[0]
+
+
+def resolve_legs(strategy_type: Optional[str], legs: Optional[Sequence[LegRule]]) -> Tuple[LegRule, ...]:
+    """Explicit leg rules win; otherwise the named template."""
+    if legs:
+        return tuple(legs)
+    if strategy_type in TEMPLATES:
+        return TEMPLATES[strategy_type]
+    raise ValueError(f"Unknown strategy template: {strategy_type}")
+
+
+def validate_config(config: BacktestConfig) -> BacktestConfig:
+    """Reject rule combinations the engine cannot evaluate."""
+    if config.end < config.start:
+        raise ValueError("end_date must not be before start_date")
+    if (config.end - config.start).days > BACKTEST_MAX_DAYS:
+        raise ValueError(f"Backtest window is limited to {BACKTEST_MAX_DAYS} days")
+    for leg in config.legs:
+        if leg.instrument_type not in _KIND_CODES or leg.position not in ("buy", "sell"):
+            raise ValueError(f"Invalid leg: {leg.instrument_type} {leg.position}")
+        if leg.rule not in STRIKE_RULES:
+            raise ValueError(f"Unknown strike rule: {leg.rule}")
+        if leg.rule == DELTA and leg.instrument_type != "fut" and not 0 < leg.value < 1:
+            raise ValueError("delta rules need 0 < value < 1")
+    return config
+
+
+def build_config(spec) -> BacktestConfig:
+    """:class:`BacktestConfig` from a request-shaped spec (see ``BacktestSpec``)."""
+    legs = resolve_legs(spec.strategy_type, [LegRule(**leg.model_dump()) for leg in spec.legs])
+    return validate_config(BacktestConfig(
+        underlyings=tuple(dict.fromkeys(u.upper() for u in spec.underlyings)),
+        legs=legs,
+        start=spec.start_date,
+        end=spec.end_date,
+        entry_weekday=spec.entry_weekday,
+        min_days_to_expiry=spec.min_days_to_expiry,
+        quantity=spec.quantity,
+        profit_target=spec.profit_target,
+        stop_loss=spec.stop_loss,
+        exit_days_before_expiry=spec.exit_days_before_expiry,
+        risk_free_rate=DEFAULT_RISK_FREE_RATE if spec.risk_free_rate is None else spec.risk_free_rate,
+    ))
+
+
+def entry_days(days: np.ndarray, start: int, end: int, weekday: Optional[int]) -> np.ndarray:
+    """
+    Indices into ``days`` of the entry sessions: every trading day, or the
+    first trading day on/after each scheduled weekday (holidays roll forward).
+    """
+    in_window = (days >= start) & (days <= end)
+    if weekday is None:
+        return np.flatnonzero(in_window)
+    first = start + (weekday - (start + _EPOCH_WEEKDAY)) % 7
+    scheduled = np.arange(first, end + 1, 7)
+    at = np.searchsorted(days, scheduled)
+    # A session belongs to a schedule date only if it comes before the next one
+    ok = (at < days.shape[0]) & (days[np.minimum(at, days.shape[0] - 1)] < scheduled + 7)
+    at = np.unique(at[ok])
+    return at[days[at] <= end]
+
+
+def _expiry_for(store: ChainStore, code: int, entry: np.ndarray, min_days: int) -> np.ndarray:
+    """Nearest listed expiry at least ``min_days`` after each entry day (0 if none)."""
+    lo = int(store.group_bounds(code, 0, 0, 0)[0])
+    hi = int(store.group_bounds(code + 1, 0, 0, 0)[0])
+    trade_date = np.asarray(store.columns["trade_date"][lo:hi]).astype(np.int64)
+    expiry = np.asarray(store.columns["expiry"][lo:hi]).astype(np.int64)
+    pairs = np.unique((trade_date << 16) | expiry)
+    if pairs.size == 0:
+        return np.zeros(entry.shape[0], dtype=np.int64)
+    query = (entry << 16) | (entry + min_days)
+    at = np.minimum(np.searchsorted(pairs, query), pairs.size - 1)
+    found = ((pairs[at] >> 16) == entry) & ((pairs[at] & 0xFFFF) >= entry + min_days)
+    return np.where(found, pairs[at] & 0xFFFF, 0)
+
+
+def _atm_vol(store, code, entry, expiry, spot, t, r) -> np.ndarray:
+    """Implied volatility at the ATM strike, averaging the call and put."""
+    vols = []
+    for kind in (CALL, PUT):
+        rows, _, _ = store.nearest_strike_rows(code, entry, expiry, kind, spot)
+        price = store.row_prices(rows)
+        strike = np.where(rows >= 0, store.columns["strike"][np.maximum(rows, 0)], np.nan)
+        vols.append(implied_volatility(
+            np.nan_to_num(price), spot, np.nan_to_num(strike, nan=1.0), t, r, kind == CALL, BLACK_SCHOLES,
+        ))
+    vols = np.stack(vols)
+    vols = np.where(np.isfinite(vols) & (vols > 1e-3), vols, np.nan)
+    with np.errstate(invalid="ignore"):
+        counts = np.isfinite(vols).sum(axis=0)
+        return np.where(counts > 0, np.nansum(vols, axis=0) / np.maximum(counts, 1), np.nan)
+
+
+def select_strikes(store, code, entry, expiry, spot, legs: Sequence[LegRule], r) -> np.ndarray:
+    """Entry row per (trade, leg), -1 where the rule finds no listed contract."""
+    n = entry.shape[0]
+    t = np.maximum(expiry - entry, 0) / DAYS_PER_YEAR
+    sigma = None
+    rows = np.full((n, len(legs)), -1, dtype=np.int64)
+
+    for j, leg in enumerate(legs):
+        kind = _KIND_CODES[leg.instrument_type]
+        if kind == FUT:
+            rows[:, j] = store.find_rows(code, entry, expiry, FUT, 0.0)
+            continue
+        otm = 1.0 if kind == CALL else -1.0
+        if leg.rule == ATM_OFFSET:
+            atm, lo, hi = store.nearest_strike_rows(code, entry, expiry, kind, spot)
+            stepped = np.clip(atm + int(round(otm * leg.value)), lo, np.maximum(hi - 1, lo))
+            rows[:, j] = np.where(atm >= 0, stepped, -1)
+            continue
+        if leg.rule == PCT_OTM:
+            target = spot * (1.0 + otm * leg.value / 100.0)
+        elif leg.rule == DELTA:
+            if sigma is None:
+                sigma = _atm_vol(store, code, entry, expiry, spot, t, r)
+            # Black-Scholes delta: N(d1) for calls, -N(-d1) for puts
+            d1 = otm * norm_ppf(np.full(n, leg.value))
+            vol_sqrt_t = sigma * np.sqrt(t)
+            target = spot * np.exp(r * t + 0.5 * vol_sqrt_t ** 2 - d1 * vol_sqrt_t)
+        else:
+            raise ValueError(f"Unknown strike rule: {leg.rule}")
+        rows[:, j] = store.nearest_strike_rows(code, entry, expiry, kind, target)[0]
+    return rows
+
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carry the last finite value forward along axis 0 (first row must be finite)."""
+    index = np.where(np.isfinite(values), np.arange(values.shape[0])[:, None], 0)
+    return np.take_along_axis(values, np.maximum.accumulate(index, axis=0), axis=0)
+
+
+def _no_trades(underlying: str, n_legs: int) -> BacktestTrades:
+    ints, floats = np.empty(0, dtype=np.int64), np.empty(0)
+    grid = np.empty((0, n_legs))
+    return BacktestTrades(
+        underlying.upper(), ints, ints, ints, np.empty(0, dtype=object),
+        floats, floats, floats, floats, floats, floats, grid, grid, grid,
+    )
+
+
+def backtest_underlying(store: ChainStore, underlying: str, config: BacktestConfig, include_paths: bool = False) -> BacktestTrades:
+    """Every scheduled trade of one underlying, entered, marked and exited in bulk."""
+    legs = config.legs
+    n_legs = len(legs)
+    code = store.code(underlying)
+    days, spot = store.spot_series(underlying)
+    days = days.astype(np.int64)
+    picks = entry_days(days, day_number(config.start), day_number(config.end), config.entry_weekday)
+    if code is None or picks.size == 0:
+        return _no_trades(underlying, n_legs)
+
+    entry = days[picks]
+    expiry = _expiry_for(store, code, entry, config.min_days_to_expiry)
+    cutoff = expiry - config.exit_days_before_expiry
+    rows = select_strikes(store, code, entry, expiry, spot[picks], legs, config.risk_free_rate)
+    entry_price = store.row_prices(rows.ravel()).reshape(rows.shape)
+
+    valid = (
+        (expiry > 0)
+        & (cutoff > entry)
+        & np.isfinite(spot[picks])
+        & np.all(np.isfinite(entry_price) & (entry_price > 0), axis=1)
+    )
+    if not valid.any():
+        return _no_trades(underlying, n_legs)
+    picks, entry, expiry, cutoff = picks[valid], entry[valid], expiry[valid], cutoff[valid]
+    rows, entry_price = rows[valid], entry_price[valid]
+
+    kinds = np.array([_KIND_CODES[leg.instrument_type] for leg in legs], dtype=np.int8)
+    weight = np.array([(-1.0 if leg.position == "sell" else 1.0) * leg.ratio for leg in legs]) * config.quantity
+    strikes = np.where(kinds == FUT, 0.0, store.columns["strike"][rows])
+
+    # Last session each trade may be held: the exit cut-off, or the end of data
+    last = np.searchsorted(days, cutoff, side="right") - 1
+    still_open = (last == days.shape[0] - 1) & (days[last] < cutoff)
+
+    # Ragged trade x session layout
+    counts = last - picks + 1
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    total = int(counts.sum())
+    trade = np.repeat(np.arange(picks.shape[0]), counts)
+    position = np.arange(total)
+    session = picks[trade] + (position - offsets[trade])
+    day = days[session]
+
+    marks = np.empty((total, n_legs))
+    for j in range(n_legs):
+        marks[:, j] = store.row_prices(store.find_rows(code, day, expiry[trade], kinds[j], strikes[trade, j]))
+    marks = _forward_fill(marks)
+
+    # Expiry session: options at intrinsic, futures at the spot
+    expiring = (day >= expiry[trade]) & np.isfinite(spot[session])
+    if expiring.any():
+        s = spot[session[expiring], None]
+        k = strikes[trade[expiring]]
+        marks[expiring] = np.where(
+            kinds == CALL, np.maximum(s - k, 0.0), np.where(kinds == PUT, np.maximum(k - s, 0.0), s)
+        )
+
+    pnl = (marks - entry_price[trade]) @ weight
+    is_option = kinds != FUT
+    net_premium = -(entry_price[:, is_option] @ weight[is_option])
+    basis = np.abs(net_premium)[trade]
+
+    # First session after entry where a rule fires
+    held = (position > offsets[trade]) & (basis > 0)
+    hit_target = held & (pnl >= config.profit_target * basis) if config.profit_target is not None else np.zeros(total, dtype=bool)
+    hit_stop = held & (pnl <= -config.stop_loss * basis) if config.stop_loss is not None else np.zeros(total, dtype=bool)
+    first = np.minimum.reduceat(np.where(hit_target | hit_stop, position, total), offsets)
+    fired = first < total
+    exit_row = np.where(fired, first, offsets + counts - 1)
+
+    reason = np.where(day[exit_row] >= expiry, EXPIRY, TIME_EXIT).astype(object)
+    reason[still_open] = OPEN
+    reason[fired & hit_stop[exit_row]] = STOP_LOSS
+    reason[fired & hit_target[exit_row]] = PROFIT_TARGET
+
+    # Excursions only over the sessions actually held
+    in_trade = position <= exit_row[trade]
+    return BacktestTrades(
+        underlying=underlying.upper(),
+        entry_day=entry,
+        expiry=expiry,
+        exit_day=day[exit_row],
+        exit_reason=reason,
+        entry_spot=spot[picks],
+        exit_spot=spot[session[exit_row]],
+        net_premium=net_premium + 0.0,
+        pnl=pnl[exit_row],
+        max_adverse=np.minimum.reduceat(np.where(in_trade, pnl, np.inf), offsets),
+        max_favorable=np.maximum.reduceat(np.where(in_trade, pnl, -np.inf), offsets),
+        strikes=strikes,
+        entry_prices=entry_price,
+        exit_prices=marks[exit_row],
+        paths=[path[: n + 1] for path, n in zip(np.split(pnl, offsets[1:]), exit_row - offsets)] if include_paths else [],
+    )
+
+
+def run_backtest(store: ChainStore, config: BacktestConfig, include_paths: bool = False) -> List[BacktestTrades]:
+    """One vectorized pass per underlying."""
+    return [backtest_underlying(store, u, config, include_paths) for u in config.underlyings]
+
+
+_JournalRow = namedtuple("_JournalRow", "exit_date updated_at actual_profit historical_snapshot strategy_type")
+
+
+def summarize_backtest(results: Sequence[BacktestTrades]) -> Dict[str, Any]:
+    """Journal-style analytics over the closed trades, broken down by underlying."""
+    rows = [
+        _JournalRow(from_day_number(exit_day), None, pnl, None, result.underlying)
+        for result in results
+        for exit_day, pnl, reason in zip(result.exit_day.tolist(), result.pnl.tolist(), result.exit_reason.tolist())
+        if reason != OPEN
+    ]
+    analytics = journal_analytics(rows)
+    analytics["by_underlying"] = [
+        {"underlying": row.pop("strategy_type"), **row} for row in analytics.pop("by_strategy_type")
+    ]
+    return analytics
+
+
+def trade_records(results: Sequence[BacktestTrades], legs: Sequence[LegRule], quantity: float) -> List[Dict[str, Any]]:
+    """Per-trade output rows, legs in entry order."""
+    records = []
+    for result in results:
+        paths = [path.tolist() for path in result.paths] if result.paths else None
+        for i in range(len(result)):
+            records.append({
+                "underlying": result.underlying,
+                "entry_date": from_day_number(int(result.entry_day[i])),
+                "expiry": from_day_number(int(result.expiry[i])),
+                "exit_date": from_day_number(int(result.exit_day[i])),
+                "exit_reason": result.exit_reason[i],
+                "entry_spot": float(result.entry_spot[i]),
+                "exit_spot": float(result.exit_spot[i]),
+                "net_premium": float(result.net_premium[i]),
+                "pnl": float(result.pnl[i]),
+                "max_adverse": float(result.max_adverse[i]),
+                "max_favorable": float(result.max_favorable[i]),
+                "legs": [
+                    {
+                        "instrument_type": leg.instrument_type,
+                        "position": leg.position,
+                        "quantity": leg.ratio * quantity,
+                        "strike": None if leg.instrument_type == "fut" else float(strike),
+                        "entry_price": float(entry_price),
+                        "exit_price": float(exit_price),
+                    }
+                    for leg, strike, entry_price, exit_price in zip(
+                        legs, result.strikes[i], result.entry_prices[i], result.exit_prices[i]
+                    )
+                ],
+                "daily_pnl": paths[i] if paths else None,
+            })
+    return records
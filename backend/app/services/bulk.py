@@ -0,0 +1,414 @@
+"""
+Streaming bulk import and export of strategies.
+
+Imports read the request body incrementally (CSV or NDJSON), validate rows in
+chunks of ``IMPORT_CHUNK_SIZE`` (prepared in a worker thread, with vols and
+metrics solved for the whole chunk at once) and write each chunk with one
+multi-row INSERT per table and one dashboard-aggregate upsert, committed
+together.
+Rows that fail validation are reported by their source line and skipped.
+
+Exports stream rows off a server-side cursor in ``EXPORT_BATCH_SIZE``
+partitions, encoding each partition as it arrives, so memory stays flat no
+matter how long the history is. Parquet output needs the optional
+``pyarrow`` package.
+"""
+import codecs
+import csv
+import importlib.util
+import io
+import json
+import os
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from starlette.concurrency import run_in_threadpool
+
+from app.models.strategy import Strategy
+from app.models.strategy_leg import StrategyLeg
+from app.schemas.strategy import StrategyImportRow
+from app.services.dashboard import apply_stats_delta, contribution, sum_contributions
+from app.services.metrics import new_strategy_values_batch
+from app.services.payoff import LegArrays
+from app.services.snapshot import build_snapshot, seal_snapshot, store_snapshot_body
+from app.services.strategy_legs import leg_row_values
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_FORMATS = ("csv", "ndjson")
+EXPORT_FORMATS = ("csv", "ndjson", "parquet")
+
+EXPORT_COLUMNS = (
+    "id", "name", "strategy_type", "status", "entry_date", "expiry_date", "exit_date",
+    "actual_profit", "notes", "parameters", "custom_legs", "snapshot_hash",
+    "created_at", "updated_at",
+)
+JSON_COLUMNS = ("parameters", "custom_legs")
+
+
+# --------------------
+# Import
+# --------------------
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yield ``(line_number, record)`` pairs; ``record`` is a dict, or the
+    error message for a line that could not be parsed.
+    """
+    line_no = 0
+    if fmt == "ndjson":
+        async for line in iter_lines(chunks):
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield line_no, f"Invalid JSON: {exc}"
+                continue
+            yield line_no, record if isinstance(record, dict) else "Expected a JSON object"
+        return
+
+    # CSV: a record may span lines inside quotes, so gather lines until the
+    # quote count is even (escaped quotes are doubled and keep parity).
+    header = None
+    buffered, start = [], 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if not buffered:
+            start = line_no
+        buffered.append(line)
+        if sum(part.count('"') for part in buffered) % 2:
+            continue
+        text, buffered = "\n".join(buffered), []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield start, _csv_record(dict(zip(header, values)))
+    if buffered:
+        yield start, "Unterminated quoted field"
+
+
+def _csv_record(raw: Dict[str, str]) -> Any:
+    record = {key: (value if value != "" else None) for key, value in raw.items()}
+    for key in JSON_COLUMNS:
+        if record.get(key) is not None:
+            try:
+                record[key] = json.loads(record[key])
+            except ValueError:
+                return f"{key}: invalid JSON"
+    return record
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def _parse_import_row(record: Dict[str, Any]) -> StrategyImportRow:
+    try:
+        return StrategyImportRow.model_validate(record)
+    except ValidationError as exc:
+        raise ValueError(_validation_message(exc))
+
+
+def prepare_import_chunk(user_id, records: List[Tuple[int, Dict[str, Any]]]):
+    """
+    Validate a chunk of ``(line_number, record)`` pairs and derive their rows.
+
+    Implied vols and metrics for the whole chunk are solved in one stacked
+    pass (:func:`new_strategy_values_batch`). CPU-bound, so callers run it
+    off the event loop. Returns ``(prepared, line_numbers, errors)``:
+    ``prepared`` holds ``(values, legs, snapshot)`` per valid row, where
+    ``snapshot`` is ``(digest, body)`` for fully exited completed trades, and
+    ``errors`` holds ``(line_number, message)`` for rows that failed.
+    """
+    rows, line_numbers, errors = [], [], []
+    for line_no, record in records:
+        try:
+            row = _parse_import_row(record)
+            dates = [date.fromisoformat(value[:10]) if value else None
+                     for value in (row.entry_date, row.expiry_date, row.exit_date)]
+        except ValueError as exc:
+            errors.append((line_no, str(exc)))
+            continue
+        rows.append((row, *dates))
+        line_numbers.append(line_no)
+
+    batch = new_strategy_values_batch(user_id, [
+        {
+            "name": row.name,
+            "strategy_type": row.strategy_type,
+            "entry_date": entry_date,
+            "expiry_date": expiry_date,
+            "parameters": row.parameters,
+            "custom_legs": row.custom_legs,
+            "notes": row.notes,
+        }
+        for row, entry_date, expiry_date, _ in rows
+    ])
+
+    prepared = []
+    for (row, entry_date, expiry_date, exit_date), values in zip(rows, batch):
+        values.update(
+            id=uuid.uuid4(),
+            status=row.status,
+            exit_date=exit_date,
+            actual_profit=Decimal(str(row.actual_profit)) if row.actual_profit is not None else None,
+            historical_snapshot=None,
+            snapshot_hash=None,
+        )
+
+        snapshot = None
+        legs = LegArrays.from_legs(values["custom_legs"])
+        if row.status == "completed" and len(legs) and not legs.is_open.any():
+            content = build_snapshot(values["custom_legs"], entry_date, exit_date, None, row.notes)
+            body, digest, sealed = seal_snapshot(content)
+            values.update(
+                historical_snapshot=sealed,
+                snapshot_hash=digest,
+                actual_profit=Decimal(str(content["realizedPnL"])),
+            )
+            snapshot = (digest, body)
+
+        leg_rows = [
+            {"id": uuid.uuid4(), **leg}
+            for leg in leg_row_values(values["id"], user_id, expiry_date, values["parameters"], values["custom_legs"])
+        ]
+        prepared.append((values, leg_rows, snapshot))
+    return prepared, line_numbers, errors
+
+
+async def write_import_chunk(db, user_id, prepared: List[tuple]) -> None:
+    """Insert one validated chunk and its aggregates in a single transaction."""
+    strategies = [values for values, _, _ in prepared]
+    legs = [leg for _, leg_rows, _ in prepared for leg in leg_rows]
+    snapshots = dict(snapshot for _, _, snapshot in prepared if snapshot)
+
+    for digest, body in snapshots.items():
+        await store_snapshot_body(db, digest, body)
+    await db.execute(insert(Strategy), strategies)
+    if legs:
+        await db.execute(insert(StrategyLeg), legs)
+    await apply_stats_delta(
+        db,
+        user_id,
+        after=sum_contributions(
+            contribution(row["status"], row["exit_date"], row["actual_profit"]) for row in strategies
+        ),
+    )
+    await db.commit()
+
+
+class ImportReport:
+    """Running totals and (capped) per-row errors for one import."""
+
+    def __init__(self):
+        self.received = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+async def import_strategies(db, user_id, chunks: AsyncIterator[bytes], fmt: str) -> ImportReport:
+    report = ImportReport()
+    pending = []
+
+    async def flush():
+        prepared, line_numbers, errors = await run_in_threadpool(prepare_import_chunk, user_id, list(pending))
+        pending.clear()
+        for line_no, message in errors:
+            report.error(line_no, message)
+        if not prepared:
+            return
+        try:
+            await write_import_chunk(db, user_id, prepared)
+            report.imported += len(prepared)
+        except DBAPIError as exc:
+            await db.rollback()
+            message = f"Database error: {exc.orig}"
+            for line_no in line_numbers:
+                report.error(line_no, message)
+
+    async for line_no, record in iter_records(chunks, fmt):
+        report.received += 1
+        if isinstance(record, str):
+            report.error(line_no, record)
+            continue
+        pending.append((line_no, record))
+        if len(pending) >= IMPORT_CHUNK_SIZE:
+            await flush()
+
+    if pending:
+        await flush()
+    return report
+
+
+# --------------------
+# Export
+# --------------------
+def _jsonable(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def encode_ndjson(rows) -> bytes:
+    return "".join(
+        json.dumps({name: _jsonable(row[name]) for name in EXPORT_COLUMNS}) + "\n"
+        for row in rows
+    ).encode()
+
+
+def encode_csv(rows, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([
+            json.dumps(row[name]) if name in JSON_COLUMNS else _csv_cell(row[name])
+            for name in EXPORT_COLUMNS
+        ])
+    return buffer.getvalue().encode()
+
+
+def _csv_cell(value):
+    value = _jsonable(value)
+    return "" if value is None else value
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def parquet_available() -> bool:
+    """Whether the optional ``pyarrow`` dependency is installed."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+class ParquetEncoder:
+    """Writes one row group per partition; ``finish`` returns the footer."""
+
+    def __init__(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires the pyarrow package")
+        self._pa = pa
+        self._sink = _ChunkSink()
+        self._schema = pa.schema([
+            ("id", pa.string()),
+            ("name", pa.string()),
+            ("strategy_type", pa.string()),
+            ("status", pa.string()),
+            ("entry_date", pa.date32()),
+            ("expiry_date", pa.date32()),
+            ("exit_date", pa.date32()),
+            ("actual_profit", pa.float64()),
+            ("notes", pa.string()),
+            ("parameters", pa.string()),   # JSON text
+            ("custom_legs", pa.string()),  # JSON text
+            ("snapshot_hash", pa.string()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+            ("updated_at", pa.timestamp("us", tz="UTC")),
+        ])
+        self._writer = pq.ParquetWriter(self._sink, self._schema)
+
+    def encode(self, rows) -> bytes:
+        columns = {name: [row[name] for row in rows] for name in EXPORT_COLUMNS}
+        columns["id"] = [str(value) for value in columns["id"]]
+        columns["actual_profit"] = [None if v is None else float(v) for v in columns["actual_profit"]]
+        for name in JSON_COLUMNS:
+            columns[name] = [None if v is None else json.dumps(v) for v in columns[name]]
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+async def export_rows(partitions, fmt: str) -> AsyncIterator[bytes]:
+    """Encode an async iterator of row partitions into ``fmt`` chunks."""
+    if fmt == "parquet":
+        encoder = ParquetEncoder()
+        async for rows in partitions:
+            yield encoder.encode([row._mapping for row in rows])
+        yield encoder.finish()
+        return
+
+    first = True
+    async for rows in partitions:
+        mapped = [row._mapping for row in rows]
+        yield encode_csv(mapped, header=first) if fmt == "csv" else encode_ndjson(mapped)
+        first = False
+    if first and fmt == "csv":
+        yield encode_csv([], header=True)
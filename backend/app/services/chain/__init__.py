@@ -0,0 +1,21 @@
+"""Local end-of-day option chain data: bhavcopy ingest and memory-mapped store."""
+from app.services.chain.bhavcopy import EPOCH, day_number, from_day_number, parse_bhavcopy
+from app.services.chain.store import (
+    DEFAULT_STORE_DIR,
+    ChainSlice,
+    ChainStore,
+    ingest_bhavcopies,
+    open_store,
+)
+
+__all__ = [
+    "EPOCH",
+    "day_number",
+    "from_day_number",
+    "parse_bhavcopy",
+    "DEFAULT_STORE_DIR",
+    "ChainSlice",
+    "ChainStore",
+    "ingest_bhavcopies",
+    "open_store",
+]
@@ -0,0 +1,157 @@
+"""
+Parsing of NSE F&O end-of-day bhavcopy CSVs.
+
+Both layouts NSE has published are recognised from the header:
+
+* legacy ``fo<DD><MON><YYYY>bhav.csv`` (INSTRUMENT, SYMBOL, EXPIRY_DT,
+  STRIKE_PR, OPTION_TYP, ..., SETTLE_PR, CONTRACTS, OPEN_INT, TIMESTAMP)
+* UDiFF ``BhavCopy_NSE_FO_0_0_0_<YYYYMMDD>_F_0000.csv`` (TradDt, FinInstrmTp,
+  TckrSymb, XpryDt, StrkPric, OptnTp, ..., UndrlygPric, SttlmPric, NewBrdLotQty)
+
+Rows are returned column-wise as NumPy arrays ready for :mod:`chain.store`.
+Only index/stock options and futures are kept.
+"""
+import csv
+import io
+import zipfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Union
+
+import numpy as np
+
+from app.services.payoff import CALL, FUT, PUT
+
+EPOCH = date(1970, 1, 1)
+
+_LEGACY_INSTRUMENTS = {"OPTIDX", "OPTSTK", "FUTIDX", "FUTSTK"}
+_UDIFF_INSTRUMENTS = {"IDO", "STO", "IDF", "STF"}
+_OPTION_KINDS = {"CE": CALL, "PE": PUT}
+
+
+def day_number(value: Union[str, date]) -> int:
+    """Days since 1970-01-01 for ISO (``2024-06-27``) or NSE (``27-Jun-2024``) dates."""
+    if isinstance(value, date):
+        return (value - EPOCH).days
+    value = value.strip()
+    for fmt in ("%Y-%m-%d", "%d-%b-%Y", "%d-%B-%Y"):
+        try:
+            return (datetime.strptime(value, fmt).date() - EPOCH).days
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date: {value!r}")
+
+
+def from_day_number(days: int) -> date:
+    return EPOCH + timedelta(days=int(days))
+
+
+def _number(value: str, default: float = np.nan) -> float:
+    try:
+        return float(value) if value not in (None, "", "-") else default
+    except ValueError:
+        return default
+
+
+def _read_text(path: Path) -> str:
+    if path.suffix.lower() == ".zip":
+        with zipfile.ZipFile(path) as archive:
+            name = next(n for n in archive.namelist() if n.lower().endswith(".csv"))
+            return archive.read(name).decode("utf-8-sig")
+    return path.read_text(encoding="utf-8-sig")
+
+
+def parse_bhavcopy(source: Union[str, Path]) -> Dict[str, np.ndarray]:
+    """Parse one bhavcopy file (``.csv`` or zipped) into column arrays."""
+    reader = csv.DictReader(io.StringIO(_read_text(Path(source))))
+    fields = {name.strip() for name in reader.fieldnames or []}
+    if "TckrSymb" in fields:
+        rows = _udiff_rows(reader)
+    elif "SYMBOL" in fields:
+        rows = _legacy_rows(reader)
+    else:
+        raise ValueError(f"{source}: not an NSE F&O bhavcopy")
+
+    columns = {
+        "symbol": [], "trade_date": [], "expiry": [], "strike": [], "kind": [],
+        "open": [], "high": [], "low": [], "close": [], "settle": [],
+        "open_interest": [], "volume": [], "underlying_price": [], "lot_size": [],
+    }
+    for row in rows:
+        for name, value in row.items():
+            columns[name].append(value)
+
+    return {
+        "symbol": np.array(columns["symbol"], dtype=object),
+        "trade_date": np.array(columns["trade_date"], dtype=np.int32),
+        "expiry": np.array(columns["expiry"], dtype=np.int32),
+        "strike": np.array(columns["strike"], dtype=np.float64),
+        "kind": np.array(columns["kind"], dtype=np.int8),
+        "open": np.array(columns["open"], dtype=np.float64),
+        "high": np.array(columns["high"], dtype=np.float64),
+        "low": np.array(columns["low"], dtype=np.float64),
+        "close": np.array(columns["close"], dtype=np.float64),
+        "settle": np.array(columns["settle"], dtype=np.float64),
+        "open_interest": np.array(columns["open_interest"], dtype=np.int64),
+        "volume": np.array(columns["volume"], dtype=np.int64),
+        "underlying_price": np.array(columns["underlying_price"], dtype=np.float64),
+        "lot_size": np.array(columns["lot_size"], dtype=np.int32),
+    }
+
+
+def _legacy_rows(reader):
+    for raw in reader:
+        row = {key.strip(): (value or "").strip() for key, value in raw.items() if key}
+        instrument = row.get("INSTRUMENT", "")
+        if instrument not in _LEGACY_INSTRUMENTS:
+            continue
+        is_future = instrument.startswith("FUT")
+        if not is_future and row.get("OPTION_TYP") not in _OPTION_KINDS:
+            continue
+        yield {
+            "symbol": row["SYMBOL"],
+            "trade_date": day_number(row["TIMESTAMP"]),
+            "expiry": day_number(row["EXPIRY_DT"]),
+            "strike": 0.0 if is_future else _number(row.get("STRIKE_PR"), 0.0),
+            "kind": FUT if is_future else _OPTION_KINDS[row["OPTION_TYP"]],
+            "open": _number(row.get("OPEN")),
+            "high": _number(row.get("HIGH")),
+            "low": _number(row.get("LOW")),
+            "close": _number(row.get("CLOSE")),
+            "settle": _number(row.get("SETTLE_PR")),
+            "open_interest": int(_number(row.get("OPEN_INT"), 0)),
+            "volume": int(_number(row.get("CONTRACTS"), 0)),
+            "underlying_price": np.nan,
+            "lot_size": 0,
+        }
+
+
+def _udiff_rows(reader):
+    for raw in reader:
+        row = {key.strip(): (value or "").strip() for key, value in raw.items() if key}
+        instrument = row.get("FinInstrmTp", "")
+        if instrument not in _UDIFF_INSTRUMENTS:
+            continue
+        is_future = instrument.endswith("F")
+        if not is_future and row.get("OptnTp") not in _OPTION_KINDS:
+            continue
+        yield {
+            "symbol": row["TckrSymb"],
+            "trade_date": day_number(row["TradDt"]),
+            "expiry": day_number(row.get("XpryDt") or row["FininstrmActlXpryDt"]),
+            "strike": 0.0 if is_future else _number(row.get("StrkPric"), 0.0),
+            "kind": FUT if is_future else _OPTION_KINDS[row["OptnTp"]],
+            "open": _number(row.get("OpnPric")),
+            "high": _number(row.get("HghPric")),
+            "low": _number(row.get("LwPric")),
+            "close": _number(row.get("ClsPric")),
+            "settle": _number(row.get("SttlmPric")),
+            "open_interest": int(_number(row.get("OpnIntrst"), 0)),
+            "volume": int(_number(row.get("TtlTradgVol"), 0)),
+            "underlying_price": _number(row.get("UndrlygPric")),
+            "lot_size": int(_number(row.get("NewBrdLotQty"), 0)),
+        }
+
+
+def concat_columns(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
@@ -0,0 +1,461 @@
+"""
+Columnar on-disk option chain store.
+
+Every column is a ``.npy`` file opened with ``mmap_mode="r"``, so a store of
+any size opens instantly and lookups return views into the mapped files
+rather than copies. Rows are sorted by ``(underlying, trade_date, expiry,
+kind, strike)``; a packed ``group_key`` column (underlying, trade date,
+expiry, kind) lets one ``searchsorted`` find a whole chain and a second one,
+on the strike column inside that group, find a single contract.
+
+A secondary index on ``(underlying, expiry, kind, strike)`` (sorted packed
+``contract_key`` plus the row permutation, ties ordered by trade date)
+serves a contract's price history.
+
+Backtests query thousands of contracts at once, so ingest also writes
+dense-rank keys that make "nearest strike in a chain" and "contract on a
+day" single vectorized ``searchsorted`` calls. Being plain memory-mapped
+files, they are shared by every process that opens the store (stores
+written before these keys existed compute them on first use instead).
+
+Each ingest writes a complete new version directory and then atomically
+repoints ``CURRENT`` at it, so readers never see a half-written store.
+"""
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from functools import cached_property
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app.services.chain.bhavcopy import EPOCH, concat_columns, day_number, parse_bhavcopy
+from app.services.payoff import CALL, FUT, PUT
+
+STORE_VERSION = 1
+DEFAULT_STORE_DIR = Path(os.getenv("CHAIN_STORE_DIR", Path(__file__).resolve().parents[3] / "data" / "chain"))
+
+DATA_COLUMNS = {
+    "underlying": np.int32,
+    "trade_date": np.int32,   # days since 1970-01-01
+    "expiry": np.int32,       # days since 1970-01-01
+    "strike": np.float64,     # 0 for futures
+    "kind": np.int8,          # CALL / PUT / FUT
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "settle": np.float64,
+    "open_interest": np.int64,
+    "volume": np.int64,
+    "underlying_price": np.float64,  # NaN when the source has no spot column
+    "lot_size": np.int32,             # 0 when unknown
+}
+INDEX_COLUMNS = {"group_key": np.uint64, "contract_key": np.uint64, "contract_order": np.int64}
+DERIVED_COLUMNS = {"group_strike_key": np.uint64, "contract_day_key": np.uint64}
+
+SLICE_FIELDS = tuple(name for name in DATA_COLUMNS if name != "underlying")
+
+
+def group_key(underlying, trade_date, expiry, kind) -> np.ndarray:
+    """Pack (underlying:16, trade_date:16, expiry:16, kind:2) into a uint64."""
+    u = np.asarray(underlying, dtype=np.uint64)
+    d = np.asarray(trade_date, dtype=np.uint64)
+    e = np.asarray(expiry, dtype=np.uint64)
+    k = np.asarray(kind, dtype=np.uint64)
+    return (u << np.uint64(34)) | (d << np.uint64(18)) | (e << np.uint64(2)) | k
+
+
+def contract_key(underlying, expiry, kind, strike) -> np.ndarray:
+    """Pack (underlying:16, expiry:16, kind:2, strike in paise:28) into a uint64."""
+    u = np.asarray(underlying, dtype=np.uint64)
+    e = np.asarray(expiry, dtype=np.uint64)
+    k = np.asarray(kind, dtype=np.uint64)
+    paise = np.rint(np.asarray(strike, dtype=np.float64) * 100).astype(np.uint64)
+    return (u << np.uint64(46)) | (e << np.uint64(30)) | (k << np.uint64(28)) | paise
+
+
+def _dense_rank(sorted_keys: np.ndarray) -> np.ndarray:
+    """0-based rank of each value in an already sorted key column."""
+    rank = np.zeros(sorted_keys.shape[0], dtype=np.uint64)
+    if rank.size > 1:
+        rank[1:] = np.cumsum(sorted_keys[1:] != sorted_keys[:-1])
+    return rank
+
+
+def group_strike_keys(group_keys: np.ndarray, strikes: np.ndarray) -> np.ndarray:
+    """(group rank:36, strike in paise:28), sorted in row order."""
+    paise = np.rint(np.asarray(strikes) * 100).astype(np.uint64)
+    return (_dense_rank(group_keys) << np.uint64(28)) | paise
+
+
+def contract_day_keys(contract_keys: np.ndarray, trade_dates: np.ndarray) -> np.ndarray:
+    """(contract rank:47, trade date:17), for rows in contract index order."""
+    return (_dense_rank(contract_keys) << np.uint64(17)) | np.asarray(trade_dates).astype(np.uint64)
+
+
+@dataclass(frozen=True)
+class ChainSlice:
+    """Column views for a set of chain rows (zero-copy for chain lookups)."""
+
+    trade_date: np.ndarray
+    expiry: np.ndarray
+    strike: np.ndarray
+    kind: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    settle: np.ndarray
+    open_interest: np.ndarray
+    volume: np.ndarray
+    underlying_price: np.ndarray
+    lot_size: np.ndarray
+
+    def __len__(self) -> int:
+        return self.strike.shape[0]
+
+    @property
+    def price(self) -> np.ndarray:
+        """Settlement price, falling back to close where settle is missing."""
+        return np.where(np.isfinite(self.settle) & (self.settle > 0), self.settle, self.close)
+
+
+def _as_day(value: Union[int, str, date]) -> int:
+    return int(value) if isinstance(value, (int, np.integer)) else day_number(value)
+
+
+class ChainStore:
+    """Read-only, memory-mapped view of one store version."""
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_STORE_DIR):
+        self.root = Path(root)
+        current = (self.root / "CURRENT").read_text().strip()
+        self.path = self.root / current
+        meta = json.loads((self.path / "meta.json").read_text())
+        if meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported chain store version: {meta.get('version')}")
+        self.version = current
+        self.symbols: List[str] = meta["symbols"]
+        self._codes = {name: code for code, name in enumerate(self.symbols)}
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.load(self.path / f"{name}.npy", mmap_mode="r")
+            for name in (*DATA_COLUMNS, *INDEX_COLUMNS)
+        }
+        for name in DERIVED_COLUMNS:
+            if (self.path / f"{name}.npy").is_file():
+                self.columns[name] = np.load(self.path / f"{name}.npy", mmap_mode="r")
+
+    @staticmethod
+    def exists(root: Union[str, Path] = DEFAULT_STORE_DIR) -> bool:
+        return (Path(root) / "CURRENT").is_file()
+
+    def __len__(self) -> int:
+        return self.columns["strike"].shape[0]
+
+    def code(self, underlying: str) -> Optional[int]:
+        return self._codes.get(underlying.upper())
+
+    def _range(self, low_key, high_key) -> Tuple[int, int]:
+        keys = self.columns["group_key"]
+        return (
+            int(np.searchsorted(keys, np.uint64(low_key), side="left")),
+            int(np.searchsorted(keys, np.uint64(high_key), side="left")),
+        )
+
+    def _slice(self, lo: int, hi: int) -> ChainSlice:
+        return ChainSlice(**{name: self.columns[name][lo:hi] for name in SLICE_FIELDS})
+
+    def _gather(self, rows: np.ndarray) -> ChainSlice:
+        return ChainSlice(**{name: self.columns[name][rows] for name in SLICE_FIELDS})
+
+    def trade_dates(self, underlying: str) -> np.ndarray:
+        """Sorted trading days (days since epoch) with data for ``underlying``."""
+        code = self.code(underlying)
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        lo, hi = self._range(group_key(code, 0, 0, 0), group_key(code + 1, 0, 0, 0))
+        days = self.columns["trade_date"][lo:hi]
+        return np.asarray(days[np.append(True, days[1:] != days[:-1])]) if hi > lo else np.empty(0, dtype=np.int32)
+
+    def expiries(self, underlying: str, trade_date) -> np.ndarray:
+        code = self.code(underlying)
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        day = _as_day(trade_date)
+        lo, hi = self._range(group_key(code, day, 0, 0), group_key(code, day + 1, 0, 0))
+        expiry = self.columns["expiry"][lo:hi]
+        return np.asarray(expiry[np.append(True, expiry[1:] != expiry[:-1])]) if hi > lo else np.empty(0, dtype=np.int32)
+
+    def chain(self, underlying: str, trade_date, expiry, kinds: Iterable[int] = (CALL, PUT, FUT)) -> ChainSlice:
+        """
+        Every contract of one expiry on one day: calls, then puts, then the
+        future, each sorted by strike. A contiguous, zero-copy slice.
+        """
+        code = self.code(underlying)
+        if code is None:
+            return self._slice(0, 0)
+        day, exp = _as_day(trade_date), _as_day(expiry)
+        kinds = sorted(kinds)
+        lo, hi = self._range(group_key(code, day, exp, kinds[0]), group_key(code, day, exp, kinds[-1] + 1))
+        return self._slice(lo, hi)
+
+    def contract_row(self, underlying: str, trade_date, expiry, strike: float, kind: int) -> Optional[int]:
+        """Row index of one contract on one day, or None."""
+        code = self.code(underlying)
+        if code is None:
+            return None
+        day, exp = _as_day(trade_date), _as_day(expiry)
+        lo, hi = self._range(group_key(code, day, exp, kind), group_key(code, day, exp, kind + 1))
+        strikes = self.columns["strike"][lo:hi]
+        at = int(np.searchsorted(strikes, strike - 1e-6))
+        if at < strikes.shape[0] and abs(strikes[at] - strike) < 1e-6:
+            return lo + at
+        return None
+
+    def history(self, underlying: str, expiry, strike: float, kind: int) -> ChainSlice:
+        """Daily rows of one contract in trade-date order, via the contract index."""
+        code = self.code(underlying)
+        if code is None:
+            return self._slice(0, 0)
+        key = contract_key(code, _as_day(expiry), kind, 0.0 if kind == FUT else strike)
+        keys = self.columns["contract_key"]
+        lo = int(np.searchsorted(keys, key, side="left"))
+        hi = int(np.searchsorted(keys, key, side="right"))
+        return self._gather(np.asarray(self.columns["contract_order"][lo:hi]))
+
+    def underlying_price(self, underlying: str, trade_date) -> Optional[float]:
+        """Spot from the bhavcopy when present, else the nearest future's price."""
+        code = self.code(underlying)
+        if code is None:
+            return None
+        day = _as_day(trade_date)
+        lo, hi = self._range(group_key(code, day, 0, 0), group_key(code, day + 1, 0, 0))
+        if hi == lo:
+            return None
+        spot = self.columns["underlying_price"][lo:hi]
+        finite = np.flatnonzero(np.isfinite(spot) & (spot > 0))
+        if finite.size:
+            return float(spot[finite[0]])
+        futures = np.flatnonzero(self.columns["kind"][lo:hi] == FUT)
+        if futures.size:
+            row = self._slice(lo + futures[0], lo + futures[0] + 1)
+            return float(row.price[0])
+        return None
+
+    # --------------------
+    # Vectorized lookups
+    # --------------------
+    @cached_property
+    def _group_strike_keys(self) -> np.ndarray:
+        if "group_strike_key" in self.columns:
+            return self.columns["group_strike_key"]
+        return group_strike_keys(self.columns["group_key"], self.columns["strike"])
+
+    @cached_property
+    def _contract_day_keys(self) -> np.ndarray:
+        if "contract_day_key" in self.columns:
+            return self.columns["contract_day_key"]
+        return contract_day_keys(
+            self.columns["contract_key"], np.asarray(self.columns["trade_date"])[self.columns["contract_order"]]
+        )
+
+    def row_prices(self, rows: np.ndarray) -> np.ndarray:
+        """Settle (else close) per row index; NaN where ``rows`` is -1."""
+        rows = np.asarray(rows, dtype=np.int64)
+        safe = np.maximum(rows, 0)
+        settle = self.columns["settle"][safe] if len(self) else np.full(rows.shape, np.nan)
+        close = self.columns["close"][safe] if len(self) else np.full(rows.shape, np.nan)
+        price = np.where(np.isfinite(settle) & (settle > 0), settle, close)
+        return np.where(rows >= 0, price, np.nan)
+
+    def group_bounds(self, codes, trade_dates, expiries, kinds) -> Tuple[np.ndarray, np.ndarray]:
+        """Row range ``[lo, hi)`` of each (underlying, day, expiry, kind) chain."""
+        keys = group_key(codes, trade_dates, expiries, kinds)
+        column = self.columns["group_key"]
+        return np.searchsorted(column, keys, side="left"), np.searchsorted(column, keys, side="right")
+
+    def nearest_strike_rows(self, codes, trade_dates, expiries, kinds, targets):
+        """
+        Row of the listed strike closest to each target within its chain,
+        plus the chain bounds (for stepping by strikes). Rows are -1 where
+        the chain is empty.
+        """
+        lo, hi = self.group_bounds(codes, trade_dates, expiries, kinds)
+        found = hi > lo
+        if not found.any():
+            return np.full(lo.shape, -1, dtype=np.int64), lo, hi
+        keys = self._group_strike_keys
+        rank_bits = keys[np.minimum(lo, len(self) - 1)] >> np.uint64(28) << np.uint64(28)
+        targets = np.asarray(targets, dtype=float)
+        paise = np.rint(np.clip(np.nan_to_num(targets), 0.0, None) * 100).astype(np.uint64)
+        at = np.searchsorted(keys, rank_bits | paise)
+        last = np.maximum(hi - 1, 0)
+        above = np.minimum(np.maximum(at, lo), last)
+        below = np.minimum(np.maximum(at - 1, lo), last)
+        strike = self.columns["strike"]
+        closer_below = np.abs(strike[below] - targets) <= np.abs(strike[above] - targets)
+        rows = np.where(closer_below, below, above)
+        return np.where(found & np.isfinite(targets), rows, -1).astype(np.int64), lo, hi
+
+    def find_rows(self, codes, trade_dates, expiries, kinds, strikes) -> np.ndarray:
+        """Row of each exact contract on each day, -1 where it did not trade."""
+        trade_dates = np.asarray(trade_dates)
+        if len(self) == 0:
+            return np.full(trade_dates.shape, -1, dtype=np.int64)
+        kinds = np.asarray(kinds)
+        keys = contract_key(codes, expiries, kinds, np.where(kinds == FUT, 0.0, strikes))
+        column = self.columns["contract_key"]
+        at = np.minimum(np.searchsorted(column, keys), len(self) - 1)
+        listed = column[at] == keys
+
+        day_keys = self._contract_day_keys
+        rank_bits = day_keys[at] >> np.uint64(17) << np.uint64(17)
+        query = rank_bits | trade_dates.astype(np.uint64)
+        pos = np.minimum(np.searchsorted(day_keys, query), len(self) - 1)
+        hit = listed & (day_keys[pos] == query)
+        return np.where(hit, self.columns["contract_order"][pos], -1).astype(np.int64)
+
+    def spot_series(self, underlying: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Every trading day of ``underlying`` with its spot, as
+        :meth:`underlying_price` would report it, in one pass.
+        """
+        code = self.code(underlying)
+        if code is None:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        lo, hi = self._range(group_key(code, 0, 0, 0), group_key(code + 1, 0, 0, 0))
+        if hi == lo:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        trade_date = np.asarray(self.columns["trade_date"][lo:hi])
+        new_day = np.append(True, trade_date[1:] != trade_date[:-1])
+        days = trade_date[new_day]
+        day_of_row = np.cumsum(new_day) - 1
+
+        def first_per_day(mask, values):
+            out = np.full(days.shape[0], np.nan)
+            picked = np.flatnonzero(mask)
+            which, first = np.unique(day_of_row[picked], return_index=True)
+            out[which] = values[picked[first]]
+            return out
+
+        spot_column = np.asarray(self.columns["underlying_price"][lo:hi])
+        spot = first_per_day(np.isfinite(spot_column) & (spot_column > 0), spot_column)
+        missing = np.isnan(spot)
+        if missing.any():
+            futures = first_per_day(
+                np.asarray(self.columns["kind"][lo:hi]) == FUT,
+                self.row_prices(np.arange(lo, hi)),
+            )
+            spot = np.where(missing, futures, spot)
+        return days, spot
+
+
+# --------------------
+# Ingest
+# --------------------
+def _existing_columns(root: Path):
+    if not ChainStore.exists(root):
+        return None, []
+    store = ChainStore(root)
+    columns = {name: np.array(store.columns[name]) for name in DATA_COLUMNS}
+    return columns, list(store.symbols)
+
+
+def build_columns(parsed: Dict[str, np.ndarray], existing=None, symbols: Optional[List[str]] = None):
+    """
+    Merge parsed rows into existing store columns: encode symbols, sort,
+    drop duplicate contracts (newer files win) and build both indexes.
+    """
+    symbols = list(symbols or [])
+    codes = {name: code for code, name in enumerate(symbols)}
+    names, inverse = np.unique(parsed["symbol"].astype(str), return_inverse=True)
+    mapping = np.array([codes.setdefault(name.upper(), len(codes)) for name in names.tolist()], dtype=np.int32)
+    symbols = sorted(codes, key=codes.get)
+    if len(symbols) >= 1 << 16:
+        raise ValueError("Too many underlyings for the chain store key layout")
+
+    incoming = {name: parsed[name].astype(dtype) for name, dtype in DATA_COLUMNS.items() if name != "underlying"}
+    incoming["underlying"] = mapping[inverse]
+    merged = concat_columns([existing, incoming]) if existing else incoming
+
+    n = merged["strike"].shape[0]
+    sequence = np.arange(n)
+    gkey = group_key(merged["underlying"], merged["trade_date"], merged["expiry"], merged["kind"])
+    order = np.lexsort((sequence, merged["strike"], gkey))
+    gkey, strike = gkey[order], merged["strike"][order]
+
+    # Keep the last (newest) copy of each (group, strike)
+    keep = np.ones(n, dtype=bool)
+    keep[:-1] = ~((gkey[1:] == gkey[:-1]) & (strike[1:] == strike[:-1]))
+    order = order[keep]
+
+    columns = {name: np.ascontiguousarray(merged[name][order]) for name in DATA_COLUMNS}
+    columns["group_key"] = gkey[keep]
+
+    ckey = contract_key(columns["underlying"], columns["expiry"], columns["kind"], columns["strike"])
+    contract_order = np.lexsort((columns["trade_date"], ckey))
+    columns["contract_key"] = ckey[contract_order]
+    columns["contract_order"] = contract_order.astype(np.int64)
+    columns["group_strike_key"] = group_strike_keys(columns["group_key"], columns["strike"])
+    columns["contract_day_key"] = contract_day_keys(columns["contract_key"], columns["trade_date"][contract_order])
+    return columns, symbols
+
+
+def write_store(columns: Dict[str, np.ndarray], symbols: List[str], root: Union[str, Path] = DEFAULT_STORE_DIR) -> Path:
+    """Write a new store version and atomically make it current."""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    version_dir = Path(tempfile.mkdtemp(prefix="v", dir=root))
+    for name, dtype in {**DATA_COLUMNS, **INDEX_COLUMNS, **DERIVED_COLUMNS}.items():
+        np.save(version_dir / f"{name}.npy", np.asarray(columns[name], dtype=dtype))
+    (version_dir / "meta.json").write_text(json.dumps({
+        "version": STORE_VERSION,
+        "rows": int(columns["strike"].shape[0]),
+        "symbols": symbols,
+        "epoch": EPOCH.isoformat(),
+    }))
+
+    previous = (root / "CURRENT").read_text().strip() if (root / "CURRENT").is_file() else None
+    pointer = root / "CURRENT.tmp"
+    pointer.write_text(version_dir.name)
+    os.replace(pointer, root / "CURRENT")
+
+    # Open memmaps keep unlinked files alive, so old versions can go now
+    if previous and previous != version_dir.name:
+        shutil.rmtree(root / previous, ignore_errors=True)
+    return version_dir
+
+
+def ingest_bhavcopies(paths: Iterable[Union[str, Path]], root: Union[str, Path] = DEFAULT_STORE_DIR) -> Dict[str, int]:
+    """Parse bhavcopy files and merge them into the store at ``root``."""
+    parts = [parse_bhavcopy(path) for path in paths]
+    parts = [part for part in parts if part["strike"].size]
+    existing, symbols = _existing_columns(Path(root))
+    before = 0 if existing is None else int(existing["strike"].shape[0])
+    if not parts:
+        return {"files": 0, "rows": before, "added": 0}
+
+    columns, symbols = build_columns(concat_columns(parts), existing, symbols)
+    write_store(columns, symbols, root)
+    total = int(columns["strike"].shape[0])
+    return {"files": len(parts), "rows": total, "added": total - before}
+
+
+_stores: Dict[Path, ChainStore] = {}
+
+
+def open_store(root: Union[str, Path] = DEFAULT_STORE_DIR) -> Optional[ChainStore]:
+    """Shared store for ``root``; reopened once an ingest publishes a new version."""
+    root = Path(root)
+    if not ChainStore.exists(root):
+        return None
+    current = (root / "CURRENT").read_text().strip()
+    store = _stores.get(root)
+    if store is None or store.version != current:
+        store = _stores[root] = ChainStore(root)
+    return store
@@ -0,0 +1,156 @@
+"""
+Incremental per-user dashboard aggregates.
+
+Each strategy contributes a small vector of counters (see
+:func:`strategy_contribution`). Write paths snapshot a strategy's contribution
+before and after the change and upsert the difference into
+``user_strategy_stats`` inside the same transaction, so the summary never
+drifts from the rows it describes and reading it is O(1).
+
+:func:`rebuild_stats` recomputes the same counters from scratch with one
+grouped query, for backfills and for verifying the incremental path.
+"""
+from decimal import Decimal
+from typing import Dict, Optional
+
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.dashboard import UserStrategyStats
+from app.models.strategy import Strategy
+
+COUNTERS = ("total_count", "open_count", "completed_count", "winning_count", "losing_count", "realized_pnl")
+
+
+def is_open(status: str, exit_date) -> bool:
+    """Whether a strategy counts as an open position (see :func:`open_strategy_filter`)."""
+    return status == "current" or (status == "active" and exit_date is None)
+
+
+def open_strategy_filter():
+    """SQL form of :func:`is_open`, shared by every query over open positions."""
+    return or_(
+        Strategy.status == "current",
+        and_(Strategy.status == "active", Strategy.exit_date.is_(None)),
+    )
+
+
+def contribution(status: str, exit_date, actual_profit) -> Dict[str, object]:
+    """Counters one strategy adds to its owner's aggregates (dashboard rules)."""
+    completed = status == "completed"
+    profit = Decimal(str(actual_profit)) if actual_profit is not None else None
+    return {
+        "total_count": 1,
+        "open_count": int(is_open(status, exit_date)),
+        "completed_count": int(completed),
+        "winning_count": int(completed and profit is not None and profit > 0),
+        "losing_count": int(completed and profit is not None and profit < 0),
+        "realized_pnl": profit if completed and profit is not None else Decimal(0),
+    }
+
+
+def strategy_contribution(strategy) -> Dict[str, object]:
+    return contribution(strategy.status, strategy.exit_date, strategy.actual_profit)
+
+
+def sum_contributions(contributions) -> Dict[str, object]:
+    """Combined counters of several strategies, e.g. one bulk-import batch."""
+    total = {name: 0 for name in COUNTERS}
+    for item in contributions:
+        for name in COUNTERS:
+            total[name] += item[name]
+    return total
+
+
+async def apply_stats_delta(db, user_id, before: Optional[Dict] = None, after: Optional[Dict] = None) -> None:
+    """
+    Add ``after - before`` to the user's aggregate row (either may be None for
+    creates / deletes). Uses an atomic upsert so concurrent writes compose.
+    """
+    delta = {
+        name: (after[name] if after else 0) - (before[name] if before else 0)
+        for name in COUNTERS
+    }
+    table = UserStrategyStats.__table__
+    stmt = insert(table).values(user_id=user_id, last_activity_at=func.now(), **delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={
+            **{name: table.c[name] + stmt.excluded[name] for name in COUNTERS},
+            "last_activity_at": func.now(),
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+def _aggregate_query(user_id=None):
+    completed = Strategy.status == "completed"
+    query = select(
+        Strategy.user_id,
+        func.count().label("total_count"),
+        func.count().filter(open_strategy_filter()).label("open_count"),
+        func.count().filter(completed).label("completed_count"),
+        func.count().filter(and_(completed, Strategy.actual_profit > 0)).label("winning_count"),
+        func.count().filter(and_(completed, Strategy.actual_profit < 0)).label("losing_count"),
+        func.coalesce(func.sum(case((completed, Strategy.actual_profit), else_=0)), 0).label("realized_pnl"),
+        func.max(func.greatest(Strategy.updated_at, Strategy.created_at)).label("last_activity_at"),
+    ).group_by(Strategy.user_id)
+    if user_id is not None:
+        query = query.where(Strategy.user_id == user_id)
+    return query
+
+
+async def compute_stats(db, user_id=None) -> Dict:
+    """Aggregates recomputed from the strategies table, keyed by user id."""
+    result = await db.execute(_aggregate_query(user_id))
+    return {row.user_id: row._asdict() for row in result}
+
+
+async def rebuild_stats(db, user_id=None) -> int:
+    """
+    Overwrite aggregate rows with freshly computed values (all users, or one).
+    Users without strategies are reset to zero. Returns the rows written.
+    """
+    fresh = await compute_stats(db, user_id)
+    table = UserStrategyStats.__table__
+
+    reset = table.update().values(**{name: 0 for name in COUNTERS})
+    if user_id is not None:
+        reset = reset.where(table.c.user_id == user_id)
+    await db.execute(reset)
+
+    for values in fresh.values():
+        stmt = insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={name: stmt.excluded[name] for name in (*COUNTERS, "last_activity_at")},
+        )
+        await db.execute(stmt)
+    return len(fresh)
+
+
+def summarize(stats: Optional[UserStrategyStats]) -> Dict:
+    """Dashboard summary payload from an aggregate row (None means no history)."""
+    if stats is None:
+        return {
+            "total_strategies": 0,
+            "open_strategies": 0,
+            "completed_strategies": 0,
+            "winning_trades": 0,
+            "losing_trades": 0,
+            "win_rate": 0,
+            "realized_pnl": 0.0,
+            "last_activity_at": None,
+        }
+    completed = stats.completed_count
+    return {
+        "total_strategies": stats.total_count,
+        "open_strategies": stats.open_count,
+        "completed_strategies": completed,
+        "winning_trades": stats.winning_count,
+        "losing_trades": stats.losing_count,
+        "win_rate": round(stats.winning_count / completed * 100) if completed else 0,
+        "realized_pnl": float(stats.realized_pnl),
+        "last_activity_at": stats.last_activity_at,
+    }
@@ -0,0 +1,58 @@
+"""
+Vectorized settlement of strategies at an underlying price.
+
+Mirrors the dashboard's exit flow: every open option leg exits at its
+intrinsic value and every open futures leg at the underlying price. Legs that
+already carry a recorded exit keep it. All strategies are stacked into one
+``LegArrays`` and settled in a single pass; per-strategy P&L is a segment sum.
+"""
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from app.services.payoff import CALL, FUT, PUT, stack_leg_sets
+
+
+def leg_number(value: float) -> str:
+    """Leg fields are strings; format like JS ``Number.toString``."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def settle_leg_sets(leg_sets: Sequence[List[Dict[str, Any]]], prices: Sequence[float]):
+    """
+    Settle each strategy's legs at its price.
+
+    Returns ``(settled_leg_sets, pnl)``: copies of the legs with exit fields
+    filled in, and realized P&L per strategy (shape ``(n_strategies,)``).
+    """
+    legs, counts = stack_leg_sets(leg_sets)
+    pnl = np.zeros(counts.size)
+    if len(legs) == 0:
+        return [list(leg_set or []) for leg_set in leg_sets], pnl
+
+    underlying = np.repeat(np.asarray(prices, dtype=float), counts)
+    intrinsic = np.where(
+        legs.kind == CALL,
+        np.maximum(underlying - legs.strike, 0.0),
+        np.where(legs.kind == PUT, np.maximum(legs.strike - underlying, 0.0), underlying),
+    )
+    exit_value = np.where(legs.is_open, intrinsic, legs.exit_value)
+
+    per_leg = legs.weight * (exit_value - legs.cost)
+    non_empty = counts > 0
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    pnl[non_empty] = np.add.reduceat(per_leg, starts[non_empty])
+
+    settled, flat_index = [], 0
+    opened = legs.is_open.tolist()
+    for leg_set in leg_sets:
+        rows = []
+        for leg in leg_set or []:
+            leg = dict(leg)
+            if opened[flat_index]:
+                key = "exitPrice" if legs.kind[flat_index] == FUT else "exitPremium"
+                leg[key] = leg_number(exit_value[flat_index])
+            rows.append(leg)
+            flat_index += 1
+        settled.append(rows)
+    return settled, pnl + 0.0
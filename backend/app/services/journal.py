@@ -0,0 +1,165 @@
+"""
+Trade journal analytics over a user's closed strategies.
+
+Trades are loaded once into flat arrays (exit date, realized P&L, strategy
+type) and every statistic is a vectorized reduction over them: the equity
+curve is a cumulative sum, drawdown is its distance from the running peak,
+streaks are run lengths of the P&L sign, and per-type breakdowns are
+``bincount`` segment sums. Ratios are computed on daily P&L (calendar days
+between the first and last exit, zero-filled) and annualized by 365 days.
+"""
+import math
+from datetime import date
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from app.services.pricing import DAYS_PER_YEAR
+
+
+def _has_exit(leg: Dict[str, Any]) -> bool:
+    key = "exitPrice" if leg.get("instrumentType") == "fut" else "exitPremium"
+    return leg.get(key) not in (None, "")
+
+
+def trade_pnl(snapshot: Optional[Dict[str, Any]], actual_profit) -> float:
+    """
+    Realized P&L of a closed trade, mirroring the frontend's
+    ``getHistoricalPnL``: a complete snapshot wins, otherwise actual_profit.
+    """
+    if (
+        snapshot
+        and snapshot.get("exitDate")
+        and snapshot.get("snapshotDate")
+        and snapshot.get("legs")
+        and all(_has_exit(leg) for leg in snapshot["legs"])
+    ):
+        realized = snapshot.get("realizedPnL")
+        if isinstance(realized, (int, float)) and math.isfinite(realized):
+            return float(realized)
+    # actual_profit is a Numeric column: Decimal or None
+    return float(actual_profit) if actual_profit is not None else 0.0
+
+
+def _run_lengths(sign: np.ndarray):
+    """Start index, length and sign of each run of equal values."""
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(sign)) + 1))
+    lengths = np.diff(np.append(starts, sign.size))
+    return starts, lengths, sign[starts]
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return numerator / denominator if denominator > 0 else None
+
+
+def journal_analytics(rows: Sequence) -> Dict[str, Any]:
+    """
+    Analytics for closed trades. ``rows`` have ``exit_date`` (date, or None to
+    fall back on ``updated_at``), ``actual_profit``, ``historical_snapshot`` and
+    ``strategy_type`` attributes.
+    """
+    n = len(rows)
+    if n == 0:
+        return {
+            "trades": 0,
+            "equity_curve": [],
+            "summary": None,
+            "by_strategy_type": [],
+        }
+
+    # Exit days as proleptic ordinals; cheaper to build than datetime64 from objects
+    exit_days = np.fromiter(
+        (
+            (row.exit_date or row.updated_at).toordinal()
+            for row in rows
+        ),
+        dtype=np.int64,
+        count=n,
+    )
+    pnl = np.fromiter(
+        (trade_pnl(row.historical_snapshot, row.actual_profit) for row in rows),
+        dtype=float,
+        count=n,
+    )
+    types = np.array([row.strategy_type for row in rows], dtype=str)
+
+    order = np.argsort(exit_days, kind="stable")
+    exit_days, pnl, types = exit_days[order], pnl[order], types[order]
+
+    # Equity and drawdown, per trade (equity starts from zero)
+    equity = np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.maximum(equity, 0.0))
+    drawdown = equity - peak
+    trough = int(np.argmin(drawdown))
+    max_drawdown = float(drawdown[trough])
+    peak_before = np.flatnonzero(equity[: trough + 1] == peak[trough])
+    peak_day = exit_days[peak_before[-1]] if peak_before.size and peak[trough] > 0 else None
+
+    # Daily P&L over the calendar span, zero-filled between exits
+    offsets = exit_days - exit_days[0]
+    daily = np.bincount(offsets, weights=pnl)
+    mean = float(daily.mean())
+    std = float(daily.std(ddof=1)) if daily.size > 1 else 0.0
+    downside = float(np.sqrt(np.mean(np.minimum(daily, 0.0) ** 2)))
+    annualize = math.sqrt(DAYS_PER_YEAR)
+
+    wins = pnl > 0
+    losses = pnl < 0
+    gross_profit = float(pnl[wins].sum())
+    gross_loss = float(-pnl[losses].sum())
+
+    starts, lengths, run_sign = _run_lengths(np.sign(pnl))
+    win_runs = lengths[run_sign > 0]
+    loss_runs = lengths[run_sign < 0]
+
+    # Curve is reported per exit day (last trade of the day)
+    last_of_day = np.append(exit_days[1:] != exit_days[:-1], True)
+
+    # Per strategy_type breakdown via segment sums
+    labels, inverse = np.unique(types, return_inverse=True)
+    counts = np.bincount(inverse, minlength=labels.size)
+    type_pnl = np.bincount(inverse, weights=pnl, minlength=labels.size)
+    type_wins = np.bincount(inverse, weights=wins, minlength=labels.size)
+    type_profit = np.bincount(inverse, weights=np.where(wins, pnl, 0.0), minlength=labels.size)
+    type_loss = np.bincount(inverse, weights=np.where(losses, -pnl, 0.0), minlength=labels.size)
+
+    return {
+        "trades": n,
+        "equity_curve": [
+            {"date": day, "equity": eq, "drawdown": dd}
+            for day, eq, dd in zip(
+                map(date.fromordinal, exit_days[last_of_day].tolist()),
+                equity[last_of_day].tolist(),
+                drawdown[last_of_day].tolist(),
+            )
+        ],
+        "summary": {
+            "total_pnl": float(equity[-1]),
+            "win_rate": float(wins.mean()),
+            "average_win": float(pnl[wins].mean()) if wins.any() else 0.0,
+            "average_loss": float(pnl[losses].mean()) if losses.any() else 0.0,
+            "expectancy": float(pnl.mean()),
+            "profit_factor": _ratio(gross_profit, gross_loss),
+            "max_drawdown": max_drawdown,
+            "max_drawdown_peak": date.fromordinal(int(peak_day)) if peak_day is not None else None,
+            "max_drawdown_trough": date.fromordinal(int(exit_days[trough])),
+            "sharpe": _ratio(mean * annualize, std),
+            "sortino": _ratio(mean * annualize, downside),
+            "longest_win_streak": int(win_runs.max()) if win_runs.size else 0,
+            "longest_loss_streak": int(loss_runs.max()) if loss_runs.size else 0,
+            "current_streak": int(lengths[-1] * run_sign[-1]),
+        },
+        "by_strategy_type": [
+            {
+                "strategy_type": label,
+                "trades": int(count),
+                "total_pnl": float(total),
+                "win_rate": float(won / count),
+                "expectancy": float(total / count),
+                "profit_factor": _ratio(float(profit), float(loss)),
+            }
+            for label, count, total, won, profit, loss in zip(
+                labels.tolist(), counts, type_pnl, type_wins, type_profit, type_loss
+            )
+        ],
+    }
@@ -0,0 +1,312 @@
+"""
+Live mark-to-market of open strategies for WebSocket subscribers.
+
+One :class:`LiveHub` per process owns the quote feed. The strategies that
+any connection subscribed to are stacked into a single
+:class:`~app.services.portfolio.OpenBook`, rebuilt only when the set of
+subscribed strategies changes or the date rolls, so every quote tick is one
+vectorized revaluation of all legs (entry vols held fixed), summed per
+strategy with ``np.bincount``.
+
+Each connection has a :class:`Subscriber` that diffs the revalued table
+against what it last sent, after rounding every field to its display
+precision, and sends only the strategies and fields that changed, at most
+once per throttle interval. Ticks arriving in between are coalesced into
+the latest values, and a slow client never holds up the tick loop.
+
+:class:`ReplayFeed` stands in for a live quote source: it replays spot
+closes from the local chain store (or any scripted sequence of ticks).
+"""
+import asyncio
+import math
+import os
+import time
+from datetime import date, datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.chain import ChainStore
+from app.services.portfolio import stack_book, underlying_name
+from app.services.pricing import DEFAULT_RISK_FREE_RATE, pointwise_leg_greeks, pointwise_leg_values
+
+LIVE_MIN_INTERVAL = float(os.getenv("LIVE_MIN_INTERVAL", "0.5"))
+LIVE_REPLAY_INTERVAL = float(os.getenv("LIVE_REPLAY_INTERVAL", "1.0"))
+LIVE_REPLAY_DAYS = int(os.getenv("LIVE_REPLAY_DAYS", "250"))
+LIVE_REPLAY_STEPS = int(os.getenv("LIVE_REPLAY_STEPS", "4"))
+
+# Streamed per strategy, with the decimals a change must show up in to be sent
+FIELDS = {
+    "underlying_price": 2,
+    "value": 2,
+    "pnl": 2,
+    "delta": 2,
+    "gamma": 6,
+    "vega": 2,
+    "theta": 2,
+}
+FIELD_NAMES = tuple(FIELDS)
+
+
+class ReplayFeed:
+    """
+    Async iterator of ``{underlying: price}`` ticks, one every ``interval``
+    seconds, cycling through ``ticks`` (once when ``loop`` is false).
+    """
+
+    def __init__(self, ticks: Sequence[Dict[str, float]], interval: float = LIVE_REPLAY_INTERVAL, loop: bool = True):
+        self.ticks = [{name.upper(): float(price) for name, price in tick.items()} for tick in ticks]
+        self.interval = interval
+        self.loop = loop
+
+    @classmethod
+    def from_store(
+        cls,
+        store: ChainStore,
+        underlyings: Optional[Iterable[str]] = None,
+        days: int = LIVE_REPLAY_DAYS,
+        steps_per_day: int = LIVE_REPLAY_STEPS,
+        **kwargs,
+    ) -> "ReplayFeed":
+        """
+        The last ``days`` trading days of stored spot closes, aligned across
+        underlyings (carrying a price forward over its missing days), with
+        ``steps_per_day`` geometric steps between consecutive closes.
+        """
+        names = [name.upper() for name in (underlyings or store.symbols)]
+        series = {name: store.spot_series(name) for name in names}
+        calendar = np.unique(np.concatenate([d for d, _ in series.values()] or [np.empty(0, dtype=np.int32)]))
+        calendar = calendar[-days:]
+
+        table = np.full((calendar.size, len(names)), np.nan)
+        for column, name in enumerate(names):
+            day, spot = series[name]
+            at = np.searchsorted(day, calendar, side="right") - 1
+            known = at >= 0
+            table[known, column] = spot[at[known]]
+
+        if calendar.size > 1 and steps_per_day > 1:
+            fraction = np.arange(steps_per_day) / steps_per_day
+            start, end = np.log(table[:-1]), np.log(table[1:])
+            path = start[:, None, :] + (end - start)[:, None, :] * fraction[None, :, None]
+            table = np.concatenate((np.exp(path).reshape(-1, len(names)), table[-1:]))
+
+        ticks = [
+            {name: price for name, price in zip(names, row.tolist()) if math.isfinite(price)}
+            for row in table
+        ]
+        return cls([tick for tick in ticks if tick], **kwargs)
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, float]]:
+        if not self.ticks:
+            return
+        while True:
+            for tick in self.ticks:
+                yield tick
+                await asyncio.sleep(self.interval)
+            if not self.loop:
+                return
+
+
+def revalue(book, strategies: int, quotes: np.ndarray, r: float = DEFAULT_RISK_FREE_RATE) -> np.ndarray:
+    """
+    ``(strategies, FIELDS)`` table for an :class:`OpenBook` given one quote
+    per leg (NaN when there is none yet). Strategies with an open leg that
+    cannot be priced get NaN for everything but the quote.
+    """
+    legs, owner, n = book.legs, book.strategy_index, strategies
+    table = np.full((n, len(FIELDS)), np.nan)
+    if not len(legs):
+        return table
+
+    live = legs.is_open & book.priced & np.isfinite(quotes)
+    underlying = np.where(live, quotes, 0.0)
+    vol = np.nan_to_num(book.vol)
+    values = pointwise_leg_values(legs, underlying, vol, book.t, book.use_black76, r)
+    greeks = pointwise_leg_greeks(legs, underlying, vol, book.t, book.use_black76, r)
+
+    counted = live | ~legs.is_open
+    weight = np.where(counted, legs.weight, 0.0)
+    sums = {
+        "value": weight * np.where(counted, values, 0.0),
+        "pnl": weight * (np.where(counted, values, 0.0) - legs.cost),
+        "delta": weight * greeks.delta,
+        "gamma": weight * greeks.gamma,
+        "vega": weight * greeks.vega / 100.0,
+        "theta": weight * greeks.theta / 365.0,
+    }
+    for name, per_leg in sums.items():
+        table[:, FIELD_NAMES.index(name)] = np.bincount(owner, weights=per_leg, minlength=n)
+
+    first_leg = np.unique(owner, return_index=True)[1]
+    table[owner[first_leg], FIELD_NAMES.index("underlying_price")] = quotes[first_leg]
+    unpriced = np.bincount(owner, weights=(legs.is_open & ~live), minlength=n) > 0
+    table[unpriced, 1:] = np.nan
+    return table
+
+
+class Subscriber:
+    """
+    One connection's subscriptions and outbox. ``send`` delivers a message;
+    all messages go through :meth:`run`, so sends never interleave.
+    """
+
+    def __init__(self, send: Callable[[Dict[str, Any]], Awaitable[None]], min_interval: float = LIVE_MIN_INTERVAL):
+        self.strategy_ids: List[str] = []
+        self._send = send
+        self.min_interval = min_interval
+        self._sent = np.full((0, len(FIELDS)), np.nan)
+        self._pending: Dict[str, Dict[str, Optional[float]]] = {}
+        self._latest = self._sent
+        self._control: List[Dict[str, Any]] = []
+        self._wake = asyncio.Event()
+        self._last_send = -math.inf
+        self.as_of: Optional[str] = None
+
+    def set_strategies(self, strategy_ids: Sequence[str]) -> None:
+        """Replace the subscription, keeping what was already sent for strategies that stay."""
+        position = {sid: i for i, sid in enumerate(self.strategy_ids)}
+        keep = np.array([position.get(sid, -1) for sid in strategy_ids], dtype=np.intp)
+        sent = np.full((len(strategy_ids), len(FIELDS)), np.nan)
+        sent[keep >= 0] = self._sent[keep[keep >= 0]]
+        self.strategy_ids = list(strategy_ids)
+        self._sent = sent
+        self._latest = sent.copy()
+        self._pending = {sid: fields for sid, fields in self._pending.items() if sid in self.strategy_ids}
+
+    def notify(self, message: Dict[str, Any]) -> None:
+        self._control.append(message)
+        self._wake.set()
+
+    def offer(self, table: np.ndarray, rows: np.ndarray, as_of: str) -> None:
+        """
+        Take this tick's rounded values (``table[rows]`` aligned with
+        ``strategy_ids``) and queue whatever differs from what was sent.
+        """
+        latest = table[rows]
+        self._latest = latest
+        self.as_of = as_of
+        changed = ~((latest == self._sent) | (np.isnan(latest) & np.isnan(self._sent)))
+        self._pending = {}
+        for i, j in zip(*np.nonzero(changed)):
+            value = latest[i, j]
+            self._pending.setdefault(self.strategy_ids[i], {})[FIELD_NAMES[j]] = None if np.isnan(value) else float(value)
+        if self._pending:
+            self._wake.set()
+
+    def _take_update(self) -> Optional[Dict[str, Any]]:
+        if not self._pending:
+            return None
+        update, self._pending = self._pending, {}
+        self._sent = self._latest.copy()
+        return {"type": "mtm", "as_of": self.as_of, "strategies": update}
+
+    async def run(self) -> None:
+        """Deliver control messages at once and MTM diffs at most every ``min_interval``."""
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while self._control:
+                await self._send(self._control.pop(0))
+            if not self._pending:
+                continue
+            delay = self._last_send + self.min_interval - time.monotonic()
+            if delay > 0:
+                # Ticks during the wait only update the pending diff
+                await asyncio.sleep(delay)
+                while self._control:
+                    await self._send(self._control.pop(0))
+            update = self._take_update()
+            if update is not None:
+                self._last_send = time.monotonic()
+                await self._send(update)
+
+
+class LiveHub:
+    """
+    Shared book of every subscribed strategy, driven by one quote feed.
+    Strategy rows are snapshots taken at subscribe time; subscribing again
+    picks up later edits.
+    """
+
+    def __init__(self, feed_factory: Callable[[], AsyncIterator[Dict[str, float]]], r: float = DEFAULT_RISK_FREE_RATE):
+        self.feed_factory = feed_factory
+        self.r = r
+        self.subscribers: List[Subscriber] = []
+        self.quotes: Dict[str, float] = {}
+        self.ticks = 0
+        self._rows: Dict[str, Any] = {}
+        self._book = None
+        self._as_of: Optional[date] = None
+        self._row_of: Dict[str, int] = {}
+        self._strategies = 0
+        self._leg_underlying = np.empty(0, dtype=object)
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, subscriber: Subscriber, rows: Sequence[Any]) -> None:
+        """
+        Add ``rows`` (objects exposing ``id`` plus what :func:`stack_book`
+        needs) to ``subscriber`` and start the feed if it is idle.
+        """
+        for row in rows:
+            self._rows[str(row.id)] = row
+        if subscriber not in self.subscribers:
+            self.subscribers.append(subscriber)
+        subscriber.set_strategies(list(dict.fromkeys([*subscriber.strategy_ids, *(str(row.id) for row in rows)])))
+        self._book = None
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        if self.quotes:
+            self._publish([subscriber])
+
+    def unsubscribe(self, subscriber: Subscriber, strategy_ids: Iterable[str]) -> None:
+        dropped = set(strategy_ids)
+        subscriber.set_strategies([sid for sid in subscriber.strategy_ids if sid not in dropped])
+        self._book = None
+
+    def remove(self, subscriber: Subscriber) -> None:
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+        self._book = None
+        if not self.subscribers:
+            self.stop()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _rebuild(self) -> None:
+        """Stack the strategies still subscribed by someone."""
+        wanted = list(dict.fromkeys(sid for sub in self.subscribers for sid in sub.strategy_ids))
+        self._rows = {sid: self._rows[sid] for sid in wanted}
+        rows = [self._rows[sid] for sid in wanted]
+        self._as_of = date.today()
+        self._book = stack_book(rows, self._as_of, self.r)
+        self._row_of = {sid: i for i, sid in enumerate(wanted)}
+        self._strategies = len(wanted)
+        names = np.array([underlying_name(row.parameters).upper() for row in rows], dtype=object)
+        self._leg_underlying = names[self._book.strategy_index] if rows else np.empty(0, dtype=object)
+
+    def on_tick(self, prices: Dict[str, float]) -> None:
+        self.ticks += 1
+        self.quotes.update({name.upper(): float(price) for name, price in prices.items()})
+        self._publish(self.subscribers)
+
+    def _publish(self, subscribers: Sequence[Subscriber]) -> None:
+        """Revalue the whole book once and hand each subscriber its rows."""
+        if self._book is None or self._as_of != date.today():
+            self._rebuild()
+        quotes = np.array([self.quotes.get(name, np.nan) for name in self._leg_underlying.tolist()], dtype=float)
+        table = revalue(self._book, self._strategies, quotes, self.r)
+        for column, decimals in enumerate(FIELDS.values()):
+            table[:, column] = np.round(table[:, column], decimals)
+
+        as_of = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        for subscriber in subscribers:
+            rows = np.array([self._row_of[sid] for sid in subscriber.strategy_ids], dtype=np.intp)
+            subscriber.offer(table, rows, as_of)
+
+    async def _run(self) -> None:
+        async for prices in self.feed_factory():
+            self.on_tick(prices)
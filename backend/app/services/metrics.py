@@ -0,0 +1,215 @@
+"""
+Canonical strategy metrics, materialized onto ``Strategy`` at write time.
+
+Every create/update that touches a strategy's legs recomputes these so that
+dashboards can list and sort by risk straight from indexed columns. Unlimited
+profit / loss are stored as +/-infinity (double precision), which keeps the
+columns non-null and makes ``ORDER BY max_loss`` rank unlimited risk first.
+"""
+import math
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.payoff import CALL, FUT, solve_expiry_profile, stack_leg_sets
+from app.services.pricing import (
+    BLACK76,
+    BLACK_SCHOLES,
+    DEFAULT_RISK_FREE_RATE,
+    implied_volatility,
+    pointwise_leg_greeks,
+    reference_prices,
+    with_implied_vols,
+    year_fraction,
+)
+
+# Rough exchange-style margin for undefined-risk positions, as a fraction of
+# the notional of short options and futures.
+MARGIN_RATE = float(os.getenv("MARGIN_RATE", "0.15"))
+
+METRIC_COLUMNS = (
+    "max_profit",
+    "max_loss",
+    "breakevens",
+    "net_premium",
+    "margin_estimate",
+    "entry_delta",
+    "entry_gamma",
+    "entry_vega",
+    "entry_theta",
+)
+
+
+def compute_metrics_batch(
+    leg_sets: Sequence[Any],
+    parameters_list: Sequence[Optional[Dict[str, Any]]],
+    entry_dates: Sequence[Any],
+    expiry_dates: Sequence[Any],
+    r: float = DEFAULT_RISK_FREE_RATE,
+    solve_vols: bool = False,
+):
+    """
+    Metrics for many strategies in one stacked pass.
+
+    Legs are stacked once, missing entry vols are solved in a single batched
+    call and Greeks / premiums are reduced per strategy with ``bincount``;
+    only the (cheap, sorted) expiry profile is solved strategy by strategy.
+    With ``solve_vols`` every option leg's entry vol is re-solved and written
+    back onto the returned legs, as :func:`new_strategy_values` does.
+
+    Returns ``(leg_sets, results)`` with one ``(columns, profile)`` per strategy.
+    """
+    n = len(leg_sets)
+    legs, counts = stack_leg_sets(leg_sets)
+    owner = np.repeat(np.arange(n), counts)
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+    weight = legs.weight
+    is_option = legs.kind != FUT
+
+    underlying = reference_prices(parameters_list, legs, owner)
+    t = np.array([year_fraction(entry, expiry) for entry, expiry in zip(entry_dates, expiry_dates)])
+    has_futures = np.bincount(owner, weights=~is_option, minlength=n) > 0
+    leg_underlying, leg_t, use_black76 = underlying[owner], t[owner], has_futures[owner]
+    priceable = np.isfinite(leg_underlying)
+
+    vol = legs.implied_vol.copy()
+    unsolved = is_option & priceable & (solve_vols | np.isnan(vol))
+    for model, mask in ((BLACK_SCHOLES, unsolved & ~use_black76), (BLACK76, unsolved & use_black76)):
+        if mask.any():
+            solved = implied_volatility(
+                legs.cost[mask], leg_underlying[mask], legs.strike[mask], leg_t[mask], r,
+                legs.kind[mask] == CALL, model,
+            )
+            vol[mask] = np.round(solved, 6) if solve_vols else solved
+
+    if solve_vols:
+        leg_sets = [
+            with_implied_vols(custom_legs or [], vol[bounds[i]:bounds[i + 1]])
+            if np.isfinite(underlying[i]) else (custom_legs or [])
+            for i, custom_legs in enumerate(leg_sets)
+        ]
+
+    # Positive for a net credit, negative for a net debit
+    net_premium = np.bincount(owner, weights=np.where(is_option, -weight * legs.cost, 0.0), minlength=n)
+
+    notional = np.where(priceable, leg_underlying, legs.strike)
+    exposure = np.where(is_option, np.maximum(-weight, 0.0), np.abs(weight))
+    undefined_margin = MARGIN_RATE * np.bincount(owner, weights=notional * exposure, minlength=n)
+
+    greek_sums = {}
+    if priceable.any():
+        priced_legs = legs[priceable]
+        greeks = pointwise_leg_greeks(
+            priced_legs, leg_underlying[priceable], np.nan_to_num(vol[priceable]),
+            leg_t[priceable], use_black76[priceable], r,
+        )
+        w = np.where(~is_option[priceable] | np.isfinite(vol[priceable]), priced_legs.weight, 0.0)
+        for name, scale in (("delta", 1.0), ("gamma", 1.0), ("vega", 100.0), ("theta", 365.0)):
+            greek_sums[name] = np.bincount(
+                owner[priceable], weights=w * getattr(greeks, name), minlength=n
+            ) / scale
+    has_greeks = np.isfinite(underlying) & (counts > 0)
+
+    results = []
+    for i in range(n):
+        profile = solve_expiry_profile(legs[bounds[i]:bounds[i + 1]])
+        if profile.unlimited_loss:
+            margin = float(undefined_margin[i])
+        else:
+            margin = max(-(profile.max_loss or 0.0), 0.0) + 0.0
+        columns = {
+            "max_profit": math.inf if profile.unlimited_profit else profile.max_profit,
+            "max_loss": -math.inf if profile.unlimited_loss else profile.max_loss,
+            "breakevens": profile.breakevens,
+            "net_premium": float(net_premium[i]) + 0.0,
+            "margin_estimate": margin,
+        }
+        for name in ("delta", "gamma", "vega", "theta"):
+            columns[f"entry_{name}"] = float(greek_sums[name][i]) if has_greeks[i] else None
+        results.append((columns, profile))
+
+    return leg_sets, results
+
+
+def compute_strategy_metrics(
+    custom_legs,
+    parameters: Optional[Dict[str, Any]],
+    entry_date,
+    expiry_date,
+    r: float = DEFAULT_RISK_FREE_RATE,
+):
+    """Return ``(columns, profile)`` for a strategy's legs."""
+    _, results = compute_metrics_batch([custom_legs], [parameters], [entry_date], [expiry_date], r)
+    return results[0]
+
+
+def apply_strategy_metrics(strategy) -> None:
+    """Recompute and assign metric columns (and ``parameters`` risk keys)."""
+    columns, profile = compute_strategy_metrics(
+        strategy.custom_legs,
+        strategy.parameters,
+        strategy.entry_date,
+        strategy.expiry_date,
+    )
+    for name, value in columns.items():
+        setattr(strategy, name, value)
+    strategy.parameters = {**(strategy.parameters or {}), **profile.to_parameters()}
+
+
+def new_strategy_values(
+    user_id,
+    name: str,
+    strategy_type: str,
+    entry_date,
+    expiry_date,
+    parameters: Optional[Dict[str, Any]],
+    custom_legs,
+    notes: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Column values for a new strategy: entry implied vols are solved onto the
+    legs and risk metrics are derived server-side rather than trusted from
+    the client.
+    """
+    return new_strategy_values_batch(user_id, [{
+        "name": name,
+        "strategy_type": strategy_type,
+        "entry_date": entry_date,
+        "expiry_date": expiry_date,
+        "parameters": parameters,
+        "custom_legs": custom_legs,
+        "notes": notes,
+    }])[0]
+
+
+def new_strategy_values_batch(user_id, rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    :func:`new_strategy_values` for many rows (dicts of its keyword
+    arguments) at once, so bulk imports solve vols and metrics per chunk.
+    """
+    leg_sets, results = compute_metrics_batch(
+        [row["custom_legs"] or [] for row in rows],
+        [row["parameters"] for row in rows],
+        [row["entry_date"] for row in rows],
+        [row["expiry_date"] for row in rows],
+        solve_vols=True,
+    )
+
+    values = []
+    for row, custom_legs, (metrics, profile) in zip(rows, leg_sets, results):
+        parameters = {**(row["parameters"] or {}), **profile.to_parameters()}
+        values.append({
+            "user_id": user_id,
+            "name": row["name"],
+            "strategy_type": row["strategy_type"],
+            "entry_date": row["entry_date"],
+            "expiry_date": row["expiry_date"],
+            "parameters": parameters,
+            "custom_legs": custom_legs,
+            "notes": row.get("notes"),
+            "status": "current",
+            "config": {"parameters": parameters},
+            **metrics,
+        })
+    return values
@@ -0,0 +1,166 @@
+"""
+Monte Carlo probability-of-profit and expected-value engine.
+
+Terminal prices are drawn from a lognormal distribution and the strategy's
+expiry payoff is evaluated on each chunk of paths in one broadcasted call.
+Paths are generated in fixed-size chunks (with antithetic pairs) so memory
+stays bounded however many paths are requested; only the P&L samples are
+kept, as float32.
+
+Since every leg expires together, terminal price alone determines P&L, so
+:func:`analytic_lognormal` gives the same statistics exactly by integrating
+the piecewise-linear payoff against the lognormal density.
+"""
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from app.services.payoff import FUT, LegArrays, payoff_curve, solve_expiry_profile
+from app.services.pricing._normal import norm_cdf
+
+DEFAULT_CHUNK_SIZE = 250_000
+DEFAULT_PERCENTILES = (1.0, 5.0, 25.0, 50.0, 75.0, 95.0, 99.0)
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    paths: int
+    probability_of_profit: float
+    expected_pnl: float
+    std_pnl: float
+    percentiles: Dict[str, float]
+    method: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _lognormal_params(spot: float, vol: float, t: float, drift: float):
+    mean = np.log(spot) + (drift - 0.5 * vol * vol) * t
+    return mean, vol * np.sqrt(t)
+
+
+def _deterministic(legs: LegArrays, spot: float, t: float, drift: float, percentiles, paths: int, method: str):
+    """Zero vol or zero time: the terminal price is known."""
+    pnl = float(payoff_curve(legs, np.array([spot * np.exp(drift * t)]))[0])
+    return SimulationResult(
+        paths=paths,
+        probability_of_profit=1.0 if pnl > 0 else 0.0,
+        expected_pnl=pnl,
+        std_pnl=0.0,
+        percentiles={f"p{p:g}": pnl for p in percentiles},
+        method=method,
+    )
+
+
+def simulate(
+    legs: LegArrays,
+    spot: float,
+    vol: float,
+    t: float,
+    drift: float = 0.0,
+    paths: int = 100_000,
+    seed: Optional[int] = None,
+    antithetic: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+) -> SimulationResult:
+    """Simulate ``paths`` terminal prices and summarise the expiry P&L."""
+    if vol <= 0 or t <= 0:
+        return _deterministic(legs, spot, t, drift, percentiles, paths, "monte_carlo")
+
+    rng = np.random.default_rng(seed)
+    mean, stdev = _lognormal_params(spot, vol, t, drift)
+    pnl = np.empty(paths, dtype=np.float32)
+
+    done = 0
+    while done < paths:
+        n = min(chunk_size, paths - done)
+        if antithetic:
+            half = rng.standard_normal((n + 1) // 2)
+            z = np.concatenate((half, -half))[:n]
+        else:
+            z = rng.standard_normal(n)
+        terminal = np.exp(mean + stdev * z)
+        pnl[done:done + n] = payoff_curve(legs, terminal)
+        done += n
+
+    levels = np.percentile(pnl, percentiles) if paths else np.zeros(len(percentiles))
+    return SimulationResult(
+        paths=paths,
+        probability_of_profit=float(np.count_nonzero(pnl > 0) / paths) if paths else 0.0,
+        expected_pnl=float(pnl.mean(dtype=np.float64)) if paths else 0.0,
+        std_pnl=float(pnl.std(dtype=np.float64)) if paths else 0.0,
+        percentiles={f"p{p:g}": float(v) for p, v in zip(percentiles, levels)},
+        method="monte_carlo",
+    )
+
+
+def analytic_lognormal(
+    legs: LegArrays,
+    spot: float,
+    vol: float,
+    t: float,
+    drift: float = 0.0,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+) -> SimulationResult:
+    """
+    Closed-form PoP, mean and standard deviation of expiry P&L.
+
+    On each linear segment ``[a, b)`` between strikes the P&L is
+    ``c + m*S``, so its first two moments only need the lognormal partial
+    expectations ``E[S^k ; a <= S < b]``. PoP is the lognormal mass of the
+    intervals between breakevens where the payoff is positive.
+    Percentiles are read off by inverting the monotone pieces on a fine grid.
+    """
+    if vol <= 0 or t <= 0:
+        return _deterministic(legs, spot, t, drift, percentiles, 0, "analytic")
+
+    mean, stdev = _lognormal_params(spot, vol, t, drift)
+    profile = solve_expiry_profile(legs)
+
+    strikes = np.unique(legs.strike[legs.is_open & (legs.kind != FUT) & (legs.strike > 0)])
+    edges = np.concatenate(([0.0], strikes, [np.inf]))
+    lo, hi = edges[:-1], edges[1:]
+    # Evaluate each segment's line from two interior points
+    probe_a = np.where(np.isfinite(hi), lo + 0.25 * (hi - lo), lo + 1.0)
+    probe_b = np.where(np.isfinite(hi), lo + 0.75 * (hi - lo), lo + 2.0)
+    va, vb = payoff_curve(legs, probe_a), payoff_curve(legs, probe_b)
+    slope = (vb - va) / (probe_b - probe_a)
+    intercept = va - slope * probe_a
+
+    def partial(k, a, b):
+        # E[S^k ; a <= S < b] for log S ~ N(mean, stdev^2)
+        with np.errstate(divide="ignore"):
+            za = np.where(a > 0, (np.log(np.maximum(a, 1e-300)) - mean) / stdev, -np.inf)
+            zb = np.where(np.isfinite(b), (np.log(np.where(np.isfinite(b), b, 1.0)) - mean) / stdev, np.inf)
+        scale = np.exp(k * mean + 0.5 * k * k * stdev * stdev)
+        return scale * (norm_cdf(zb - k * stdev) - norm_cdf(za - k * stdev))
+
+    p0, p1, p2 = partial(0, lo, hi), partial(1, lo, hi), partial(2, lo, hi)
+    expected = float(np.sum(intercept * p0 + slope * p1))
+    second = float(np.sum(intercept ** 2 * p0 + 2 * intercept * slope * p1 + slope ** 2 * p2))
+
+    # Profitable intervals lie between consecutive breakevens (and the tails)
+    cuts = np.concatenate(([0.0], profile.breakevens, [np.inf]))
+    mids = np.where(np.isfinite(cuts[1:]), 0.5 * (cuts[:-1] + cuts[1:]), cuts[:-1] + 1.0)
+    profitable = payoff_curve(legs, mids) > 0
+    pop = float(np.sum(partial(0, cuts[:-1], cuts[1:])[profitable]))
+
+    # Percentiles of P&L from the terminal price quantiles on a dense grid
+    z = np.linspace(-8.0, 8.0, 20001)
+    weights = np.diff(norm_cdf(z), prepend=0.0)
+    grid_pnl = payoff_curve(legs, np.exp(mean + stdev * z))
+    order = np.argsort(grid_pnl, kind="stable")
+    cdf = np.cumsum(weights[order]) / weights.sum()
+    levels = [float(grid_pnl[order][min(np.searchsorted(cdf, p / 100.0), cdf.size - 1)]) for p in percentiles]
+
+    return SimulationResult(
+        paths=0,
+        probability_of_profit=pop,
+        expected_pnl=expected,
+        std_pnl=float(np.sqrt(max(second - expected * expected, 0.0))),
+        percentiles={f"p{p:g}": v for p, v in zip(percentiles, levels)},
+        method="analytic",
+    )
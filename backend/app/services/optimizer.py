@@ -0,0 +1,450 @@
+"""
+Strike and quantity optimizer for the quick strategy templates.
+
+A template fixes the legs' kinds, sides and ratios; the optimizer picks a
+strike for every option leg from one expiry of the chain, and a lot count
+for the whole position, that best meet an objective:
+
+* ``max_ev``           -- largest expected expiry P&L under a lognormal
+                          terminal price (optionally within a max-loss budget)
+* ``target_max_loss``  -- max loss as close to a target as the chain allows,
+                          without exceeding it
+* ``delta_neutral``    -- net delta within a tolerance of zero
+
+Every per-leg quantity the objectives need (premium, delta, theta and the
+lognormal expected payoff) is tabulated once per strike, so a candidate is
+only a row of indices into those tables. The search is coordinate descent:
+each move re-optimizes one free leg, or a pair of free legs jointly, over
+every strike at once as a vectorized batch, and the best few settings of
+disjoint pairs are crossed so four legs can move together. Sweeps repeat
+until nothing improves. Templates with one or two free strikes are
+therefore solved exhaustively; for the iron condor the result is a local
+optimum, and ``restarts`` adds descents from the best points of a coarse
+grid when a more thorough search is worth the time. The lot count is not
+searched at all:
+P&L, risk and delta all scale linearly with it, so each objective picks
+the best count per candidate in closed form.
+"""
+import itertools
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.exits import leg_number
+from app.services.payoff import CALL, FUT, PUT
+from app.services.pricing import black76_price
+from app.services.screener import ChainBook
+
+MAX_EV = "max_ev"
+TARGET_MAX_LOSS = "target_max_loss"
+DELTA_NEUTRAL = "delta_neutral"
+OBJECTIVES = (MAX_EV, TARGET_MAX_LOSS, DELTA_NEUTRAL)
+
+# A max loss within this fraction of the target counts as on target, so
+# expected value decides between near-equal fits
+TARGET_TOLERANCE = 0.01
+MAX_SWEEPS = 20
+# Pair settings kept per move for crossing, and the per-leg width of the restart grid
+BEAM_WIDTH = 32
+COARSE_STEPS = 12
+
+
+@dataclass(frozen=True)
+class TemplateLeg:
+    """
+    One leg of a template. ``moneyness`` (strike / spot) seeds the search.
+    A leg with ``same_as`` takes that leg's strike; one with ``mirror_of``
+    ``(a, b)`` sits at ``2*K[a] - K[b]``. Neither is searched on its own.
+    """
+
+    kind: int
+    side: float
+    ratio: float = 1.0
+    moneyness: float = 1.0
+    same_as: Optional[int] = None
+    mirror_of: Optional[Tuple[int, int]] = None
+
+    @property
+    def free(self) -> bool:
+        return self.kind != FUT and self.same_as is None and self.mirror_of is None
+
+
+@dataclass(frozen=True)
+class Template:
+    legs: Tuple[TemplateLeg, ...]
+    ascending: bool = False  # option strikes strictly increase in leg order
+
+
+# Seeds follow QuickStrategyTemplates (strikes relative to its 18000 base)
+TEMPLATES: Dict[str, Template] = {
+    "covered-call": Template((TemplateLeg(FUT, 1.0), TemplateLeg(CALL, -1.0, moneyness=1.055))),
+    "protective-put": Template((TemplateLeg(FUT, 1.0), TemplateLeg(PUT, 1.0, moneyness=0.972))),
+    "long-straddle": Template((TemplateLeg(CALL, 1.0), TemplateLeg(PUT, 1.0, same_as=0))),
+    "iron-condor": Template(
+        (
+            TemplateLeg(PUT, 1.0, moneyness=0.944),
+            TemplateLeg(PUT, -1.0, moneyness=0.972),
+            TemplateLeg(CALL, -1.0, moneyness=1.028),
+            TemplateLeg(CALL, 1.0, moneyness=1.056),
+        ),
+        ascending=True,
+    ),
+    "butterfly": Template(
+        (
+            TemplateLeg(CALL, 1.0, moneyness=0.972),
+            TemplateLeg(CALL, -1.0, ratio=2.0),
+            TemplateLeg(CALL, 1.0, mirror_of=(1, 0)),
+        ),
+        ascending=True,
+    ),
+}
+
+
+@dataclass(frozen=True)
+class Objective:
+    """
+    What to optimize. ``max_loss`` is the budget for ``max_ev`` and
+    ``delta_neutral`` and the target for ``target_max_loss``, per position.
+    ``delta_tolerance`` is in units of the underlying.
+    """
+
+    name: str = MAX_EV
+    max_loss: Optional[float] = None
+    max_lots: int = 10
+    delta_tolerance: float = 1.0
+
+
+@dataclass
+class LegTable:
+    """Per-unit values of every strike one leg may take, strikes ascending."""
+
+    strike: np.ndarray
+    premium: np.ndarray
+    iv: np.ndarray
+    delta: np.ndarray
+    theta: np.ndarray
+    expected: np.ndarray  # lognormal expected payoff at expiry
+
+
+@dataclass
+class OptimizeResult:
+    strikes: np.ndarray    # per leg; a future's entry price
+    premiums: np.ndarray
+    ivs: np.ndarray
+    lots: int
+    metrics: Dict[str, float]
+    evaluations: int
+    sweeps: int
+
+
+def leg_tables(book: ChainBook, template: Template, future_price: float, vol: float, drift: float) -> List[LegTable]:
+    """Tabulate each leg's candidate strikes; a future has a single row."""
+    forward = book.spot * np.exp(drift * book.t)
+    tables = []
+    for leg in template.legs:
+        if leg.kind == FUT:
+            one = np.ones(1)
+            tables.append(LegTable(
+                strike=one * future_price,
+                premium=one * future_price,
+                iv=one * np.nan,
+                delta=one,
+                theta=one * 0.0,
+                expected=one * forward,
+            ))
+            continue
+        rows = book.rows(leg.kind)
+        strike = book.strike[rows]
+        tables.append(LegTable(
+            strike=strike,
+            premium=book.premium[rows],
+            iv=book.iv[rows],
+            delta=book.delta[rows],
+            theta=book.theta[rows],
+            # Undiscounted Black-76 on the drifted forward is E[payoff]
+            expected=black76_price(forward, strike, vol, book.t, 0.0, leg.kind == CALL),
+        ))
+    return tables
+
+
+def _expand(template: Template, tables: List[LegTable], free: List[int], choice: np.ndarray):
+    """
+    Leg indices ``(n, L)`` for free-leg choices ``(n, F)``, and which
+    candidates are valid (derived strikes listed, ordering respected).
+    """
+    n = choice.shape[0]
+    index = np.zeros((n, len(template.legs)), dtype=np.int64)
+    strike = np.zeros(index.shape)
+    valid = np.ones(n, dtype=bool)
+    index[:, free] = choice
+    for i in free:
+        strike[:, i] = tables[i].strike[choice[:, free.index(i)]]
+    for i, leg in enumerate(template.legs):
+        if leg.free:
+            continue
+        if leg.kind == FUT:
+            strike[:, i] = tables[i].strike[0]
+            continue
+        if leg.same_as is not None:
+            wanted = strike[:, leg.same_as]
+        else:
+            a, b = leg.mirror_of
+            wanted = 2.0 * strike[:, a] - strike[:, b]
+        listed = tables[i].strike
+        at = np.minimum(np.searchsorted(listed, wanted), listed.size - 1)
+        valid &= np.abs(listed[at] - wanted) < 1e-6
+        index[:, i] = at
+        strike[:, i] = listed[at]
+
+    if template.ascending:
+        options = [i for i, leg in enumerate(template.legs) if leg.kind != FUT]
+        valid &= np.all(np.diff(strike[:, options], axis=1) > 0, axis=1)
+    return index, strike, valid
+
+
+def _per_lot_metrics(template: Template, tables: List[LegTable], index: np.ndarray, strike: np.ndarray, lot_size: float):
+    """Expected value, risk and Greeks of one lot of each candidate."""
+    signed = np.array([leg.side * leg.ratio for leg in template.legs]) * lot_size
+    kinds = np.array([leg.kind for leg in template.legs])
+
+    def gather(field):
+        return np.stack([getattr(table, field)[index[:, i]] for i, table in enumerate(tables)], axis=1)
+
+    premium = gather("premium")
+    expected_value = (gather("expected") - premium) @ signed
+
+    # Piecewise-linear payoff: check the kinks and S = 0, and the slope past the last strike
+    x = np.concatenate((np.zeros((strike.shape[0], 1)), strike[:, kinds != FUT]), axis=1)
+    value = np.repeat(-(premium @ signed)[:, None], x.shape[1], axis=1)
+    for i, kind in enumerate(kinds.tolist()):
+        k = strike[:, i, None]
+        if kind == CALL:
+            value += signed[i] * np.maximum(x - k, 0.0)
+        elif kind == PUT:
+            value += signed[i] * np.maximum(k - x, 0.0)
+        else:
+            value += signed[i] * x
+    tail = signed[kinds != PUT].sum()
+    max_loss = np.where(tail < 0, np.inf, -value.min(axis=1))
+    max_profit = np.where(tail > 0, np.inf, value.max(axis=1))
+    return {
+        "expected_value": expected_value,
+        "max_loss": max_loss,
+        "max_profit": max_profit,
+        "net_premium": -(premium[:, kinds != FUT] @ signed[kinds != FUT]),
+        "delta": gather("delta") @ signed,
+        "theta": gather("theta") @ signed,
+    }
+
+
+def _score(objective: Objective, metrics: Dict[str, np.ndarray], valid: np.ndarray):
+    """
+    ``(primary, secondary, lots)`` per candidate: lower primary wins, ties
+    go to higher secondary (expected value). Infeasible ones get ``inf``.
+    """
+    ev, loss, delta = metrics["expected_value"], metrics["max_loss"], metrics["delta"]
+    most = objective.max_lots
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if objective.max_loss is not None:
+            affordable = np.where(loss > 0, np.floor(objective.max_loss / loss), most)
+            cap = np.minimum(np.nan_to_num(affordable, posinf=most, neginf=0.0), most)
+        else:
+            cap = np.full(ev.shape, float(most))
+
+        if objective.name == TARGET_MAX_LOSS:
+            target = objective.max_loss
+            lots = np.clip(np.floor(target / loss), 1, most)
+            lots = np.where(np.isfinite(lots), lots, 1.0)
+            gap = target - loss * lots
+            feasible = np.isfinite(loss) & (loss > 0) & (gap >= 0)
+            primary = np.floor(gap / (TARGET_TOLERANCE * target))
+        elif objective.name == DELTA_NEUTRAL:
+            # More lots only while the whole position stays inside the tolerance
+            within = np.floor(objective.delta_tolerance / np.abs(delta))
+            lots = np.where(ev > 0, np.clip(np.minimum(within, cap), 1, None), 1.0)
+            feasible = cap >= 1
+            primary = np.floor(np.abs(delta) * lots / objective.delta_tolerance)
+        else:
+            lots = np.where(ev > 0, cap, 1.0)
+            feasible = cap >= 1
+            primary = np.zeros(ev.shape)
+
+    # Risk-free candidates are data artefacts, not trades
+    feasible &= valid & np.isfinite(ev) & (loss > 0)
+    return (
+        np.where(feasible, primary, np.inf),
+        np.where(feasible, ev * lots, -np.inf),
+        np.where(feasible, lots, 1.0).astype(np.int64),
+    )
+
+
+def _better(candidate: Tuple[float, float], best: Tuple[float, float]) -> bool:
+    tolerance = 1e-9 * max(1.0, abs(best[1])) if np.isfinite(best[1]) else 0.0
+    return candidate[0] < best[0] or (candidate[0] == best[0] and candidate[1] > best[1] + tolerance)
+
+
+class _Search:
+    """Vectorized evaluation and coordinate descent over the free legs' strike indices."""
+
+    def __init__(self, template, tables, objective, lot_size):
+        self.template = template
+        self.tables = tables
+        self.objective = objective
+        self.lot_size = lot_size
+        self.free = [i for i, leg in enumerate(template.legs) if leg.free]
+        self.sizes = [tables[i].strike.size for i in self.free]
+        self.moves = [(f,) for f in range(len(self.free))] + list(itertools.combinations(range(len(self.free)), 2))
+        self.evaluations = 0
+        self.sweeps = 0
+
+    def ordered(self, choice: np.ndarray) -> np.ndarray:
+        """Cheap pre-filter: free strikes must already ascend for an ascending template."""
+        if not self.template.ascending or choice.shape[1] < 2:
+            return choice
+        strike = np.stack([self.tables[self.free[f]].strike[choice[:, f]] for f in range(choice.shape[1])], axis=1)
+        return choice[np.all(np.diff(strike, axis=1) > 0, axis=1)]
+
+    def evaluate(self, choice: np.ndarray):
+        self.evaluations += choice.shape[0]
+        index, strike, valid = _expand(self.template, self.tables, self.free, choice)
+        return _score(self.objective, _per_lot_metrics(self.template, self.tables, index, strike, self.lot_size), valid)
+
+    def coarse_seeds(self, count: int) -> np.ndarray:
+        """Best ``count`` points of an evenly spaced grid, built leg by leg so unordered prefixes are dropped early."""
+        choice = np.zeros((1, 0), dtype=np.int64)
+        for size in self.sizes:
+            picks = np.unique(np.linspace(0, size - 1, min(size, COARSE_STEPS)).round().astype(np.int64))
+            choice = np.concatenate(
+                (np.repeat(choice, picks.size, axis=0), np.tile(picks, choice.shape[0])[:, None]), axis=1
+            )
+            choice = self.ordered(choice)
+        if not choice.shape[0]:
+            return choice
+        primary, secondary, _ = self.evaluate(choice)
+        order = np.lexsort((-secondary, primary))[:count]
+        return choice[order[np.isfinite(primary[order])]]
+
+    def descend(self, state: np.ndarray):
+        """
+        Single- and pair-leg moves until none improves. Each pair move also
+        keeps its best few settings, and settings of disjoint pairs are then
+        crossed, so the search can change up to four legs in one step.
+        """
+        primary, secondary, _ = self.evaluate(state[None, :])
+        best = (primary[0], secondary[0])
+        for _ in range(MAX_SWEEPS):
+            self.sweeps += 1
+            improved = False
+            beams = {}
+            for move in self.moves:
+                axes = np.meshgrid(*(np.arange(self.sizes[f]) for f in move), indexing="ij")
+                choice = np.repeat(state[None, :], axes[0].size, axis=0)
+                for f, axis in zip(move, axes):
+                    choice[:, f] = axis.ravel()
+                choice = self.ordered(choice)
+                if not choice.shape[0]:
+                    continue
+                primary, secondary, _ = self.evaluate(choice)
+                order = np.lexsort((-secondary, primary))
+                if len(move) == 2:
+                    beams[move] = choice[order[:BEAM_WIDTH]][:, move]
+                top = order[0]
+                if _better((primary[top], secondary[top]), best):
+                    state, best, improved = choice[top], (primary[top], secondary[top]), True
+
+            for first, second in itertools.combinations(beams, 2):
+                if set(first) & set(second):
+                    continue
+                a, b = beams[first], beams[second]
+                choice = np.repeat(state[None, :], a.shape[0] * b.shape[0], axis=0)
+                choice[:, first] = np.repeat(a, b.shape[0], axis=0)
+                choice[:, second] = np.tile(b, (a.shape[0], 1))
+                choice = self.ordered(choice)
+                if not choice.shape[0]:
+                    continue
+                primary, secondary, _ = self.evaluate(choice)
+                top = np.lexsort((-secondary, primary))[0]
+                if _better((primary[top], secondary[top]), best):
+                    state, best, improved = choice[top], (primary[top], secondary[top]), True
+            if not improved:
+                break
+        return state, best
+
+
+def optimize(
+    book: ChainBook,
+    template: Template,
+    objective: Objective,
+    lot_size: float,
+    future_price: Optional[float] = None,
+    vol: Optional[float] = None,
+    drift: Optional[float] = None,
+    restarts: int = 0,
+) -> Optional[OptimizeResult]:
+    """
+    Best strikes and lot count for ``template``; ``None`` when no candidate
+    is feasible. ``vol`` and ``drift`` define the lognormal and default to
+    the chain's ATM implied volatility and the risk-free rate.
+    """
+    if objective.name not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective.name}")
+    if objective.name == TARGET_MAX_LOSS and not objective.max_loss:
+        raise ValueError("target_max_loss needs a positive max_loss")
+    vol = book.atm_vol if vol is None else vol
+    drift = book.r if drift is None else drift
+    if future_price is None:
+        future_price = book.spot * np.exp(book.r * book.t)
+    tables = leg_tables(book, template, future_price, vol, drift)
+    search = _Search(template, tables, objective, lot_size)
+    if any(size == 0 for size in search.sizes):
+        return None
+
+    seed = np.array(
+        [np.argmin(np.abs(tables[i].strike - book.spot * template.legs[i].moneyness)) for i in search.free],
+        dtype=np.int64,
+    )
+    # Up to two free legs the pair move is already exhaustive
+    starts = [seed, *search.coarse_seeds(restarts)] if restarts and len(search.free) > 2 else [seed]
+    state, best = None, (np.inf, -np.inf)
+    for start in starts:
+        found, score = search.descend(start)
+        if state is None or _better(score, best):
+            state, best = found, score
+
+    if not np.isfinite(best[0]):
+        return None
+    index, strike, valid = _expand(template, tables, search.free, state[None, :])
+    metrics = _per_lot_metrics(template, tables, index, strike, lot_size)
+    _, _, lots = _score(objective, metrics, valid)
+    lots = int(lots[0])
+    return OptimizeResult(
+        strikes=strike[0],
+        premiums=np.array([table.premium[i] for table, i in zip(tables, index[0].tolist())]),
+        ivs=np.array([table.iv[i] for table, i in zip(tables, index[0].tolist())]),
+        lots=lots,
+        metrics={name: float(values[0] * lots) for name, values in metrics.items()},
+        evaluations=search.evaluations,
+        sweeps=search.sweeps,
+    )
+
+
+def optimized_legs(template: Template, result: OptimizeResult, lot_size: float) -> List[Dict[str, Any]]:
+    """The chosen position as legs in the frontend's custom_legs shape."""
+    legs = []
+    for leg, strike, premium, iv in zip(template.legs, result.strikes.tolist(), result.premiums.tolist(), result.ivs.tolist()):
+        record = {
+            "position": "buy" if leg.side > 0 else "sell",
+            "quantity": leg_number(leg.ratio * lot_size * result.lots),
+        }
+        if leg.kind == FUT:
+            record.update(instrumentType="fut", entryPrice=leg_number(round(strike, 2)))
+        else:
+            record.update(
+                instrumentType="call" if leg.kind == CALL else "put",
+                strike=leg_number(strike),
+                premium=leg_number(premium),
+                impliedVol=iv,
+            )
+        legs.append(record)
+    return legs
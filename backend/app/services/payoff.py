@@ -0,0 +1,281 @@
+"""
+Vectorized expiry payoff engine.
+
+Legs arrive in the same shape the frontend stores them in ``custom_legs``
+(string fields, camelCase keys). They are parsed once into flat NumPy arrays
+so a whole strategy can be evaluated against a full price grid with a single
+broadcasted operation instead of a per-leg / per-price loop.
+"""
+import os
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+CALL = 0
+PUT = 1
+FUT = 2
+
+_KIND_CODES = {"call": CALL, "put": PUT, "fut": FUT}
+
+# Batch valuation limits: strategies x prices in one response, and legs x
+# prices held in memory at once while computing it
+PAYOFF_BATCH_MAX_CELLS = int(os.getenv("PAYOFF_BATCH_MAX_CELLS", "2000000"))
+PAYOFF_CHUNK_CELLS = int(os.getenv("PAYOFF_CHUNK_CELLS", "1000000"))
+KIND_NAMES = {code: name for name, code in _KIND_CODES.items()}
+
+
+def kind_code(instrument_type: Any) -> int:
+    """Kind of a leg's ``instrumentType``; anything unrecognised prices as a call."""
+    return _KIND_CODES.get(str(instrument_type).lower(), CALL)
+
+
+def side_sign(position: Any) -> float:
+    """-1.0 for ``"sell"`` (any case), +1.0 for anything else."""
+    return -1.0 if str(position).lower() == "sell" else 1.0
+
+
+def _to_float(value: Any, default: float = 0.0) -> float:
+    """Mirror of JS ``parseFloat(x) || default`` for leg fields."""
+    if value is None or value == "":
+        return default
+    try:
+        result = float(value)
+    except (TypeError, ValueError):
+        return default
+    return result if np.isfinite(result) else default
+
+
+@dataclass(frozen=True)
+class LegArrays:
+    """Column-oriented view of a list of legs."""
+
+    kind: np.ndarray        # int8: CALL / PUT / FUT
+    side: np.ndarray        # +1.0 buy, -1.0 sell
+    quantity: np.ndarray
+    strike: np.ndarray      # option strike, or entry price for futures
+    cost: np.ndarray        # entry premium for options, entry price for futures
+    exit_value: np.ndarray  # exit premium / exit price, NaN while open
+    implied_vol: np.ndarray  # persisted entry implied volatility, NaN if unsolved
+
+    @classmethod
+    def from_legs(cls, legs: Optional[Sequence[Dict[str, Any]]]) -> "LegArrays":
+        legs = legs or []
+        n = len(legs)
+        kind = np.empty(n, dtype=np.int8)
+        side = np.empty(n)
+        quantity = np.empty(n)
+        strike = np.empty(n)
+        cost = np.empty(n)
+        exit_value = np.empty(n)
+        implied_vol = np.empty(n)
+
+        for i, leg in enumerate(legs):
+            code = kind_code(leg.get("instrumentType", "call"))
+            kind[i] = code
+            side[i] = side_sign(leg.get("position", "buy"))
+            quantity[i] = _to_float(leg.get("quantity"))
+            if code == FUT:
+                strike[i] = cost[i] = _to_float(leg.get("entryPrice"))
+                exit_value[i] = _to_float(leg.get("exitPrice"), np.nan)
+            else:
+                strike[i] = _to_float(leg.get("strike"))
+                cost[i] = _to_float(leg.get("premium"))
+                exit_value[i] = _to_float(leg.get("exitPremium"), np.nan)
+            implied_vol[i] = _to_float(leg.get("impliedVol"), np.nan)
+
+        return cls(kind, side, quantity, strike, cost, exit_value, implied_vol)
+
+    def __len__(self) -> int:
+        return self.kind.shape[0]
+
+    def __getitem__(self, index) -> "LegArrays":
+        """Subset of the legs (slice, boolean mask or index array)."""
+        return LegArrays(*(getattr(self, field.name)[index] for field in fields(self)))
+
+    @property
+    def weight(self) -> np.ndarray:
+        """Signed position size per leg."""
+        return self.side * self.quantity
+
+    @property
+    def is_open(self) -> np.ndarray:
+        return np.isnan(self.exit_value)
+
+
+def price_grid(underlying_price: float, price_range_percent: float, points: int) -> np.ndarray:
+    """Evenly spaced underlying prices around ``underlying_price``."""
+    half_width = underlying_price * price_range_percent / 100.0
+    low = max(underlying_price - half_width, 0.0)
+    return np.linspace(low, underlying_price + half_width, points)
+
+
+def leg_marks(legs: LegArrays, prices: np.ndarray) -> np.ndarray:
+    """
+    Per-leg value at expiry for every price, shape ``(n_legs, n_prices)``.
+
+    Options are worth their intrinsic value, futures are marked at the
+    underlying price; legs with a recorded exit are frozen at that exit.
+    """
+    s = np.asarray(prices, dtype=float)[np.newaxis, :]
+    k = legs.strike[:, np.newaxis]
+    kind = legs.kind[:, np.newaxis]
+
+    marks = np.where(
+        kind == CALL,
+        np.maximum(s - k, 0.0),
+        np.where(kind == PUT, np.maximum(k - s, 0.0), s),
+    )
+    closed = ~legs.is_open
+    if closed.any():
+        marks[closed, :] = legs.exit_value[closed, np.newaxis]
+    return marks
+
+
+def payoff_curve(legs: LegArrays, prices: np.ndarray) -> np.ndarray:
+    """Total strategy P&L at expiry for every price in ``prices``."""
+    prices = np.asarray(prices, dtype=float)
+    if len(legs) == 0:
+        return np.zeros_like(prices)
+    weight = legs.weight
+    return weight @ leg_marks(legs, prices) - weight @ legs.cost
+
+
+def stack_leg_sets(leg_sets: Sequence[Optional[Sequence[Dict[str, Any]]]]):
+    """
+    Flatten several strategies' legs into one ragged ``LegArrays``.
+
+    Returns the stacked legs and the number of legs belonging to each
+    strategy, in order, for use with :func:`segment_payoff`.
+    """
+    counts = np.fromiter((len(legs or []) for legs in leg_sets), dtype=np.intp, count=len(leg_sets))
+    flat = [leg for legs in leg_sets for leg in (legs or [])]
+    return LegArrays.from_legs(flat), counts
+
+
+def segment_payoff(legs: LegArrays, counts: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    """
+    Expiry P&L of many strategies at once, shape ``(n_strategies, n_prices)``.
+
+    Every leg is valued in one broadcasted pass and the per-leg rows are
+    reduced into their strategy with a segment sum.
+    """
+    prices = np.asarray(prices, dtype=float)
+    result = np.zeros((counts.size, prices.size))
+    if len(legs) == 0:
+        return result
+
+    per_leg = legs.weight[:, np.newaxis] * (leg_marks(legs, prices) - legs.cost[:, np.newaxis])
+    non_empty = counts > 0
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result[non_empty] = np.add.reduceat(per_leg, starts[non_empty], axis=0)
+    return result
+
+
+def batch_payoff(
+    leg_sets: Sequence[Optional[Sequence[Dict[str, Any]]]],
+    prices: np.ndarray,
+    chunk_cells: int = PAYOFF_CHUNK_CELLS,
+) -> np.ndarray:
+    """
+    :func:`segment_payoff` of ``leg_sets``, shape ``(n_strategies, n_prices)``,
+    stacked in runs of strategies whose per-leg matrix stays within
+    ``chunk_cells`` values (a single strategy is never split).
+    """
+    prices = np.asarray(prices, dtype=float)
+    result = np.zeros((len(leg_sets), prices.size))
+    max_legs = max(chunk_cells // max(prices.size, 1), 1)
+    start = 0
+    while start < len(leg_sets):
+        stop, legs_in_chunk = start, 0
+        while stop < len(leg_sets) and (stop == start or legs_in_chunk + len(leg_sets[stop] or []) <= max_legs):
+            legs_in_chunk += len(leg_sets[stop] or [])
+            stop += 1
+        legs, counts = stack_leg_sets(leg_sets[start:stop])
+        result[start:stop] = segment_payoff(legs, counts, prices)
+        start = stop
+    return result
+
+
+@dataclass(frozen=True)
+class PayoffProfile:
+    """Exact expiry risk profile of a strategy over prices in ``[0, inf)``."""
+
+    max_profit: Optional[float]  # None when profit is unlimited
+    max_loss: Optional[float]    # None when loss is unlimited
+    unlimited_profit: bool
+    unlimited_loss: bool
+    breakevens: List[float]
+
+    def to_parameters(self) -> Dict[str, Any]:
+        """Keys merged into ``Strategy.parameters`` (frontend naming)."""
+        return {
+            "maxProfit": self.max_profit,
+            "maxLoss": self.max_loss,
+            "unlimitedProfit": self.unlimited_profit,
+            "unlimitedLoss": self.unlimited_loss,
+            "breakevens": self.breakevens,
+        }
+
+
+def solve_expiry_profile(legs: LegArrays) -> PayoffProfile:
+    """
+    Solve max profit, max loss and breakevens analytically.
+
+    The expiry payoff is piecewise linear with kinks only at open option
+    strikes, and the slope changes by the leg's signed size at each kink (for
+    calls and puts alike). Sorting the strikes and taking a cumulative sum of
+    those slope changes gives the value at every kink, so extremes and roots
+    are exact and the cost is O(n log n) in the number of legs.
+    """
+    if len(legs) == 0:
+        return PayoffProfile(0.0, 0.0, False, False, [])
+
+    weight = legs.weight
+    is_open = legs.is_open
+    strike = np.maximum(legs.strike, 0.0)
+    is_call = is_open & (legs.kind == CALL)
+    is_put = is_open & (legs.kind == PUT)
+    is_fut = is_open & (legs.kind == FUT)
+
+    # Realized legs contribute a constant; open legs pay their entry cost.
+    constant = np.sum(np.where(is_open, -weight * legs.cost, weight * (legs.exit_value - legs.cost)))
+    value_at_zero = constant + np.sum(weight[is_put] * strike[is_put])
+
+    has_kink = (is_call | is_put) & (strike > 0)
+    slope_at_zero = (
+        weight[is_fut].sum()
+        + weight[is_call & ~has_kink].sum()
+        - weight[is_put & has_kink].sum()
+    )
+
+    kinks, inverse = np.unique(strike[has_kink], return_inverse=True)
+    slope_change = np.bincount(inverse, weights=weight[has_kink], minlength=kinks.size)
+
+    xs = np.concatenate(([0.0], kinks))
+    slopes = slope_at_zero + np.concatenate(([0.0], np.cumsum(slope_change)))
+    values = value_at_zero + np.concatenate(([0.0], np.cumsum(slopes[:-1] * np.diff(xs))))
+
+    scale = max(1.0, float(np.abs(values).max()))
+    values = np.where(np.abs(values) <= 1e-9 * scale, 0.0, values)
+    tail_slope = float(slopes[-1])
+    if abs(tail_slope) <= 1e-12 * max(1.0, float(np.abs(weight).sum())):
+        tail_slope = 0.0
+
+    # Roots inside finite segments, at kinks, and on the right-hand ray.
+    y0, y1 = values[:-1], values[1:]
+    crossing = y0 * y1 < 0
+    roots = xs[:-1][crossing] - y0[crossing] / slopes[:-1][crossing]
+    breakevens = np.concatenate((roots, xs[values == 0]))
+    if values[-1] * tail_slope < 0:
+        breakevens = np.append(breakevens, xs[-1] - values[-1] / tail_slope)
+
+    unlimited_profit = tail_slope > 0
+    unlimited_loss = tail_slope < 0
+    return PayoffProfile(
+        max_profit=None if unlimited_profit else float(values.max()),
+        max_loss=None if unlimited_loss else float(values.min()),
+        unlimited_profit=unlimited_profit,
+        unlimited_loss=unlimited_loss,
+        breakevens=np.unique(breakevens).tolist(),
+    )
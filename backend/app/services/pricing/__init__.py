@@ -0,0 +1,52 @@
+"""Vectorized option pricing: Black-Scholes, Black-76 and leg valuation."""
+from app.services.pricing.models import (
+    Greeks,
+    black76_greeks,
+    black76_price,
+    black_scholes_greeks,
+    black_scholes_price,
+)
+from app.services.pricing.legs import (
+    BLACK76,
+    BLACK_SCHOLES,
+    DAYS_PER_YEAR,
+    DEFAULT_RISK_FREE_RATE,
+    leg_greeks,
+    mark_legs,
+    pointwise_leg_greeks,
+    pointwise_leg_values,
+    pricing_model,
+    reference_price,
+    reference_prices,
+    theoretical_pnl,
+    year_fraction,
+)
+from app.services.pricing.implied_vol import (
+    implied_volatility,
+    solve_leg_vols,
+    with_implied_vols,
+)
+
+__all__ = [
+    "Greeks",
+    "black76_greeks",
+    "black76_price",
+    "black_scholes_greeks",
+    "black_scholes_price",
+    "BLACK76",
+    "BLACK_SCHOLES",
+    "DAYS_PER_YEAR",
+    "DEFAULT_RISK_FREE_RATE",
+    "leg_greeks",
+    "mark_legs",
+    "pointwise_leg_greeks",
+    "pointwise_leg_values",
+    "pricing_model",
+    "reference_price",
+    "reference_prices",
+    "theoretical_pnl",
+    "year_fraction",
+    "implied_volatility",
+    "solve_leg_vols",
+    "with_implied_vols",
+]
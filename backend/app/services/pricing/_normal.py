@@ -0,0 +1,60 @@
+"""Vectorized standard normal density and distribution functions."""
+import numpy as np
+
+_INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+_INV_SQRT_2 = 1.0 / np.sqrt(2.0)
+
+
+def norm_pdf(x):
+    x = np.asarray(x, dtype=float)
+    return _INV_SQRT_2PI * np.exp(-0.5 * x * x)
+
+
+def _erfc(x):
+    # Chebyshev fit from Numerical Recipes, fractional error below 1.2e-7
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = -z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418
+        + t * (-0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587
+        + t * (-0.82215223 + t * 0.17087277))))))))
+    ans = t * np.exp(poly)
+    return np.where(x >= 0, ans, 2.0 - ans)
+
+
+def norm_cdf(x):
+    x = np.asarray(x, dtype=float)
+    return 0.5 * _erfc(-x * _INV_SQRT_2)
+
+
+# Acklam's rational approximation, relative error below 1.2e-9
+_PPF_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+          1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_PPF_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+          6.680131188771972e+01, -1.328068155288572e+01)
+_PPF_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+          -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_PPF_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+          3.754408661907416e+00)
+_PPF_LOW = 0.02425
+
+
+def _polyval(coefficients, x):
+    result = np.zeros_like(x)
+    for c in coefficients:
+        result = result * x + c
+    return result
+
+
+def norm_ppf(p):
+    """Inverse of :func:`norm_cdf`; NaN outside ``(0, 1)``."""
+    p = np.asarray(p, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q = p - 0.5
+        r = q * q
+        central = q * _polyval(_PPF_A, r) / (_polyval(_PPF_B, r) * r + 1.0)
+        tail_p = np.where(q < 0, p, 1.0 - p)
+        s = np.sqrt(-2.0 * np.log(tail_p))
+        tail = _polyval(_PPF_C, s) / (_polyval(_PPF_D, s) * s + 1.0)
+        tail = np.where(q < 0, tail, -tail)
+    result = np.where(np.abs(q) <= 0.5 - _PPF_LOW, central, tail)
+    return np.where((p > 0) & (p < 1), result, np.nan)
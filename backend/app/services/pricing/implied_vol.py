@@ -0,0 +1,134 @@
+"""
+Batched implied volatility solver.
+
+Newton iterations on vega, safeguarded by a per-element bisection bracket:
+whenever a Newton step would leave the current bracket (or vega vanishes)
+that element falls back to bisection. Converged elements are masked out so
+each iteration only reprices the premiums still being solved.
+"""
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.services.payoff import CALL, FUT, LegArrays
+from app.services.pricing.legs import BLACK76, BLACK_SCHOLES, DEFAULT_RISK_FREE_RATE, pricing_model
+from app.services.pricing.models import (
+    black76_greeks,
+    black76_price,
+    black_scholes_greeks,
+    black_scholes_price,
+)
+
+VOL_LOWER = 1e-4
+VOL_UPPER = 5.0
+
+_MODELS = {
+    BLACK_SCHOLES: (black_scholes_price, black_scholes_greeks),
+    BLACK76: (black76_price, black76_greeks),
+}
+
+
+def implied_volatility(
+    price,
+    underlying,
+    strike,
+    t,
+    r=DEFAULT_RISK_FREE_RATE,
+    is_call=True,
+    model=BLACK_SCHOLES,
+    tol=1e-8,
+    max_iter=100,
+) -> np.ndarray:
+    """
+    Invert option premiums to annualised volatilities.
+
+    All inputs broadcast together. Elements whose premium lies outside the
+    no-arbitrage range for vols in ``[VOL_LOWER, VOL_UPPER]``, or that are
+    already expired, come back as NaN.
+    """
+    pricer, greeks = _MODELS[model]
+    price, underlying, strike, t, r, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=float),
+        np.asarray(underlying, dtype=float),
+        np.asarray(strike, dtype=float),
+        np.asarray(t, dtype=float),
+        np.asarray(r, dtype=float),
+        np.asarray(is_call, dtype=bool),
+    )
+    shape = price.shape
+    price, underlying, strike, t, r, is_call = (
+        a.ravel() for a in (price, underlying, strike, t, r, is_call)
+    )
+
+    low = np.full(price.shape, VOL_LOWER)
+    high = np.full(price.shape, VOL_UPPER)
+    vol = np.full(price.shape, np.nan)
+
+    args = (underlying, strike)
+    price_low = pricer(*args, low, t, r, is_call)
+    price_high = pricer(*args, high, t, r, is_call)
+    tolerance = tol * np.maximum(price, 1.0)
+    solvable = (
+        (t > 0) & (underlying > 0) & (strike > 0) & np.isfinite(price)
+        & (price >= price_low - tolerance) & (price <= price_high + tolerance)
+    )
+
+    # Brenner-Subrahmanyam at-the-money approximation as the starting point
+    with np.errstate(divide="ignore", invalid="ignore"):
+        guess = np.sqrt(2.0 * np.pi / t) * price / underlying
+    vol[solvable] = np.clip(np.nan_to_num(guess[solvable], nan=0.2), VOL_LOWER, VOL_UPPER)
+
+    active = np.flatnonzero(solvable)
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        sigma = vol[active]
+        model_price = pricer(underlying[active], strike[active], sigma, t[active], r[active], is_call[active])
+        vega = greeks(underlying[active], strike[active], sigma, t[active], r[active], is_call[active]).vega
+        diff = model_price - price[active]
+
+        converged = np.abs(diff) <= tolerance[active]
+        too_high = diff > 0
+        high[active] = np.where(too_high, np.minimum(high[active], sigma), high[active])
+        low[active] = np.where(too_high, low[active], np.maximum(low[active], sigma))
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            newton = sigma - diff / vega
+        lo, hi = low[active], high[active]
+        in_bracket = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        vol[active] = np.where(converged, sigma, np.where(in_bracket, newton, 0.5 * (lo + hi)))
+
+        still_open = ~converged & (hi - lo > tol)
+        active = active[still_open]
+
+    return vol.reshape(shape)
+
+
+def solve_leg_vols(legs: LegArrays, underlying: float, t: float, r=DEFAULT_RISK_FREE_RATE, model=None) -> np.ndarray:
+    """Implied volatility of every option leg's entry premium (NaN for futures)."""
+    model = model or pricing_model(legs)
+    is_option = legs.kind != FUT
+    vols = np.full(len(legs), np.nan)
+    vols[is_option] = implied_volatility(
+        legs.cost[is_option],
+        underlying,
+        legs.strike[is_option],
+        t,
+        r,
+        legs.kind[is_option] == CALL,
+        model,
+    )
+    return vols
+
+
+def with_implied_vols(custom_legs: List[Dict[str, Any]], vols: np.ndarray) -> List[Dict[str, Any]]:
+    """Copy of ``custom_legs`` with ``impliedVol`` set wherever a vol was solved."""
+    annotated = []
+    for leg, vol in zip(custom_legs, vols.tolist()):
+        leg = dict(leg)
+        if np.isfinite(vol):
+            leg["impliedVol"] = round(vol, 6)
+        else:
+            leg.pop("impliedVol", None)
+        annotated.append(leg)
+    return annotated
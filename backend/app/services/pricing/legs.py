@@ -0,0 +1,182 @@
+"""
+Theoretical (pre-expiry) valuation of strategy legs.
+
+Builds on :class:`app.services.payoff.LegArrays` so the same parsed legs feed
+both the expiry payoff engine and the option models. Strategies that contain
+a futures leg are priced with Black-76 against the futures price; everything
+else is priced with Black-Scholes against spot.
+"""
+import os
+from datetime import date
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from app.services.payoff import CALL, FUT, LegArrays
+from app.services.pricing.models import (
+    Greeks,
+    black76_greeks,
+    black76_price,
+    black_scholes_greeks,
+    black_scholes_price,
+)
+
+BLACK_SCHOLES = "black_scholes"
+BLACK76 = "black76"
+
+DEFAULT_RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", "0.065"))
+DAYS_PER_YEAR = 365.0
+
+_PRICERS = {BLACK_SCHOLES: black_scholes_price, BLACK76: black76_price}
+_GREEKS = {BLACK_SCHOLES: black_scholes_greeks, BLACK76: black76_greeks}
+
+
+def year_fraction(start: date, end: date) -> float:
+    """ACT/365 time between two dates, floored at zero."""
+    return max((end - start).days, 0) / DAYS_PER_YEAR
+
+
+def reference_price(legs: LegArrays, parameters: Optional[Dict[str, Any]] = None) -> Optional[float]:
+    """
+    Underlying level a strategy was entered against.
+
+    The first futures leg's entry price when there is one (the builder syncs
+    the underlying to it), otherwise ``parameters.underlyingPrice``.
+    """
+    price = reference_prices([parameters], legs, np.zeros(len(legs), dtype=np.intp))[0]
+    return float(price) if np.isfinite(price) else None
+
+
+def reference_prices(parameters_list: Sequence[Optional[Dict[str, Any]]], legs: LegArrays, owner: np.ndarray) -> np.ndarray:
+    """
+    :func:`reference_price` of many strategies whose legs are stacked in
+    ``legs`` (``owner`` maps each leg to its strategy), NaN where there is none.
+    """
+    prices = np.empty(len(parameters_list))
+    for i, parameters in enumerate(parameters_list):
+        try:
+            prices[i] = float((parameters or {}).get("underlyingPrice") or 0)
+        except (TypeError, ValueError):
+            prices[i] = np.nan
+    prices = np.where(prices > 0, prices, np.nan)
+
+    # The first futures leg wins when its entry price is set; a zero first
+    # futures leg falls back to ``underlyingPrice``
+    futures = np.flatnonzero(legs.kind == FUT)
+    owners, first = np.unique(owner[futures], return_index=True)
+    first_price = legs.strike[futures[first]]
+    prices[owners] = np.where(first_price > 0, first_price, prices[owners])
+    return np.where(np.isfinite(prices), prices, np.nan)
+
+
+def pricing_model(legs: LegArrays) -> str:
+    """Black-76 when the strategy is built on futures, Black-Scholes otherwise."""
+    return BLACK76 if bool((legs.kind == FUT).any()) else BLACK_SCHOLES
+
+
+def _expand(legs: LegArrays, underlying, vol, t):
+    """Broadcast the evaluation grid against a leading leg axis."""
+    underlying, t = np.broadcast_arrays(np.asarray(underlying, dtype=float), np.asarray(t, dtype=float))
+    tail = (1,) * underlying.ndim
+    vol = np.broadcast_to(np.asarray(vol, dtype=float), (len(legs),)).reshape((-1,) + tail)
+    column = lambda a: a.reshape((-1,) + tail)
+    return underlying[np.newaxis], t[np.newaxis], vol, column
+
+
+def mark_legs(legs: LegArrays, underlying, vol, t, r=DEFAULT_RISK_FREE_RATE, model=None) -> np.ndarray:
+    """
+    Theoretical value of every leg, shape ``(n_legs, *grid)``.
+
+    ``underlying`` and ``t`` (years to expiry) are broadcast against each
+    other to form the grid; ``vol`` is a scalar or one volatility per leg.
+    Futures are marked at the underlying and exited legs at their exit value.
+    """
+    model = model or pricing_model(legs)
+    s, t, vol, column = _expand(legs, underlying, vol, t)
+
+    values = _PRICERS[model](s, column(legs.strike), vol, t, r, column(legs.kind == CALL))
+    values = np.where(column(legs.kind == FUT), s, values)
+    return np.where(column(legs.is_open), values, column(legs.exit_value))
+
+
+def pointwise_leg_values(legs: LegArrays, underlying, vol, t, use_black76, r=DEFAULT_RISK_FREE_RATE) -> np.ndarray:
+    """
+    Theoretical value of every leg where the inputs vary per leg.
+
+    ``underlying``, ``vol`` and ``t`` have a leading leg axis and may carry
+    extra trailing (scenario) axes; ``use_black76`` picks the model per leg.
+    """
+    underlying, vol, t = np.broadcast_arrays(
+        np.asarray(underlying, dtype=float),
+        np.asarray(vol, dtype=float),
+        np.asarray(t, dtype=float),
+    )
+    tail = (1,) * (underlying.ndim - 1)
+    column = lambda a: a.reshape((-1,) + tail)
+    is_call = np.broadcast_to(column(legs.kind == CALL), underlying.shape)
+    strike = np.broadcast_to(column(legs.strike), underlying.shape)
+    values = np.empty(underlying.shape)
+
+    for model, mask in ((BLACK_SCHOLES, ~use_black76), (BLACK76, use_black76)):
+        if mask.any():
+            values[mask] = _PRICERS[model](
+                underlying[mask], strike[mask], vol[mask], t[mask], r, is_call[mask]
+            )
+
+    values = np.where(column(legs.kind == FUT), underlying, values)
+    return np.where(column(legs.is_open), values, column(legs.exit_value))
+
+
+def theoretical_pnl(legs: LegArrays, underlying, vol, t, r=DEFAULT_RISK_FREE_RATE, model=None) -> np.ndarray:
+    """Strategy P&L over the grid, marking open options at model value."""
+    grid_shape = np.broadcast_shapes(np.shape(underlying), np.shape(t))
+    if len(legs) == 0:
+        return np.zeros(grid_shape)
+    marks = mark_legs(legs, underlying, vol, t, r, model)
+    return np.tensordot(legs.weight, marks, axes=1) - float(legs.weight @ legs.cost)
+
+
+def _position_rules(greeks: Greeks, is_fut: np.ndarray, is_open: np.ndarray) -> Greeks:
+    return Greeks(
+        delta=np.where(is_open, np.where(is_fut, 1.0, greeks.delta), 0.0),
+        gamma=np.where(is_open & ~is_fut, greeks.gamma, 0.0),
+        vega=np.where(is_open & ~is_fut, greeks.vega, 0.0),
+        theta=np.where(is_open & ~is_fut, greeks.theta, 0.0),
+    )
+
+
+def leg_greeks(legs: LegArrays, underlying, vol, t, r=DEFAULT_RISK_FREE_RATE, model=None) -> Greeks:
+    """
+    Per-unit Greeks of every leg, shape ``(n_legs, *grid)``.
+
+    Futures carry a delta of one and no other Greeks; exited legs carry none.
+    Multiply by ``legs.weight`` to get position Greeks.
+    """
+    model = model or pricing_model(legs)
+    s, t, vol, column = _expand(legs, underlying, vol, t)
+
+    greeks = _GREEKS[model](s, column(legs.strike), vol, t, r, column(legs.kind == CALL))
+    return _position_rules(greeks, column(legs.kind == FUT), column(legs.is_open))
+
+
+def pointwise_leg_greeks(legs: LegArrays, underlying, vol, t, use_black76, r=DEFAULT_RISK_FREE_RATE) -> Greeks:
+    """
+    Per-unit Greeks with one evaluation point per leg, shape ``(n_legs,)``.
+
+    Used when legs from many strategies are stacked together, so underlying,
+    vol, time and pricing model can all differ from leg to leg.
+    """
+    n = len(legs)
+    underlying, vol, t, use_black76 = (
+        np.broadcast_to(np.asarray(a), (n,)) for a in (underlying, vol, t, use_black76)
+    )
+    is_call = legs.kind == CALL
+    fields = {name: np.zeros(n) for name in ("delta", "gamma", "vega", "theta")}
+
+    for model, mask in ((BLACK_SCHOLES, ~use_black76), (BLACK76, use_black76)):
+        if mask.any():
+            greeks = _GREEKS[model](underlying[mask], legs.strike[mask], vol[mask], t[mask], r, is_call[mask])
+            for name, values in fields.items():
+                values[mask] = getattr(greeks, name)
+
+    return _position_rules(Greeks(**fields), legs.kind == FUT, legs.is_open)
@@ -0,0 +1,114 @@
+"""
+Black-Scholes (spot) and Black-76 (futures) option pricing.
+
+Every function accepts scalars or NumPy arrays and broadcasts them against
+each other, so a whole book of legs (or a leg over a whole price/time grid)
+is priced in one call. Volatility is annualised (0.2 == 20%), time is in
+years, vega is per 1.00 change in volatility and theta is per year.
+
+Expired or zero-volatility inputs collapse to discounted intrinsic value.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.services.pricing._normal import norm_cdf, norm_pdf
+
+
+@dataclass(frozen=True)
+class Greeks:
+    """First and second order sensitivities, same shape as the priced inputs."""
+
+    delta: np.ndarray
+    gamma: np.ndarray
+    vega: np.ndarray
+    theta: np.ndarray
+
+
+def _prepare(forward, strike, vol, t, r, is_call):
+    forward, strike, vol, t, r, is_call = np.broadcast_arrays(
+        np.asarray(forward, dtype=float),
+        np.asarray(strike, dtype=float),
+        np.asarray(vol, dtype=float),
+        np.asarray(t, dtype=float),
+        np.asarray(r, dtype=float),
+        np.asarray(is_call, dtype=bool),
+    )
+    live = (t > 0) & (vol > 0) & (forward > 0) & (strike > 0)
+    sqrt_t = np.sqrt(np.where(live, t, 1.0))
+    vol_sqrt_t = np.where(live, vol, 1.0) * sqrt_t
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1 = (np.log(np.where(live, forward / strike, 1.0)) + 0.5 * vol_sqrt_t ** 2) / vol_sqrt_t
+    d2 = d1 - vol_sqrt_t
+    discount = np.exp(-r * np.maximum(t, 0.0))
+    return forward, strike, vol, t, r, is_call, live, sqrt_t, d1, d2, discount
+
+
+def _black(forward, strike, is_call, live, d1, d2, discount):
+    call = forward * norm_cdf(d1) - strike * norm_cdf(d2)
+    put = strike * norm_cdf(-d2) - forward * norm_cdf(-d1)
+    intrinsic = np.maximum(np.where(is_call, forward - strike, strike - forward), 0.0)
+    return discount * np.where(live, np.where(is_call, call, put), intrinsic)
+
+
+def black76_price(forward, strike, vol, t, r, is_call):
+    """Price options on a futures/forward price ``forward``."""
+    forward, strike, _, _, _, is_call, live, _, d1, d2, discount = _prepare(forward, strike, vol, t, r, is_call)
+    return _black(forward, strike, is_call, live, d1, d2, discount)
+
+
+def black_scholes_price(spot, strike, vol, t, r, is_call, q=0.0):
+    """Price options on a spot price with continuous dividend yield ``q``."""
+    spot = np.asarray(spot, dtype=float)
+    forward = spot * np.exp((np.asarray(r, dtype=float) - q) * np.maximum(np.asarray(t, dtype=float), 0.0))
+    return black76_price(forward, strike, vol, t, r, is_call)
+
+
+def black76_greeks(forward, strike, vol, t, r, is_call) -> Greeks:
+    """Greeks of a Black-76 option with respect to the futures price."""
+    forward, strike, vol, t, r, is_call, live, sqrt_t, d1, d2, discount = _prepare(
+        forward, strike, vol, t, r, is_call
+    )
+    price = _black(forward, strike, is_call, live, d1, d2, discount)
+    pdf = norm_pdf(d1)
+
+    itm = np.where(is_call, forward > strike, forward < strike)
+    expired_delta = np.where(itm, np.where(is_call, discount, -discount), 0.0)
+    delta = np.where(
+        live,
+        np.where(is_call, discount * norm_cdf(d1), -discount * norm_cdf(-d1)),
+        expired_delta,
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gamma = np.where(live, discount * pdf / (forward * vol * sqrt_t), 0.0)
+        theta = np.where(live, -discount * forward * pdf * vol / (2.0 * sqrt_t) + r * price, 0.0)
+    vega = np.where(live, discount * forward * pdf * sqrt_t, 0.0)
+    return Greeks(delta=delta, gamma=gamma, vega=vega, theta=theta)
+
+
+def black_scholes_greeks(spot, strike, vol, t, r, is_call, q=0.0) -> Greeks:
+    """Greeks of a Black-Scholes option with respect to the spot price."""
+    spot = np.asarray(spot, dtype=float)
+    carry = np.exp((np.asarray(r, dtype=float) - q) * np.maximum(np.asarray(t, dtype=float), 0.0))
+    forward, strike, vol, t, r, is_call, live, sqrt_t, d1, d2, discount = _prepare(
+        spot * carry, strike, vol, t, r, is_call
+    )
+    spot = forward / carry
+    dividend = np.exp(-q * np.maximum(t, 0.0))
+    pdf = norm_pdf(d1)
+
+    itm = np.where(is_call, forward > strike, forward < strike)
+    expired_delta = np.where(itm, np.where(is_call, dividend, -dividend), 0.0)
+    delta = np.where(
+        live,
+        np.where(is_call, dividend * norm_cdf(d1), -dividend * norm_cdf(-d1)),
+        expired_delta,
+    )
+    decay = -spot * dividend * pdf * vol / (2.0 * sqrt_t)
+    call_theta = decay - r * strike * discount * norm_cdf(d2) + q * spot * dividend * norm_cdf(d1)
+    put_theta = decay + r * strike * discount * norm_cdf(-d2) - q * spot * dividend * norm_cdf(-d1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gamma = np.where(live, dividend * pdf / (spot * vol * sqrt_t), 0.0)
+    vega = np.where(live, spot * dividend * pdf * sqrt_t, 0.0)
+    theta = np.where(live, np.where(is_call, call_theta, put_theta), 0.0)
+    return Greeks(delta=delta, gamma=gamma, vega=vega, theta=theta)
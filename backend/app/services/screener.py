@@ -0,0 +1,385 @@
+"""
+Combinatorial strategy screener over one expiry of the local option chain.
+
+Candidates are never enumerated leg by leg. Each structure is built from leg
+*pairs* generated with broadcasting (``triu_indices`` over the strike axis):
+verticals are the pairs themselves, butterflies pair a lower wing with a
+centre and look the upper wing up by strike, and iron condors combine a put
+credit spread with a call credit spread. Width, short-leg delta and credit
+constraints are applied to the pairs before they are combined, so the
+four-leg product only ever sees survivors.
+
+Every structure here has bounded risk, so its expiry payoff is fully
+described by its values at the leg strikes. Max profit, max loss and the
+probability of profit (lognormal at the ATM implied volatility, integrated
+over the profitable segments) are computed for a whole chunk of candidates
+at once, and a bounded min-heap keeps only the best ``top`` of them.
+"""
+import heapq
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.chain import ChainSlice
+from app.services.exits import leg_number
+from app.services.payoff import CALL, PUT
+from app.services.pricing import BLACK_SCHOLES, DAYS_PER_YEAR, black_scholes_greeks, implied_volatility
+from app.services.pricing._normal import norm_cdf
+
+CHUNK_SIZE = 200_000
+
+REWARD_RISK = "reward_risk"
+POP = "pop"
+THETA_PER_MARGIN = "theta_per_margin"
+RANK_METRICS = (REWARD_RISK, POP, THETA_PER_MARGIN)
+
+# (kind, side, ratio) per leg, strikes ascending
+STRUCTURES: Dict[str, Tuple[Tuple[int, float, float], ...]] = {
+    "iron-condor": ((PUT, 1.0, 1.0), (PUT, -1.0, 1.0), (CALL, -1.0, 1.0), (CALL, 1.0, 1.0)),
+    "butterfly": ((CALL, 1.0, 1.0), (CALL, -1.0, 2.0), (CALL, 1.0, 1.0)),
+    "bull-call-spread": ((CALL, 1.0, 1.0), (CALL, -1.0, 1.0)),
+    "bear-call-spread": ((CALL, -1.0, 1.0), (CALL, 1.0, 1.0)),
+    "bull-put-spread": ((PUT, 1.0, 1.0), (PUT, -1.0, 1.0)),
+    "bear-put-spread": ((PUT, -1.0, 1.0), (PUT, 1.0, 1.0)),
+}
+
+
+@dataclass(frozen=True)
+class ScreenConstraints:
+    """
+    Pruning rules. Widths are in price units (for a condor, per side);
+    deltas are absolute deltas of the short legs; ``min_credit`` is the net
+    premium received per unit (negative allows a debit up to that amount).
+    """
+
+    min_credit: Optional[float] = None
+    min_width: Optional[float] = None
+    max_width: Optional[float] = None
+    min_short_delta: Optional[float] = None
+    max_short_delta: Optional[float] = 0.5
+
+
+@dataclass
+class ChainBook:
+    """Priced, IV-solved calls and puts of one expiry, in one table."""
+
+    strike: np.ndarray
+    kind: np.ndarray
+    premium: np.ndarray
+    iv: np.ndarray
+    delta: np.ndarray
+    theta: np.ndarray  # per day
+    spot: float
+    t: float
+    r: float
+    atm_vol: float
+
+    def rows(self, kind: int) -> np.ndarray:
+        """Table rows of one option kind, strikes ascending."""
+        return np.flatnonzero(self.kind == kind)
+
+
+def build_book(chain: ChainSlice, spot: float, t: float, r: float) -> ChainBook:
+    """Keep options with a usable price and implied volatility; solve Greeks."""
+    price = chain.price
+    options = ((chain.kind == CALL) | (chain.kind == PUT)) & np.isfinite(price) & (price > 0) & (chain.strike > 0)
+    strike, kind, premium = chain.strike[options], chain.kind[options], price[options]
+    is_call = kind == CALL
+    iv = implied_volatility(premium, spot, strike, t, r, is_call, BLACK_SCHOLES)
+    usable = np.isfinite(iv) & (iv > 1e-3)
+    strike, kind, premium, iv, is_call = strike[usable], kind[usable], premium[usable], iv[usable], is_call[usable]
+    greeks = black_scholes_greeks(spot, strike, iv, t, r, is_call)
+
+    # ATM vol: average of the call and put IVs at the strike nearest the spot
+    atm_vol = np.nan
+    if strike.size:
+        atm_strike = strike[np.argmin(np.abs(strike - spot))]
+        atm_vol = float(iv[strike == atm_strike].mean())
+    return ChainBook(
+        strike=strike,
+        kind=kind,
+        premium=premium,
+        iv=iv,
+        delta=greeks.delta,
+        theta=greeks.theta / DAYS_PER_YEAR,
+        spot=spot,
+        t=t,
+        r=r,
+        atm_vol=atm_vol,
+    )
+
+
+def _pairs(book: ChainBook, kind: int, constraints: ScreenConstraints, short_index: int) -> np.ndarray:
+    """
+    Every (lower, higher) strike pair of one kind as table rows, shape
+    ``(n, 2)``, pruned on width and on the delta of the leg at ``short_index``.
+    """
+    rows = book.rows(kind)
+    lower, higher = np.triu_indices(rows.size, 1)
+    pairs = np.stack((rows[lower], rows[higher]), axis=1)
+    width = book.strike[pairs[:, 1]] - book.strike[pairs[:, 0]]
+    keep = np.ones(pairs.shape[0], dtype=bool)
+    if constraints.min_width is not None:
+        keep &= width >= constraints.min_width
+    if constraints.max_width is not None:
+        keep &= width <= constraints.max_width
+    if short_index is not None:
+        keep &= _delta_ok(book, pairs[:, short_index], constraints)
+    return pairs[keep]
+
+
+def _delta_ok(book: ChainBook, rows: np.ndarray, constraints: ScreenConstraints) -> np.ndarray:
+    delta = np.abs(book.delta[rows])
+    keep = np.ones(rows.shape[0], dtype=bool)
+    if constraints.min_short_delta is not None:
+        keep &= delta >= constraints.min_short_delta
+    if constraints.max_short_delta is not None:
+        keep &= delta <= constraints.max_short_delta
+    return keep
+
+
+def _credit(book: ChainBook, legs: np.ndarray, signed: np.ndarray) -> np.ndarray:
+    """Net premium received per unit for candidate leg rows ``(n, L)``."""
+    return -(book.premium[legs] @ signed)
+
+
+def candidate_chunks(book: ChainBook, structure: str, constraints: ScreenConstraints) -> Iterator[np.ndarray]:
+    """Leg-row arrays ``(n, L)`` of pruned two- and three-leg candidates."""
+    signed = np.array([side * ratio for _, side, ratio in STRUCTURES[structure]])
+    if structure == "butterfly":
+        # Lower wing x centre; the upper wing must sit at the mirrored strike
+        pairs = _pairs(book, CALL, constraints, short_index=1)
+        rows = book.rows(CALL)
+        strikes = book.strike[rows]
+        mirrored = 2.0 * book.strike[pairs[:, 1]] - book.strike[pairs[:, 0]]
+        at = np.minimum(np.searchsorted(strikes, mirrored), max(strikes.size - 1, 0))
+        found = np.abs(strikes[at] - mirrored) < 1e-6 if strikes.size else np.zeros(0, dtype=bool)
+        legs = np.concatenate((pairs[found], rows[at[found], None]), axis=1)
+    else:
+        kind, first_side, _ = STRUCTURES[structure][0]
+        legs = _pairs(book, kind, constraints, short_index=0 if first_side < 0 else 1)
+
+    if constraints.min_credit is not None and legs.size:
+        legs = legs[_credit(book, legs, signed) >= constraints.min_credit]
+    for start in range(0, legs.shape[0], CHUNK_SIZE):
+        yield legs[start:start + CHUNK_SIZE]
+
+
+def _scored_chunks(book: ChainBook, structure: str, rank_by: str, constraints: ScreenConstraints, floor: Callable[[], float]):
+    """
+    ``(score, materialize)`` per chunk: a score per candidate (NaN when the
+    candidate is invalid or cannot beat ``floor()``, the current k-th best)
+    and a function turning candidate positions into leg rows, so only the
+    survivors of the top-k cut are ever built.
+    """
+    if structure == "iron-condor":
+        yield from _condor_chunks(book, rank_by, constraints, floor)
+        return
+    for legs in candidate_chunks(book, structure, constraints):
+        metrics = evaluate(book, structure, legs)
+        # Risk-free or profitless candidates are data artefacts, not trades
+        valid = (metrics["max_loss"] > 0) & (metrics["max_profit"] > 0)
+        yield np.where(valid, metrics[rank_by], np.nan), legs.__getitem__
+
+
+def _condor_pop(book, credit, put_short, put_width, call_short, call_width) -> np.ndarray:
+    """Probability of expiring between the breakevens; a side whose credit covers its width has none."""
+    upper = np.where(credit < call_width, _lognormal_cdf(book, call_short + credit), 1.0)
+    lower = np.where(credit < put_width, _lognormal_cdf(book, put_short - credit), 0.0)
+    return upper - lower
+
+
+def _condor_chunks(book: ChainBook, rank_by: str, constraints: ScreenConstraints, floor: Callable[[], float]):
+    """
+    Put credit spreads (short the higher strike) x call credit spreads (short
+    the lower), scored as broadcast blocks in closed form: max profit is the
+    credit, max loss the wider side less the credit, and the breakevens sit
+    the credit away from the short strikes.
+    """
+    signed = np.array([side * ratio for _, side, ratio in STRUCTURES["iron-condor"]])
+    puts = _pairs(book, PUT, constraints, short_index=1)
+    calls = _pairs(book, CALL, constraints, short_index=0)
+    put_credit, call_credit = _credit(book, puts, signed[:2]), _credit(book, calls, signed[2:])
+    puts, put_credit = puts[put_credit > 0], put_credit[put_credit > 0]
+    calls, call_credit = calls[call_credit > 0], call_credit[call_credit > 0]
+    if not puts.size or not calls.size:
+        return
+
+    put_short, call_short = book.strike[puts[:, 1]], book.strike[calls[:, 0]]
+    put_width = put_short - book.strike[puts[:, 0]]
+    call_width = book.strike[calls[:, 1]] - call_short
+    put_theta, call_theta = book.theta[puts] @ signed[:2], book.theta[calls] @ signed[2:]
+
+    block = max(1, CHUNK_SIZE // calls.shape[0])
+    for start in range(0, puts.shape[0], block):
+        stop = min(start + block, puts.shape[0])
+        credit = put_credit[start:stop, None] + call_credit[None, :]
+        max_loss = np.maximum(put_width[start:stop, None], call_width[None, :]) - credit
+        valid = (put_short[start:stop, None] < call_short[None, :]) & (max_loss > 0)
+        if constraints.min_credit is not None:
+            valid &= credit >= constraints.min_credit
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if rank_by == REWARD_RISK:
+                score = credit / max_loss
+            elif rank_by == THETA_PER_MARGIN:
+                score = (put_theta[start:stop, None] + call_theta[None, :]) / max_loss
+            else:
+                # Bound first: the credit is at most the block's best put credit
+                # plus this call credit (and vice versa), which caps both
+                # breakevens. A side whose credit could cover its width may
+                # have no breakeven at all, so its term is bounded by 1 / 0
+                # as in _condor_pop. Only candidates whose bound beats the
+                # current k-th best get the exact probability.
+                best_put, best_call = put_credit[start:stop].max(), call_credit.max()
+                call_cap = call_credit + best_put
+                put_cap = put_credit[start:stop] + best_call
+                upper_cap = np.where(
+                    call_cap < call_width, _lognormal_cdf(book, call_short + call_cap), 1.0,
+                )
+                lower_floor = np.where(
+                    put_cap < put_width[start:stop], _lognormal_cdf(book, put_short[start:stop] - put_cap), 0.0,
+                )
+                valid &= (upper_cap[None, :] - lower_floor[:, None]) > floor()
+                pi, ci = np.nonzero(valid)
+                score = np.full(credit.shape, np.nan)
+                score[pi, ci] = _condor_pop(
+                    book, credit[pi, ci], put_short[start + pi], put_width[start + pi], call_short[ci], call_width[ci],
+                )
+
+        def materialize(positions, first=start):
+            p, c = np.divmod(positions, calls.shape[0])
+            return np.concatenate((puts[first + p], calls[c]), axis=1)
+
+        yield np.where(valid, score, np.nan).ravel(), materialize
+
+
+def _lognormal_cdf(book: ChainBook, x: np.ndarray) -> np.ndarray:
+    """P(S_T <= x) under a risk-neutral lognormal at the ATM vol."""
+    vol_sqrt_t = book.atm_vol * np.sqrt(book.t)
+    with np.errstate(divide="ignore"):
+        z = (np.log(np.maximum(x, 1e-12) / book.spot) - (book.r - 0.5 * book.atm_vol ** 2) * book.t) / vol_sqrt_t
+    return norm_cdf(z)
+
+
+def evaluate(book: ChainBook, structure: str, legs: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-unit risk metrics for candidate leg rows ``(n, L)``."""
+    template = STRUCTURES[structure]
+    signed = np.array([side * ratio for _, side, ratio in template])
+    is_call = np.array([kind == CALL for kind, _, _ in template])
+    strike = book.strike[legs]                      # (n, L), ascending
+    credit = _credit(book, legs, signed)
+
+    # Payoff at every leg strike: (n, kink, leg)
+    x = strike[:, :, None]
+    k = strike[:, None, :]
+    intrinsic = np.where(is_call, np.maximum(x - k, 0.0), np.maximum(k - x, 0.0))
+    value = intrinsic @ signed + credit[:, None]     # (n, kink)
+    max_profit = value.max(axis=1)
+    max_loss = -value.min(axis=1)
+
+    # Probability the payoff ends positive: tails plus each kink-to-kink segment
+    cdf = _lognormal_cdf(book, strike)
+    lo, hi = value[:, :-1], value[:, 1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        root = strike[:, :-1] + (strike[:, 1:] - strike[:, :-1]) * lo / (lo - hi)
+    root_cdf = _lognormal_cdf(book, np.where(np.isfinite(root), root, strike[:, :-1]))
+    segment = np.where(
+        (lo > 0) & (hi > 0), cdf[:, 1:] - cdf[:, :-1],
+        np.where((lo > 0) & (hi <= 0), root_cdf - cdf[:, :-1],
+                 np.where((lo <= 0) & (hi > 0), cdf[:, 1:] - root_cdf, 0.0)),
+    )
+    pop = segment.sum(axis=1) + np.where(value[:, 0] > 0, cdf[:, 0], 0.0) + np.where(value[:, -1] > 0, 1.0 - cdf[:, -1], 0.0)
+
+    theta = book.theta[legs] @ signed
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "credit": credit,
+            "max_profit": max_profit,
+            "max_loss": max_loss,
+            "pop": np.clip(pop, 0.0, 1.0),
+            "delta": book.delta[legs] @ signed,
+            "theta": theta,
+            "reward_risk": max_profit / max_loss,
+            "theta_per_margin": theta / max_loss,
+            "value_at_strikes": value,
+        }
+
+
+def screen(
+    book: ChainBook,
+    structure: str,
+    rank_by: str = REWARD_RISK,
+    top: int = 20,
+    constraints: ScreenConstraints = ScreenConstraints(),
+) -> Tuple[List[np.ndarray], int]:
+    """
+    Best ``top`` candidates by ``rank_by``, best first, as leg-row arrays,
+    plus the number of candidates that survived pruning and were scored.
+    """
+    heap: List[Tuple[float, int, Tuple[int, ...]]] = []
+    scored = 0
+    sequence = 0
+    def floor() -> float:
+        return heap[0][0] if len(heap) >= top else -np.inf
+
+    for score, materialize in _scored_chunks(book, structure, rank_by, constraints, floor):
+        valid = np.isfinite(score)
+        scored += int(valid.sum())
+        valid &= score > floor()
+        candidates = np.flatnonzero(valid)
+        if candidates.size > top:
+            candidates = candidates[np.argpartition(-score[candidates], top - 1)[:top]]
+
+        for position, legs in zip(candidates.tolist(), materialize(candidates).tolist()):
+            # Ties prefer the earlier candidate (larger -order)
+            item = (float(score[position]), -(sequence + position), tuple(legs))
+            if len(heap) < top:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        sequence += score.shape[0]
+
+    best = sorted(heap, reverse=True)
+    return [np.array(item[2]) for item in best], scored
+
+
+def candidate_records(book: ChainBook, structure: str, best: List[np.ndarray], quantity: float) -> List[Dict[str, Any]]:
+    """Output rows (frontend-shaped legs, totals scaled by ``quantity``)."""
+    if not best:
+        return []
+    legs = np.stack(best)
+    metrics = evaluate(book, structure, legs)
+    template = STRUCTURES[structure]
+    records = []
+    for i, rows in enumerate(legs):
+        strikes = book.strike[rows]
+        value = metrics["value_at_strikes"][i]
+        crossing = np.flatnonzero((value[:-1] > 0) != (value[1:] > 0))
+        breakevens = strikes[crossing] + (strikes[crossing + 1] - strikes[crossing]) * value[crossing] / (
+            value[crossing] - value[crossing + 1]
+        )
+        records.append({
+            "legs": [
+                {
+                    "instrumentType": "call" if kind == CALL else "put",
+                    "position": "buy" if side > 0 else "sell",
+                    "strike": leg_number(book.strike[row]),
+                    "premium": leg_number(book.premium[row]),
+                    "quantity": leg_number(ratio * quantity),
+                    "impliedVol": float(book.iv[row]),
+                }
+                for (kind, side, ratio), row in zip(template, rows.tolist())
+            ],
+            "net_premium": float(metrics["credit"][i] * quantity),
+            "max_profit": float(metrics["max_profit"][i] * quantity),
+            "max_loss": float(metrics["max_loss"][i] * quantity),
+            "breakevens": [float(b) for b in np.round(breakevens, 2).tolist()],
+            "reward_risk": float(metrics["reward_risk"][i]),
+            "pop": float(metrics["pop"][i]),
+            "delta": float(metrics["delta"][i] * quantity),
+            "theta": float(metrics["theta"][i] * quantity),
+            "theta_per_margin": float(metrics["theta_per_margin"][i]),
+        })
+    return records
@@ -0,0 +1,116 @@
+"""
+Server-side historical snapshots of exited strategies.
+
+Mirrors the frontend's ``createHistoricalSnapshot`` / ``calculateLegPnL``:
+per-leg realized P&L is ``signed quantity * (exit - entry)`` (premiums for
+options, prices for futures), computed for all legs at once from
+``LegArrays``. Legs without an exit have no realized P&L.
+
+The snapshot content is encoded canonically (sorted keys, compact
+separators, UTF-8, no NaN) and addressed by its SHA-256. Volatile envelope
+keys (``snapshotDate``, ``contentHash``) are excluded from the hashed content,
+so identical exits share one stored body and verifying a snapshot is a
+re-encode plus one hash, with no P&L re-derivation.
+"""
+import copy
+import hashlib
+import json
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.historical_snapshot import HistoricalSnapshot
+from app.services.payoff import LegArrays, _to_float
+
+ENVELOPE_KEYS = ("snapshotDate", "contentHash")
+
+_BREAKDOWN_KEYS = ("instrumentType", "position", "quantity", "entryPrice", "exitPrice", "premium", "exitPremium", "strike")
+
+
+def leg_realized_pnl(legs: LegArrays) -> np.ndarray:
+    """Realized P&L per leg; NaN for legs still open."""
+    return legs.weight * (legs.exit_value - legs.cost)
+
+
+def build_snapshot(
+    custom_legs: Optional[List[Dict[str, Any]]],
+    entry_date: Optional[date],
+    exit_date: Optional[date],
+    underlying_price_at_exit: Optional[float] = None,
+    notes: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Snapshot content (without envelope keys) in the frontend's shape."""
+    custom_legs = copy.deepcopy(custom_legs or [])
+    legs = LegArrays.from_legs(custom_legs)
+    per_leg = leg_realized_pnl(legs)
+    realized = float(np.nansum(per_leg)) + 0.0
+
+    breakdown = []
+    for leg, pnl in zip(custom_legs, per_leg.tolist()):
+        item = {"legId": leg.get("id"), **{key: leg.get(key) for key in _BREAKDOWN_KEYS}}
+        item["realizedPnL"] = None if np.isnan(pnl) else pnl + 0.0
+        breakdown.append(item)
+
+    quantity = np.array([_to_float(leg.get("quantity")) for leg in custom_legs])
+    lot_size = np.array([_to_float(leg.get("lotSize"), 1.0) or 1.0 for leg in custom_legs])
+
+    return {
+        "entryDate": entry_date.isoformat() if entry_date else None,
+        "exitDate": (exit_date or date.today()).isoformat(),
+        "legs": custom_legs,
+        "realizedPnL": realized,
+        "totalQuantity": float(quantity.sum()),
+        "totalLotSize": float((quantity * lot_size).sum()),
+        "legPnLBreakdown": breakdown,
+        "isWin": realized > 0,
+        "isLoss": realized < 0,
+        "isBreakEven": realized == 0,
+        "underlyingPriceAtExit": underlying_price_at_exit,
+        "notes": notes,
+    }
+
+
+def snapshot_content(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Hashed part of a stored snapshot (envelope keys removed)."""
+    return {key: value for key, value in snapshot.items() if key not in ENVELOPE_KEYS}
+
+
+def canonical_encode(content: Dict[str, Any]) -> bytes:
+    return json.dumps(
+        content, sort_keys=True, separators=(",", ":"), ensure_ascii=False, allow_nan=False
+    ).encode("utf-8")
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def seal_snapshot(content: Dict[str, Any]):
+    """Return ``(body, digest, snapshot)``: canonical bytes, hash and the enveloped dict."""
+    body = canonical_encode(content)
+    digest = content_hash(body)
+    snapshot = {
+        **json.loads(body),
+        "snapshotDate": datetime.now(timezone.utc).isoformat(),
+        "contentHash": digest,
+    }
+    return body, digest, snapshot
+
+
+def verify_snapshot(snapshot: Optional[Dict[str, Any]], expected_hash: Optional[str]) -> bool:
+    """True when the stored snapshot still hashes to ``expected_hash``."""
+    if not snapshot or not expected_hash:
+        return False
+    try:
+        body = canonical_encode(snapshot_content(snapshot))
+    except ValueError:
+        return False
+    return content_hash(body) == expected_hash
+
+
+async def store_snapshot_body(db, digest: str, body: bytes) -> None:
+    """Insert the canonical body once; identical snapshots share the row."""
+    stmt = insert(HistoricalSnapshot.__table__).values(content_hash=digest, body=body)
+    await db.execute(stmt.on_conflict_do_nothing(index_elements=["content_hash"]))
@@ -0,0 +1,85 @@
+"""
+Keeps the normalized ``strategy_legs`` table in step with ``custom_legs``.
+
+``custom_legs`` stays the API representation; every write path that changes
+it also calls :func:`replace_strategy_legs` in the same transaction so the
+typed table can be filtered and aggregated in SQL.
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.strategy import Strategy
+from app.models.strategy_leg import StrategyLeg
+from app.services.payoff import KIND_NAMES, kind_code, side_sign
+from app.services.portfolio import underlying_name
+
+_COLUMN_KEYS = {
+    "instrumentType": "instrument_type",
+    "position": "side",
+    "quantity": "quantity",
+    "strike": "strike",
+    "premium": "premium",
+    "exitPremium": "exit_premium",
+    "entryPrice": "entry_price",
+    "exitPrice": "exit_price",
+    "impliedVol": "implied_vol",
+}
+_NUMERIC = {"quantity", "strike", "premium", "exit_premium", "entry_price", "exit_price", "implied_vol"}
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def leg_row_values(
+    strategy_id,
+    user_id,
+    expiry_date,
+    parameters: Optional[Dict[str, Any]],
+    custom_legs: Optional[List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """Column values for each leg in ``custom_legs`` (also used by migrations)."""
+    rows = []
+    for index, leg in enumerate(custom_legs or []):
+        row = {
+            "strategy_id": strategy_id,
+            "user_id": user_id,
+            "leg_index": index,
+            "underlying": underlying_name(parameters),
+            "expiry_date": expiry_date,
+        }
+        for key, column in _COLUMN_KEYS.items():
+            value = leg.get(key)
+            row[column] = _number(value) if column in _NUMERIC else value
+
+        # Normalized exactly as the payoff engine reads them, so the typed
+        # table agrees with how the leg is valued and fits its columns
+        row["instrument_type"] = KIND_NAMES[kind_code(row["instrument_type"] or "call")]
+        row["side"] = "sell" if side_sign(row["side"] or "buy") < 0 else "buy"
+        row["quantity"] = row["quantity"] or 0
+        extra = {k: v for k, v in leg.items() if k not in _COLUMN_KEYS}
+        row["extra"] = extra or None
+        rows.append(row)
+    return rows
+
+
+async def replace_strategy_legs(db: AsyncSession, strategy: Strategy) -> None:
+    """Rewrite ``strategy``'s leg rows from its current ``custom_legs``."""
+    await db.execute(delete(StrategyLeg).where(StrategyLeg.strategy_id == strategy.id))
+    db.add_all(
+        StrategyLeg(**values)
+        for values in leg_row_values(
+            strategy.id,
+            strategy.user_id,
+            strategy.expiry_date,
+            strategy.parameters,
+            strategy.custom_legs,
+        )
+    )
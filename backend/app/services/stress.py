@@ -0,0 +1,73 @@
+"""
+Scenario stress testing over spot, volatility and time shocks.
+
+Combinations of shocks are evaluated as broadcasted computations of shape
+``(legs, spot shocks, vol shifts, days forward)`` over an
+:class:`~app.services.portfolio.OpenBook`, then collapsed over the leg axis.
+Large grids are produced one spot shock at a time, in blocks of days that
+keep the leg-level temporaries under ``STRESS_CHUNK_CELLS``, so peak memory
+does not grow with the grid; ``STRESS_MAX_CELLS`` caps the total work.
+"""
+import os
+from typing import Sequence
+
+import numpy as np
+
+from app.services.portfolio import OpenBook
+from app.services.pricing import DAYS_PER_YEAR, DEFAULT_RISK_FREE_RATE, pointwise_leg_values
+
+MIN_VOLATILITY = 1e-4
+STRESS_MAX_CELLS = int(os.getenv("STRESS_MAX_CELLS", "10000000"))  # legs x scenarios per request
+STRESS_CHUNK_CELLS = int(os.getenv("STRESS_CHUNK_CELLS", "250000"))  # legs x scenarios per block
+
+
+def stress_cells(book: OpenBook, spot_shocks: Sequence[float], vol_shifts: Sequence[float], days_forward: Sequence[int]) -> int:
+    """Leg-level evaluations a stress grid needs."""
+    return max(len(book.legs), 1) * len(spot_shocks) * len(vol_shifts) * len(days_forward)
+
+
+def book_value(book: OpenBook, spot_shocks, vol_shifts, days_forward, r=DEFAULT_RISK_FREE_RATE) -> np.ndarray:
+    """P&L versus entry for every scenario, shape ``(spot, vol, days)``."""
+    spot_shocks = np.asarray(spot_shocks, dtype=float)
+    vol_shifts = np.asarray(vol_shifts, dtype=float)
+    days_forward = np.asarray(days_forward, dtype=float)
+    shape = (spot_shocks.size, vol_shifts.size, days_forward.size)
+
+    legs = book.legs
+    live = book.priced | ~legs.is_open
+    if not live.any():
+        return np.zeros(shape)
+
+    leg = (slice(None), np.newaxis, np.newaxis, np.newaxis)
+    underlying = np.nan_to_num(book.underlying)[leg] * (1.0 + spot_shocks[np.newaxis, :, np.newaxis, np.newaxis])
+    vol = np.maximum(np.nan_to_num(book.vol)[leg] + vol_shifts[np.newaxis, np.newaxis, :, np.newaxis], MIN_VOLATILITY)
+    t = np.maximum(book.t[leg] - days_forward[np.newaxis, np.newaxis, np.newaxis, :] / DAYS_PER_YEAR, 0.0)
+
+    values = pointwise_leg_values(legs, underlying, vol, t, book.use_black76, r)
+    weight = np.where(live, legs.weight, 0.0)
+    return np.tensordot(weight, values, axes=1) - float(weight @ legs.cost)
+
+
+def base_value(book: OpenBook, r: float = DEFAULT_RISK_FREE_RATE) -> float:
+    """P&L of the unshocked book today."""
+    return float(book_value(book, [0.0], [0.0], [0], r)[0, 0, 0])
+
+
+def stress_row(
+    book: OpenBook,
+    base: float,
+    spot_shock: float,
+    vol_shifts: Sequence[float],
+    days_forward: Sequence[int],
+    r: float = DEFAULT_RISK_FREE_RATE,
+) -> np.ndarray:
+    """P&L change versus ``base`` for one spot shock, shape ``(vol, days)``."""
+    vol_shifts = np.asarray(vol_shifts, dtype=float)
+    days_forward = np.asarray(days_forward, dtype=float)
+    block = max(1, STRESS_CHUNK_CELLS // (max(len(book.legs), 1) * vol_shifts.size))
+    row = np.empty((vol_shifts.size, days_forward.size))
+    for start in range(0, days_forward.size, block):
+        days = days_forward[start:start + block]
+        row[:, start:start + days.size] = book_value(book, [spot_shock], vol_shifts, days, r)[0]
+    return row - base
+
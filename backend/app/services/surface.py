@@ -0,0 +1,117 @@
+"""
+T+n payoff surface: strategy P&L over (days to expiry x underlying price).
+
+The pricer is broadcast over both axes at once, and the resulting matrix is
+shipped quantized to 10 bits, second-order delta-encoded along the price axis
+(P&L is piecewise smooth in price, so most second differences are tiny) and
+zlib-compressed. A 200 x 60 surface comes to roughly 1.5-4 KB of base64.
+"""
+import base64
+import zlib
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.services.payoff import CALL, FUT, LegArrays
+from app.services.pricing import (
+    DAYS_PER_YEAR,
+    DEFAULT_RISK_FREE_RATE,
+    implied_volatility,
+    pricing_model,
+    theoretical_pnl,
+)
+
+DEFAULT_VOLATILITY = 0.2
+# 10-bit levels: finer than any chart the surface is drawn on
+QUANT_LEVELS = 1023
+DELTA_ORDER = 2
+
+_WIRE_DTYPES = {"int8": "i1", "int16": "<i2", "int32": "<i4"}
+
+
+def evaluation_days(entry_date: date, expiry_date: date, count: int) -> np.ndarray:
+    """Up to ``count`` distinct whole-day offsets from entry, ending at expiry."""
+    total = max((expiry_date - entry_date).days, 0)
+    return np.unique(np.round(np.linspace(0, total, min(count, total + 1))).astype(int))
+
+
+def leg_vols(
+    legs: LegArrays,
+    underlying: float,
+    t_entry: float,
+    r: float = DEFAULT_RISK_FREE_RATE,
+    fallback: float = DEFAULT_VOLATILITY,
+) -> np.ndarray:
+    """Stored leg IVs, solving any missing ones from the entry premium."""
+    vol = legs.implied_vol.copy()
+    missing = np.isnan(vol) & (legs.kind != FUT)
+    if missing.any() and t_entry > 0:
+        vol[missing] = implied_volatility(
+            legs.cost[missing], underlying, legs.strike[missing], t_entry, r,
+            legs.kind[missing] == CALL, pricing_model(legs),
+        )
+    return np.where(np.isfinite(vol), vol, fallback)
+
+
+def pnl_surface(legs: LegArrays, prices: np.ndarray, days_to_expiry: np.ndarray, vol, r=DEFAULT_RISK_FREE_RATE) -> np.ndarray:
+    """P&L matrix of shape ``(len(days_to_expiry), len(prices))``."""
+    t = (np.asarray(days_to_expiry, dtype=float) / DAYS_PER_YEAR)[:, np.newaxis]
+    return theoretical_pnl(legs, np.asarray(prices, dtype=float)[np.newaxis, :], vol, t, r)
+
+
+def encode_surface(surface: np.ndarray) -> Dict[str, Any]:
+    """
+    Quantize a surface to ``QUANT_LEVELS`` levels between its min and max,
+    take ``DELTA_ORDER`` successive differences of each row along the price
+    axis, store them in the narrowest integer type that fits and
+    zlib-compress the result.
+
+    Decoding: ``base64 -> inflate -> cumsum along rows (DELTA_ORDER times)
+    -> * scale + offset``.
+    """
+    offset = float(surface.min()) if surface.size else 0.0
+    span = float(surface.max()) - offset if surface.size else 0.0
+    scale = span / QUANT_LEVELS if span > 0 else 1.0
+
+    deltas = np.rint((surface - offset) / scale).astype(np.int32)
+    for _ in range(DELTA_ORDER):
+        deltas = np.diff(deltas, axis=1, prepend=0)
+    largest = int(np.abs(deltas).max()) if deltas.size else 0
+    dtype = next(name for name in _WIRE_DTYPES if largest <= np.iinfo(name).max)
+    payload = zlib.compress(deltas.astype(_WIRE_DTYPES[dtype]).tobytes(), 9)
+
+    return {
+        "shape": list(surface.shape),
+        "dtype": dtype,
+        "scale": scale,
+        "offset": offset,
+        "encoding": f"delta{DELTA_ORDER}+zlib+base64",
+        "data": base64.b64encode(payload).decode("ascii"),
+    }
+
+
+def build_surface(
+    legs: LegArrays,
+    prices: np.ndarray,
+    entry_date: date,
+    expiry_date: date,
+    underlying: float,
+    date_points: int,
+    default_volatility: Optional[float] = None,
+    r: float = DEFAULT_RISK_FREE_RATE,
+) -> Dict[str, Any]:
+    """Surface from entry to expiry, with legs' own IVs where available."""
+    days = evaluation_days(entry_date, expiry_date, date_points)
+    total = (expiry_date - entry_date).days
+    t_entry = max(total, 0) / DAYS_PER_YEAR
+    vol = leg_vols(legs, underlying, t_entry, r, default_volatility or DEFAULT_VOLATILITY)
+
+    days_to_expiry = total - days
+    surface = pnl_surface(legs, prices, days_to_expiry, vol, r)
+    return {
+        "prices": {"start": float(prices[0]), "stop": float(prices[-1]), "count": int(prices.size)},
+        "dates": [entry_date + timedelta(days=int(d)) for d in days],
+        "model": pricing_model(legs),
+        "surface": encode_surface(surface),
+    }
@@ -0,0 +1,263 @@
+"""
+Parallel parameter sweeps over backtest rule variants.
+
+A sweep is a base :class:`BacktestConfig` plus a grid of overrides: config
+fields (``profit_target``, ``min_days_to_expiry``, ...) or a single leg's
+rule via ``legs.<index>.<field>``. The cartesian product of the grid, or a
+seeded random sample of it, is fanned out over a ``ProcessPoolExecutor``.
+Workers open the chain store themselves; its columns and lookup keys are
+memory-mapped files, so all workers read the same page cache and only the
+small configs cross the process boundary.
+
+Every finished variant is appended to a JSON-lines results file, keyed by a
+hash of (store version, config, seed). Running the same sweep again skips
+the variants already in the file, so an interrupted sweep resumes where it
+stopped, and the seed makes both the sample and the bootstrap metrics
+reproducible.
+
+At most ``SWEEP_CONCURRENCY`` sweeps run per server process; callers take a
+slot from :data:`sweep_slots` without blocking and refuse the sweep when
+none is free, so the process pools never multiply past that bound.
+"""
+import json
+import math
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.services.backtest import OPEN, BacktestConfig, run_backtest, summarize_backtest, validate_config
+from app.services.chain import DEFAULT_STORE_DIR, ChainStore
+from app.services.snapshot import canonical_encode, content_hash
+
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", str(min(8, os.cpu_count() or 1))))
+SWEEP_MAX_VARIANTS = int(os.getenv("SWEEP_MAX_VARIANTS", "5000"))
+SWEEP_CONCURRENCY = int(os.getenv("SWEEP_CONCURRENCY", "1"))
+SWEEP_DIR = Path(os.getenv("SWEEP_DIR", DEFAULT_STORE_DIR.parent / "sweeps"))
+BOOTSTRAP_SAMPLES = 1000
+
+sweep_slots = threading.BoundedSemaphore(max(SWEEP_CONCURRENCY, 1))
+
+SWEEP_FIELDS = {
+    "entry_weekday": int,
+    "min_days_to_expiry": int,
+    "quantity": float,
+    "profit_target": float,
+    "stop_loss": float,
+    "exit_days_before_expiry": int,
+    "risk_free_rate": float,
+}
+LEG_FIELDS = {"rule": str, "value": float, "ratio": float}
+
+METRICS = (
+    "trades",
+    "total_pnl",
+    "win_rate",
+    "expectancy",
+    "expectancy_p05",
+    "profit_factor",
+    "max_drawdown",
+    "sharpe",
+    "sortino",
+)
+
+
+def apply_params(base: BacktestConfig, params: Dict[str, Any]) -> BacktestConfig:
+    """``base`` with one grid point's overrides applied and validated."""
+    legs = list(base.legs)
+    changes = {}
+    for name, value in params.items():
+        parts = name.split(".")
+        if len(parts) == 3 and parts[0] == "legs" and parts[1].isdigit() and parts[2] in LEG_FIELDS:
+            index = int(parts[1])
+            if index >= len(legs):
+                raise ValueError(f"No leg {index} to sweep in {name}")
+            legs[index] = replace(legs[index], **{parts[2]: LEG_FIELDS[parts[2]](value)})
+        elif name in SWEEP_FIELDS:
+            # None is a legitimate variant for the optional exit rules
+            changes[name] = None if value is None else SWEEP_FIELDS[name](value)
+        else:
+            raise ValueError(f"Cannot sweep {name}")
+    return validate_config(replace(base, legs=tuple(legs), **changes))
+
+
+def expand_grid(grid: Dict[str, Sequence[Any]], sample: Optional[int] = None, seed: int = 0) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    ``(index, params)`` per grid point in product order. With ``sample`` a
+    seeded subset is drawn; indices are decoded without building the product.
+    """
+    names = list(grid)
+    shape = tuple(len(grid[name]) for name in names)
+    if any(size == 0 for size in shape):
+        raise ValueError("Every swept parameter needs at least one value")
+    total = math.prod(shape)
+    # Check the size before allocating any index array
+    count = total if sample is None else min(sample, total)
+    if count > SWEEP_MAX_VARIANTS:
+        raise ValueError(f"Sweep has {count} variants; the limit is {SWEEP_MAX_VARIANTS} (use sample)")
+    if total > np.iinfo(np.int64).max:
+        raise ValueError("Sweep grid is too large to index")
+
+    if count < total:
+        picked = np.sort(np.random.default_rng(seed).choice(total, size=count, replace=False))
+    else:
+        picked = np.arange(total)
+
+    coords = np.unravel_index(picked, shape) if names else ()
+    return [
+        (int(index), {name: grid[name][int(axis[i])] for name, axis in zip(names, coords)})
+        for i, index in enumerate(picked.tolist())
+    ]
+
+
+def variant_id(store_version: str, config: BacktestConfig, seed: int) -> str:
+    content = asdict(config)
+    content["start"], content["end"] = config.start.isoformat(), config.end.isoformat()
+    return content_hash(canonical_encode({"store": store_version, "config": content, "seed": seed}))
+
+
+def evaluate_variant(store: ChainStore, config: BacktestConfig, rng_seed: int) -> Dict[str, Optional[float]]:
+    """Journal metrics of one variant plus a bootstrap lower bound on expectancy."""
+    results = run_backtest(store, config)
+    analytics = summarize_backtest(results)
+    summary = analytics["summary"] or {}
+    metrics = {name: summary.get(name) for name in METRICS}
+    metrics["trades"] = analytics["trades"]
+
+    pnl = np.concatenate([result.pnl[result.exit_reason != OPEN] for result in results]) if results else np.empty(0)
+    if pnl.size:
+        draws = np.random.default_rng(rng_seed).integers(0, pnl.size, size=(BOOTSTRAP_SAMPLES, pnl.size))
+        metrics["expectancy_p05"] = float(np.quantile(pnl[draws].mean(axis=1), 0.05))
+    return metrics
+
+
+_worker_store: Optional[ChainStore] = None
+
+
+def _init_worker(root: str, version: str) -> None:
+    global _worker_store
+    _worker_store = ChainStore(root)
+    if _worker_store.version != version:
+        raise RuntimeError("Chain store changed while the sweep was starting")
+
+
+def _evaluate_in_worker(config: BacktestConfig, rng_seed: int) -> Dict[str, Optional[float]]:
+    return evaluate_variant(_worker_store, config, rng_seed)
+
+
+def load_results(path: Optional[Path]) -> Dict[str, Dict[str, Any]]:
+    """Finished variants from a results file; a torn last line is ignored."""
+    done = {}
+    if path is None or not Path(path).is_file():
+        return done
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            done[row["id"]] = row
+    return done
+
+
+def rank_results(rows: Iterable[Dict[str, Any]], sort_by: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Sort by each metric in turn, best (largest) first; a ``-`` prefix sorts
+    that metric ascending. Missing values go last, ties keep grid order.
+    """
+    keys = []
+    for name in sort_by:
+        metric = name.lstrip("-")
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        keys.append((metric, -1.0 if name.startswith("-") else 1.0))
+
+    def sort_key(row):
+        values = []
+        for metric, direction in keys:
+            value = row["metrics"].get(metric)
+            values.append((value is None, 0.0 if value is None else -direction * value))
+        return (*values, row["index"])
+
+    return sorted(rows, key=sort_key)
+
+
+@dataclass
+class SweepOutcome:
+    rows: List[Dict[str, Any]]  # every variant, in grid order
+    computed: int
+    resumed: int
+
+
+def run_sweep(
+    base: BacktestConfig,
+    grid: Dict[str, Sequence[Any]],
+    root: Union[str, Path] = DEFAULT_STORE_DIR,
+    results_path: Optional[Union[str, Path]] = None,
+    sample: Optional[int] = None,
+    seed: int = 0,
+    workers: int = SWEEP_WORKERS,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> SweepOutcome:
+    """Evaluate every grid variant, resuming from ``results_path`` when given."""
+    store = ChainStore(root)
+    jobs = []
+    for index, params in expand_grid(grid, sample, seed):
+        config = apply_params(base, params)
+        jobs.append((index, variant_id(store.version, config, seed), params, config))
+
+    done = load_results(results_path)
+    # Positions come from this run's grid, which may be ordered differently
+    rows = {vid: {**done[vid], "index": index, "params": params} for index, vid, params, _ in jobs if vid in done}
+    pending = [job for job in jobs if job[1] not in rows]
+    resumed = len(rows)
+
+    log = None
+    if results_path is not None and pending:
+        Path(results_path).parent.mkdir(parents=True, exist_ok=True)
+        log = open(results_path, "a+", encoding="utf-8")
+        # Terminate a line torn by an interrupted run so the next row parses
+        if log.tell() > 0:
+            log.seek(log.tell() - 1)
+            if log.read(1) != "\n":
+                log.write("\n")
+
+    def record(job, metrics):
+        index, vid, params, _ = job
+        row = {"id": vid, "index": index, "params": params, "metrics": metrics}
+        rows[vid] = row
+        if log is not None:
+            log.write(json.dumps(row) + "\n")
+            log.flush()
+        if progress is not None:
+            progress(len(rows), len(jobs))
+
+    try:
+        if workers <= 1 or len(pending) <= 1:
+            for job in pending:
+                record(job, evaluate_variant(store, job[3], int(job[1][:15], 16)))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(pending)),
+                initializer=_init_worker,
+                initargs=(str(store.root), store.version),
+            ) as pool:
+                futures = {
+                    pool.submit(_evaluate_in_worker, job[3], int(job[1][:15], 16)): job
+                    for job in pending
+                }
+                for future in as_completed(futures):
+                    record(futures[future], future.result())
+    finally:
+        if log is not None:
+            log.close()
+
+    return SweepOutcome(
+        rows=[rows[job[1]] for job in jobs],
+        computed=len(pending),
+        resumed=resumed,
+    )
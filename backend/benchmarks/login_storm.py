@@ -0,0 +1,72 @@
+"""
+Event-loop latency under a login storm.
+
+Fires N concurrent password verifications, either inline on the event loop
+(the old behaviour) or through the bounded hashing pool, while a ticker
+coroutine measures how late each 5 ms wake-up is.
+
+Run from backend/:  python -m benchmarks.login_storm --logins 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.security import (
+    hash_password,
+    password_pool,
+    verify_and_update_password,
+    verify_and_update_password_async,
+)
+
+TICK = 0.005
+
+
+async def ticker(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def storm(mode: str, logins: int, hashed: str):
+    async def inline_login():
+        await asyncio.sleep(0)
+        verify_and_update_password("correct horse", hashed)
+
+    async def pooled_login():
+        await verify_and_update_password_async("correct horse", hashed)
+
+    login = inline_login if mode == "inline" else pooled_login
+    lags: list = []
+    stop = asyncio.Event()
+    tick_task = asyncio.create_task(ticker(stop, lags))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await tick_task
+    lags_ms = sorted(1000 * lag for lag in lags)
+    p99 = lags_ms[int(0.99 * (len(lags_ms) - 1))] if lags_ms else 0.0
+    print(
+        f"{mode:>7}: {logins} logins in {elapsed:.2f}s | loop lag "
+        f"p50 {statistics.median(lags_ms) if lags_ms else 0:.1f} ms, "
+        f"p99 {p99:.1f} ms, max {lags_ms[-1] if lags_ms else 0:.1f} ms"
+    )
+
+
+async def main(logins: int):
+    hashed = hash_password("correct horse")
+    await storm("inline", logins, hashed)
+    await storm("pool", logins, hashed)
+    print("pool stats:", password_pool.stats())
+    password_pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100)
+    asyncio.run(main(parser.parse_args().logins))
@@ -0,0 +1,73 @@
+"""
+Run a backtest parameter sweep over the local option chain store.
+
+The spec is a JSON file shaped like the POST /api/backtest/sweep body. With
+--out, finished variants are appended as they complete and a rerun resumes.
+
+Run from backend/:  python -m scripts.backtest_sweep spec.json [--out results.jsonl] [--workers N] [--sort sharpe expectancy_p05] [--top 20]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from app.schemas.backtest import SweepRequest
+from app.services.backtest import build_config
+from app.services.chain import DEFAULT_STORE_DIR
+from app.services.sweep import SWEEP_WORKERS, rank_results, run_sweep
+
+
+def print_table(rows, sort_by):
+    params = list(rows[0]["params"]) if rows else []
+    metrics = list(dict.fromkeys([name.lstrip("-") for name in sort_by] + ["trades", "total_pnl", "win_rate", "max_drawdown"]))
+    print("\t".join(["rank", *params, *metrics]))
+    for rank, row in enumerate(rows, 1):
+        values = [row["metrics"].get(name) for name in metrics]
+        print("\t".join([
+            str(rank),
+            *(str(row["params"][name]) for name in params),
+            *("-" if value is None else f"{value:.4g}" for value in values),
+        ]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("spec", type=Path, help="Sweep spec (JSON)")
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE_DIR, help="Store directory")
+    parser.add_argument("--out", type=Path, help="Results file (JSON lines); enables resume")
+    parser.add_argument("--workers", type=int, default=SWEEP_WORKERS)
+    parser.add_argument("--sort", nargs="+", help="Metrics to sort by (overrides the spec)")
+    parser.add_argument("--top", type=int, help="Rows to print (overrides the spec)")
+    args = parser.parse_args()
+
+    try:
+        spec = SweepRequest(**json.loads(args.spec.read_text()))
+        config = build_config(spec)
+        sort_by = args.sort or spec.sort_by
+        rank_results([], sort_by)
+    except (ValidationError, ValueError) as exc:
+        sys.exit(f"invalid spec: {exc}")
+
+    def progress(done, total):
+        print(f"\r{done}/{total} variants", end="", file=sys.stderr, flush=True)
+
+    started = time.perf_counter()
+    outcome = run_sweep(
+        config, spec.grid, args.store, args.out, spec.sample, spec.seed, args.workers, progress,
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"\n{len(outcome.rows)} variants: {outcome.computed} computed, {outcome.resumed} resumed ({elapsed:.1f}s)",
+        file=sys.stderr,
+    )
+
+    top = args.top or spec.top
+    ranked = rank_results(outcome.rows, sort_by)
+    print_table(ranked[:top] if top else ranked, sort_by)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Ingest NSE F&O bhavcopy files (.csv or .zip) into the local option chain store.
+
+Run from backend/:  python -m scripts.ingest_bhavcopy data/bhavcopy/*.csv [--store DIR]
+"""
+import argparse
+import time
+from pathlib import Path
+
+from app.services.chain import DEFAULT_STORE_DIR, ingest_bhavcopies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="+", type=Path, help="Bhavcopy files or directories")
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE_DIR, help="Store directory")
+    args = parser.parse_args()
+
+    files = []
+    for path in args.paths:
+        files.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in (".csv", ".zip")) if path.is_dir() else [path])
+
+    started = time.perf_counter()
+    stats = ingest_bhavcopies(files, args.store)
+    elapsed = time.perf_counter() - started
+    print(f"ingested {stats['files']} files: {stats['added']} new rows, {stats['rows']} total ({elapsed:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
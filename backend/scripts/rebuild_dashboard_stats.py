@@ -0,0 +1,61 @@
+"""
+Recompute dashboard aggregates from the strategies table.
+
+With --check nothing is written; rows whose incremental aggregates differ
+from a fresh recomputation are printed and the exit status is 1.
+
+Run from backend/:  python -m scripts.rebuild_dashboard_stats [--user UUID] [--check]
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.dashboard import UserStrategyStats
+from app.services.dashboard import COUNTERS, compute_stats, rebuild_stats
+
+
+async def check(user_id) -> int:
+    async with AsyncSessionLocal() as db:
+        fresh = await compute_stats(db, user_id)
+        query = select(UserStrategyStats)
+        if user_id is not None:
+            query = query.where(UserStrategyStats.user_id == user_id)
+        stored = {row.user_id: row for row in (await db.execute(query)).scalars()}
+
+    mismatches = 0
+    for uid in sorted(set(fresh) | set(stored), key=str):
+        expected = fresh.get(uid, {})
+        row = stored.get(uid)
+        for name in COUNTERS:
+            want = expected.get(name, 0)
+            got = getattr(row, name) if row is not None else 0
+            if want != got:
+                mismatches += 1
+                print(f"{uid} {name}: stored={got} expected={want}")
+    print(f"{len(fresh)} users checked, {mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+async def rebuild(user_id) -> int:
+    async with AsyncSessionLocal() as db:
+        written = await rebuild_stats(db, user_id)
+        await db.commit()
+    print(f"rebuilt aggregates for {written} users")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--user", type=uuid.UUID, default=None, help="Only this user id")
+    parser.add_argument("--check", action="store_true", help="Compare instead of rewriting")
+    args = parser.parse_args()
+    runner = check if args.check else rebuild
+    sys.exit(asyncio.run(runner(args.user)))
+
+
+if __name__ == "__main__":
+    main()
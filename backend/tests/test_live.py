@@ -0,0 +1,131 @@
+"""
+LiveHub / Subscriber behaviour driven by a scripted ReplayFeed.
+
+Run from backend/:  python -m pytest tests
+"""
+import asyncio
+import uuid
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from app.services.live import LiveHub, ReplayFeed, Subscriber
+
+TICK = 0.01
+
+
+def _strategy(underlying, legs, underlying_price):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        custom_legs=legs,
+        parameters={"underlying": underlying, "underlyingPrice": underlying_price},
+        entry_date=date.today(),
+        expiry_date=date.today() + timedelta(days=30),
+    )
+
+
+def _long_future(underlying="NIFTY", price=100):
+    legs = [{"instrumentType": "fut", "position": "buy", "entryPrice": str(price), "quantity": "1"}]
+    return _strategy(underlying, legs, price)
+
+
+def _short_put(underlying="BANKNIFTY", strike=100):
+    legs = [{"instrumentType": "put", "position": "sell", "strike": str(strike), "premium": "3", "quantity": "1"}]
+    return _strategy(underlying, legs, strike)
+
+
+class Harness:
+    """A hub fed by ``ticks`` and one subscriber recording what it is sent."""
+
+    def __init__(self, ticks, min_interval=0.0, interval=TICK):
+        self.hub = LiveHub(lambda: ReplayFeed(ticks, interval=interval, loop=False))
+        self.sent = []
+        self.subscriber = Subscriber(self._send, min_interval=min_interval)
+        self._outbox = None
+
+    async def _send(self, message):
+        self.sent.append(message)
+
+    def start(self):
+        self._outbox = asyncio.create_task(self.subscriber.run())
+
+    async def finish(self, settle=0.05):
+        if self.hub._task is not None:
+            await self.hub._task
+        await asyncio.sleep(settle)
+        self._outbox.cancel()
+        self.hub.stop()
+
+    @property
+    def updates(self):
+        return [message["strategies"] for message in self.sent if message["type"] == "mtm"]
+
+
+def test_only_changed_strategies_and_fields_are_sent():
+    async def scenario():
+        future, put = _long_future(), _short_put()
+        harness = Harness([{"NIFTY": 100}, {"NIFTY": 100}, {"NIFTY": 101}])
+        harness.start()
+        harness.hub.subscribe(harness.subscriber, [future, put])
+        await harness.finish()
+        return harness.updates, str(future.id), str(put.id)
+
+    updates, future_id, put_id = asyncio.run(scenario())
+
+    # The repeated tick changes nothing, so only two updates go out
+    assert len(updates) == 2
+    first, second = updates
+    assert set(first) == {future_id}
+    assert first[future_id]["underlying_price"] == 100.0
+    assert first[future_id]["delta"] == 1.0
+    # A futures leg keeps delta 1, so only the price-driven fields change
+    assert set(second[future_id]) == {"underlying_price", "value", "pnl"}
+    assert second[future_id]["pnl"] == 1.0
+    # The put's underlying never ticks; it is not priced and never sent
+    assert put_id not in second
+
+
+def test_ticks_inside_the_throttle_interval_are_coalesced():
+    async def scenario():
+        future = _long_future()
+        ticks = [{"NIFTY": price} for price in (100, 101, 102, 103)]
+        harness = Harness(ticks, min_interval=0.2)
+        harness.start()
+        harness.hub.subscribe(harness.subscriber, [future])
+        await harness.finish(settle=0.3)
+        return harness.updates, str(future.id)
+
+    updates, future_id = asyncio.run(scenario())
+
+    assert [update[future_id]["underlying_price"] for update in updates] == [100.0, 103.0]
+    assert updates[1][future_id]["pnl"] == 3.0
+
+
+def test_subscribe_and_unsubscribe_rebuild_the_shared_book():
+    async def scenario():
+        nifty, bank = _long_future("NIFTY", 100), _long_future("BANKNIFTY", 200)
+        harness = Harness([{"NIFTY": 100, "BANKNIFTY": 200}], interval=0.0)
+        other = Subscriber(harness._send, min_interval=0.0)
+        harness.start()
+
+        harness.hub.subscribe(harness.subscriber, [nifty])
+        harness.hub.subscribe(other, [bank])
+        await harness.hub._task
+        both = set(harness.hub._row_of)
+        legs_before = len(harness.hub._book.legs)
+
+        harness.hub.unsubscribe(harness.subscriber, [str(nifty.id)])
+        harness.hub.on_tick({"NIFTY": 105, "BANKNIFTY": 201})
+        after_unsubscribe = set(harness.hub._row_of)
+        legs_after = len(harness.hub._book.legs)
+
+        harness.hub.remove(other)
+        harness.hub.remove(harness.subscriber)
+        stopped = harness.hub._task is None
+        await harness.finish()
+        return both, legs_before, after_unsubscribe, legs_after, stopped, str(nifty.id), str(bank.id)
+
+    both, legs_before, after_unsubscribe, legs_after, stopped, nifty_id, bank_id = asyncio.run(scenario())
+
+    assert both == {nifty_id, bank_id} and legs_before == 2
+    assert after_unsubscribe == {bank_id} and legs_after == 1
+    assert stopped
@@ -37,7 +37,13 @@ export function DashboardPage() {
     try {
       const token = localStorage.getItem("token");
 
-      const res = await fetch(`${API_BASE_URL}/api/strategies`, {
+      // historical_snapshot is not in the default list projection
+      const fields = [
+        "id", "name", "strategy_type", "status", "entry_date", "expiry_date",
+        "exit_date", "parameters", "custom_legs", "notes", "actual_profit",
+        "historical_snapshot", "updated_at",
+      ].join(",");
+      const res = await fetch(`${API_BASE_URL}/api/strategies?fields=${fields}`, {
         headers: {
           Authorization: `Bearer ${token}`,
         },